@@ -0,0 +1,197 @@
+import os
+import re
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import MetaData, Table, Column, Index
+from sqlalchemy.sql.expression import text, select, delete, func
+from sqlalchemy.types import DateTime, Integer, String, Text
+
+# Minimum cosine similarity between two normalized questions for a cached answer to be reused
+DEFAULT_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.98"))
+# Shorter questions only reuse answers to the exact same question: "recipes with pork" and
+# "recipes with beef" differ in one word and embed almost identically
+MIN_SEMANTIC_WORDS = int(os.getenv("ANSWER_CACHE_MIN_SEMANTIC_WORDS", "8"))
+DEFAULT_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+
+
+# Words that refer back to the conversation ("how long do I bake it?", "what about dessert?"):
+# a question using them is only cached when it starts a conversation
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|one|ones|instead|also|another|else|again|same|above|"
+    r"previous|earlier|you said|what about|how about)\b|^(and|but|or|so|then)\b",
+    re.IGNORECASE,
+)
+MIN_STANDALONE_WORDS = 3
+
+
+def is_standalone(question: str) -> bool:
+    """Whether a question can be answered without the conversation before it, e.g. "Which recipes use pork?"."""
+    normalized = normalize_question(question)
+    return len(normalized.split()) >= MIN_STANDALONE_WORDS and not FOLLOW_UP_PATTERN.search(normalized)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase a question and strip punctuation/extra whitespace so trivial variants share a key."""
+    question = re.sub(r"[^\w\s]", " ", question.lower())
+    return " ".join(question.split())
+
+
+class AnswerCache:
+    """Semantic answer cache shared by all app workers through Postgres (ai.answer_cache).
+
+    Answers are stored per collection with the embedding of the normalized question. A
+    lookup first tries the exact normalized question, then, for questions of at least
+    min_semantic_words words, the nearest cached question whose cosine similarity is at
+    least `threshold`. Only answers that do not depend on a conversation belong here:
+    standalone questions (see is_standalone) or the first question of a conversation
+    (see PDFAssistant.stream_chat). Entries expire after ttl_seconds and
+    each collection keeps at most max_entries, evicting the least recently hit.
+    """
+
+    def __init__(self, db_engine, embedder, schema: Optional[str] = "ai", table_name: str = "answer_cache",
+                 threshold: float = DEFAULT_THRESHOLD, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, min_semantic_words: int = MIN_SEMANTIC_WORDS):
+        self.db_engine = db_engine
+        self.embedder = embedder
+        self.schema = schema
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_semantic_words = min_semantic_words
+        self.metadata = MetaData(schema=schema)
+        self.table = Table(
+            table_name,
+            self.metadata,
+            Column("id", String, primary_key=True),
+            Column("collection", String, nullable=False),
+            Column("question", Text, nullable=False),
+            Column("embedding", Vector(embedder.dimensions)),
+            Column("answer", Text, nullable=False),
+            Column("hits", Integer, nullable=False, server_default=text("0")),
+            Column("created_at", DateTime(timezone=True), server_default=text("now()")),
+            Column("last_hit_at", DateTime(timezone=True), server_default=text("now()")),
+            Index(f"{table_name}_collection_idx", "collection", "last_hit_at"),
+            extend_existing=True,
+        )
+        self._created = False
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def create(self) -> None:
+        if self._created:
+            return
+        with self.db_engine.begin() as conn:
+            conn.execute(text("create extension if not exists vector;"))
+            if self.schema is not None:
+                conn.execute(text(f"create schema if not exists {self.schema};"))
+        self.table.create(self.db_engine, checkfirst=True)
+        self._created = True
+
+    def _key(self, collection: str, normalized: str) -> str:
+        return hashlib.md5(f"{collection}\x00{normalized}".encode()).hexdigest()
+
+    def _fresh(self):
+        return self.table.c.created_at > func.now() - text(f"interval '{int(self.ttl_seconds)} seconds'")
+
+    def lookup(self, collection: str, question: str) -> Optional[str]:
+        """Return a cached answer for question (or a near-identical one), or None."""
+        self.create()
+        normalized = normalize_question(question)
+        key = self._key(collection, normalized)
+        table = self.table
+
+        with self.db_engine.begin() as conn:
+            row = conn.execute(select(table.c.id, table.c.answer).where(table.c.id == key, self._fresh())).first()
+            kind = "exact"
+            if row is None and len(normalized.split()) >= self.min_semantic_words:
+                embedding = self.embedder.get_embedding(normalized)
+                if embedding:
+                    distance = table.c.embedding.cosine_distance(embedding)
+                    row = conn.execute(
+                        select(table.c.id, table.c.answer, distance.label("distance"))
+                        .where(table.c.collection == collection, self._fresh())
+                        .order_by(distance)
+                        .limit(1)
+                    ).first()
+                    if row is not None and 1 - row.distance < self.threshold:
+                        row = None
+                kind = "semantic"
+
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+
+            conn.execute(
+                table.update().where(table.c.id == row.id).values(hits=table.c.hits + 1, last_hit_at=func.now())
+            )
+        with self._lock:
+            if kind == "exact":
+                self.exact_hits += 1
+            else:
+                self.semantic_hits += 1
+        return row.answer
+
+    def store(self, collection: str, question: str, answer: str) -> None:
+        if not answer or not answer.strip():
+            return
+        self.create()
+        normalized = normalize_question(question)
+        embedding = self.embedder.get_embedding(normalized)
+        if not embedding:
+            return
+        table = self.table
+        stmt = postgresql.insert(table).values(
+            id=self._key(collection, normalized), collection=collection, question=normalized,
+            embedding=embedding, answer=answer,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_=dict(answer=answer, embedding=embedding, created_at=func.now(), last_hit_at=func.now()),
+        )
+        with self.db_engine.begin() as conn:
+            conn.execute(stmt)
+            # Size-based eviction: keep the max_entries most recently hit answers per collection
+            keep = (
+                select(table.c.id).where(table.c.collection == collection)
+                .order_by(table.c.last_hit_at.desc()).limit(self.max_entries)
+            )
+            conn.execute(delete(table).where(table.c.collection == collection, table.c.id.not_in(keep.scalar_subquery())))
+
+    def invalidate(self, collection: str) -> None:
+        """Drop every cached answer for a collection, e.g. after it was re-ingested."""
+        self.create()
+        with self.db_engine.begin() as conn:
+            result = conn.execute(delete(self.table).where(self.table.c.collection == collection))
+        print(f"Invalidated {result.rowcount} cached answers for {collection}")
+
+    def prune_expired(self) -> None:
+        self.create()
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(~self._fresh()))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process, plus the shared entry and hit totals from Postgres."""
+        self.create()
+        with self.db_engine.connect() as conn:
+            entries, total_hits = conn.execute(
+                select(func.count(), func.coalesce(func.sum(self.table.c.hits), 0)).select_from(self.table)
+            ).one()
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "entries": entries,
+                "shared_hits": int(total_hits),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
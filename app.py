@@ -4,14 +4,17 @@ import os
 os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
 
 import streamlit as st
-from pdf_assistant import PDFAssistant
+# Only light modules are imported up front; pdf_assistant (phi, SQLAlchemy, pgvector, PyMuPDF) is imported
+# on first use, or by the background ingestion job, so the first render does not wait for it
+from ingestion_jobs import ingestion_jobs, ingest_pdf
 from utils import load_environment, get_example_queries, get_filename_from_url
-import hashlib
 
-# Disable logging from pdf_assistant or any noisy modules if present
 import logging
 
-logging.getLogger().setLevel(logging.WARNING)  # Set root logger level to WARNING
+# Noisy modules stay at WARNING (LOG_LEVEL); each chat turn's timing spans are logged as one JSON line
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
+logging.getLogger("recipe_assistant.timing").setLevel(os.getenv("TIMING_LOG_LEVEL", "INFO").upper())
 
 # Page configuration with clean layout
 st.set_page_config(
@@ -79,48 +82,76 @@ default_pdf_url = "https://reseaudumieuxetre.ca/wp-content/uploads/2021/01/Frenc
 
 
 def get_cookbook_description(pdf_url, assistant=None):
-    """Generate a description using LLM analysis of the cookbook content."""
+    """The LLM description generated when the cookbook was ingested, else one based on the filename."""
     if assistant and st.session_state.kb_loaded:
         try:
-            # Use the assistant to analyze and describe the cookbook
-            prompt = """Based on the cookbook content you have access to, provide a brief 1-2 sentence description of this cookbook. 
-            Focus on: cuisine type, author/origin, main themes, and what makes it special. 
-            Start with 'This cookbook...' and keep it concise and engaging. Maximum 150 characters."""
-
-            description = assistant.chat(prompt)
-            # Clean up the response and ensure it's properly formatted
-            description = description.strip()
-
-            # If it's too long, truncate at a sentence boundary
-            if len(description) > 150:
-                # Try to find the end of the first sentence
-                sentence_end = description.find('. ')
-                if sentence_end > 50 and sentence_end < 150:
-                    description = description[:sentence_end + 1]
-                else:
-                    # Just truncate at word boundary
-                    words = description[:147].split()
-                    description = ' '.join(words[:-1]) + "..."
-
-            return description
+            # Stored at ingestion time (see ingestion_jobs.ingest_pdf), so no LLM call per session
+            description = assistant.get_description(generate=False)
+            if description:
+                return description
         except Exception as e:
-            print(f"Error generating LLM description: {e}")
-            # Fall back to filename-based description
-            pass
+            print(f"Error loading cookbook description: {e}")
 
     # Fallback: Simple filename-based description
     cookbook_name = get_filename_from_url(pdf_url).replace('.pdf', '').replace('-', ' ').replace('_', ' ')
     return f"This cookbook '{cookbook_name}' contains a collection of recipes and cooking instructions."
 
 
+def current_user_id():
+    """Signed-in user's email when Streamlit authentication is configured, else the shared default user."""
+    try:
+        if st.user.is_logged_in:
+            return st.user.email
+    except Exception:
+        pass  # Authentication is not configured
+    return "user"
+
+
+def start_ingestion(url, force_reload=False):
+    """Download and ingest a cookbook in the background; identical in-flight jobs are shared."""
+    job = ingestion_jobs.submit(
+        # A forced reload is not the same job as a queued normal load of the URL
+        (url, db_url, force_reload),
+        lambda job: ingest_pdf(job, url, db_url, force_revalidate=force_reload),
+        description=url,
+    )
+    st.session_state.update({
+        "ingest_job_id": job.job_id,
+        "ingest_start_new": force_reload,
+        "ingest_error": None,
+        "ingest_ready": None,
+        # Messages sent after this point are not dropped when the job finishes (see show_ingestion_status)
+        "ingest_message_count": len(st.session_state.get("messages", [])),
+    })
+    return job
+
+
+def switch_cookbook(result):
+    """Make an ingested cookbook the active one, starting a new chat."""
+    messages = st.session_state.messages
+    # A question that has not been answered yet (e.g. a Quick Start button pressed during the
+    # first load) carries over and is answered from the new cookbook
+    pending = messages[-1:] if messages and messages[-1]["role"] == "user" else []
+    st.session_state.update({
+        **result,  # pdf_url, pdf_path, collection_name, cookbook_description (generated at ingestion)
+        "kb_loaded": True,
+        "messages": pending,
+        "run_id": None,
+        "assistant_initialized": False,
+        "start_new": st.session_state.get("ingest_start_new", False),
+        "ingest_ready": None,
+    })
+    st.rerun()
+
+
 # Initialize session state
 if 'pdf_url' not in st.session_state:
-    st.session_state.pdf_url = default_pdf_url
+    # No cookbook is active until its background ingestion has finished
+    st.session_state.pdf_url = None
+    st.session_state.pdf_path = None
+    st.session_state.collection_name = None
     st.session_state.kb_loaded = False
-    # Auto-generate initial collection name
-    url_hash = hashlib.md5(default_pdf_url.encode()).hexdigest()[:12]
-    filename = default_pdf_url.split('/')[-1].replace('.pdf', '').replace(' ', '_')[:20]
-    st.session_state.collection_name = f"pdf_{filename}_{url_hash}"
+    start_ingestion(default_pdf_url)
     st.session_state.messages = []
     st.session_state.run_id = None
     st.session_state.assistant_initialized = False
@@ -134,7 +165,7 @@ with st.sidebar:
     st.markdown("### 📁 Document Setup")
     pdf_url = st.text_input(
         "Cookbook PDF URL",
-        value=st.session_state.pdf_url,
+        value=st.session_state.pdf_url or default_pdf_url,
         placeholder="Enter PDF URL here...",
         label_visibility="collapsed"
     )
@@ -142,36 +173,63 @@ with st.sidebar:
     load_clicked = st.button("📥 Load PDF", type="primary", use_container_width=True)
 
     if load_clicked:
-        # Auto-generate collection name from PDF URL
-        url_hash = hashlib.md5(pdf_url.encode()).hexdigest()[:12]
-        filename = pdf_url.split('/')[-1].replace('.pdf', '').replace(' ', '_')[:20]
+        # Force reload revalidates the cached download; unchanged content keeps its collection.
+        # Ingestion runs in the background, so the current cookbook stays usable meanwhile.
+        start_ingestion(pdf_url, st.session_state.get('force_reload', False))
+        st.info("📥 Loading PDF in the background...")
+
+    @st.fragment(run_every=2)
+    def show_ingestion_status():
+        """Poll the background ingestion job and switch to its cookbook once it is done.
+
+        If the current cookbook was chatted with in the meantime, its conversation stays on
+        screen and a button offers the switch instead.
+        """
+        def offer_switch(result):
+            st.success(f"✅ {get_filename_from_url(result['pdf_url'])} is ready")
+            if st.button("🔄 Switch to it (starts a new chat)", key="switch_cookbook", use_container_width=True):
+                switch_cookbook(result)
+
+        if st.session_state.get("ingest_ready"):
+            offer_switch(st.session_state.ingest_ready)
+            return
+
+        job_id = st.session_state.get("ingest_job_id")
+        job = ingestion_jobs.get(job_id) if job_id else None
+        if job is None:
+            if st.session_state.get("ingest_error"):
+                st.error(f"❌ Could not load PDF: {st.session_state.ingest_error}")
+            return
+
+        if job.active:
+            if job.stage == "parsing":
+                label = f"📄 Parsing pages {job.pages_parsed}/{job.pages_total}"
+            elif job.stage == "embedding":
+                label = f"🧠 Embedding chunks {job.chunks_embedded}/{job.chunks_total}"
+            else:
+                label = f"⏳ {job.stage.capitalize()}..."
+            st.progress(job.fraction, text=label)
+            return
 
-        # Add timestamp if force reload is enabled
-        force_reload = st.session_state.get('force_reload', False)
-        if force_reload:
-            import time
+        st.session_state.ingest_job_id = None
+        if job.status == "failed":
+            st.session_state.ingest_error = job.error
+            st.error(f"❌ Could not load PDF: {job.error}")
+            return
 
-            timestamp = int(time.time())
-            auto_collection_name = f"pdf_{filename}_{url_hash}_{timestamp}"
-        else:
-            auto_collection_name = f"pdf_{filename}_{url_hash}"
+        if st.session_state.pdf_url and len(st.session_state.messages) > st.session_state.ingest_message_count:
+            # The current cookbook was used while this one loaded; switching would drop that chat
+            st.session_state.ingest_ready = job.result
+            offer_switch(job.result)
+            return
+        switch_cookbook(job.result)
 
-        st.session_state.update({
-            "pdf_url": pdf_url,
-            "collection_name": auto_collection_name,
-            "kb_loaded": False,
-            "messages": [],
-            "run_id": None,
-            "assistant_initialized": False,
-            "start_new": force_reload,  # Use force_reload flag
-            "cookbook_description": None,  # Reset description when loading new PDF
-        })
-        st.success("✅ PDF loaded successfully!")
+    show_ingestion_status()
 
     # Document Status Section - compact
     st.markdown("### 📄 Current Cookbook")
     if st.session_state.get("pdf_url"):
-        # Use cached description or generate new one
+        # Use the description stored at ingestion time, or a filename-based one
         if st.session_state.get("cookbook_description"):
             description = st.session_state.cookbook_description
         else:
@@ -193,15 +251,18 @@ with st.sidebar:
 
     # Advanced Options - in expander to save space
     with st.expander("🔧 Advanced Options"):
-        force_reload = st.checkbox("🔄 Force reload (clear existing)", value=False)
+        force_reload = st.checkbox("🔄 Force reload (re-download)", value=False, key="force_reload")
         if force_reload:
-            st.warning("⚠️ Will clear existing data for this PDF")
+            st.warning("⚠️ Will re-check the PDF for changes and start a new session")
 
         # Clear database button
         if st.button("🗑️ Clear Database", help="Remove all stored data"):
             st.session_state.clear()
             st.success("Database cleared! Please reload your PDF.")
 
+        # Connection pool stats, filled in at the end of the script (see show_pool_stats)
+        pool_caption = st.empty()
+
     # Help Section
     with st.expander("ℹ️ Quick Help"):
         st.markdown("""
@@ -222,33 +283,103 @@ with st.sidebar:
         st.caption(f"💬 Session: {st.session_state.run_id[:8]}...")
 
 
+def create_assistant():
+    """Create a PDFAssistant for the current cookbook and session."""
+    from pdf_assistant import PDFAssistant
+
+    return PDFAssistant(
+        pdf_url=st.session_state.pdf_url,
+        collection_name=st.session_state.collection_name,
+        db_url=db_url,
+        run_id=st.session_state.get("run_id"),
+        user_id=current_user_id(),
+        pdf_path=st.session_state.get("pdf_path")
+    )
+
+
+def assistant_key():
+    return st.session_state.collection_name, st.session_state.get("run_id"), current_user_id()
+
+
 def initialize_assistant():
     with st.spinner("🔄 Initializing assistant..."):
-        assistant = PDFAssistant(
-            pdf_url=st.session_state.pdf_url,
-            collection_name=st.session_state.collection_name,
-            db_url=db_url,
-            run_id=st.session_state.get("run_id")
-        )
+        assistant = create_assistant()
 
         if not st.session_state.kb_loaded:
             assistant.initialize_knowledge_base()
             st.session_state.kb_loaded = True
 
         if not st.session_state.get("run_id"):
-            existing = assistant.get_existing_run_ids()
-            if existing and not st.session_state.get("start_new", False):
-                st.session_state.run_id = existing[0]
+            latest = assistant.get_latest_run_id()
+            if latest and not st.session_state.get("start_new", False):
+                st.session_state.run_id = latest
                 st.sidebar.success(f"Resuming session: {st.session_state.run_id}")
+                # Show the latest messages of the resumed session
+                assistant.run_id = st.session_state.run_id
+                if not st.session_state.messages:
+                    st.session_state.messages = [
+                        {"role": m["role"], "content": m.get("content") or ""}
+                        for m in assistant.get_chat_history(page_size=50)["messages"]
+                        if m.get("role") in ("user", "assistant")
+                    ]
 
         assistant.initialize_assistant()
         st.session_state.update({
             "assistant_initialized": True,
             "run_id": assistant.run_id
         })
+        # Kept across reruns, which then skip rebuilding the assistant (see below)
+        st.session_state.update({"assistant": assistant, "assistant_key": assistant_key()})
         return assistant
 
 
+def latency_rows(metrics):
+    """Table rows for a response's timing spans, setup (if any) first; nesting is shown by indentation."""
+    rows = []
+    for spans in (metrics.get("setup_spans") or [], metrics.get("spans") or []):
+        for span in spans:
+            details = {k: v for k, v in span.items() if k not in ("name", "depth", "start_ms", "ms", "self_ms")}
+            rows.append({
+                "span": "\u2003" * span["depth"] + span["name"],
+                "ms": span["ms"],
+                "self ms": span["self_ms"],
+                "details": ", ".join(f"{k}={v}" for k, v in details.items() if k not in ("run_id", "collection")),
+            })
+    return rows
+
+
+def show_latency_breakdown(rows):
+    with st.expander("⏱️ Latency breakdown"):
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+def stream_response(assistant, question):
+    """Render the assistant's answer token by token and record it in the chat history."""
+    response = st.write_stream(assistant.stream_chat(question))
+
+    # Add assistant response to chat history, with its timings so reruns can show them again
+    metrics = assistant.last_response_metrics
+    st.session_state.messages.append({
+        "role": "assistant",
+        "content": response,
+        "latency": latency_rows(metrics) if metrics else None,
+    })
+
+    if metrics:
+        st.session_state.setdefault("response_metrics", []).append(metrics)
+        caption = (
+            f"⏱️ First token {metrics['time_to_first_token']:.2f}s · "
+            f"{metrics['tokens_per_second']:.1f} tokens/s · total {metrics['total_time']:.2f}s"
+        )
+        if assistant.answer_cache is not None:
+            stats = assistant.answer_cache.stats()
+            source = "♻️ cached answer" if metrics["source"] == "cache" else f"source: {metrics['source']}"
+            caption += f" · {source} · cache hit rate {stats['hit_rate']:.0%}"
+        st.caption(caption)
+        show_latency_breakdown(st.session_state.messages[-1]["latency"])
+    return response
+
+
 # Display example queries - compact layout
 st.subheader("💡 Quick Start")
 cols = st.columns(3)
@@ -265,30 +396,20 @@ st.divider()
 if st.session_state.pdf_url and not st.session_state.assistant_initialized:
     # Auto-initialize the assistant if we have a PDF
     assistant = initialize_assistant()
-    # Generate cookbook description once assistant is ready - with error handling
+    # Load the stored cookbook description once the assistant is ready (e.g. for a resumed session)
     if assistant and st.session_state.kb_loaded and not st.session_state.get("cookbook_description"):
-        try:
-            st.session_state.cookbook_description = get_cookbook_description(st.session_state.pdf_url, assistant)
-            st.sidebar.success("🤖 Generated AI description")
-        except Exception as e:
-            print(f"Failed to generate AI description: {e}")
-            st.session_state.cookbook_description = get_cookbook_description(st.session_state.pdf_url)
+        st.session_state.cookbook_description = get_cookbook_description(st.session_state.pdf_url, assistant)
 elif st.session_state.assistant_initialized:
-    # Recreate the assistant with the current settings
-    assistant = PDFAssistant(
-        pdf_url=st.session_state.pdf_url,
-        collection_name=st.session_state.collection_name,
-        db_url=db_url,
-        run_id=st.session_state.run_id
-    )
-    assistant.initialize_assistant()
-    # Generate description if we don't have one yet - with error handling
+    # Reuse this session's assistant while the cookbook, session and user are unchanged
+    if st.session_state.get("assistant_key") == assistant_key():
+        assistant = st.session_state.assistant
+    else:
+        assistant = create_assistant()
+        assistant.initialize_assistant()
+        st.session_state.update({"assistant": assistant, "assistant_key": assistant_key()})
+    # Load the stored description if we don't have one yet
     if not st.session_state.get("cookbook_description") and st.session_state.kb_loaded:
-        try:
-            st.session_state.cookbook_description = get_cookbook_description(st.session_state.pdf_url, assistant)
-        except Exception as e:
-            print(f"Failed to generate AI description: {e}")
-            st.session_state.cookbook_description = get_cookbook_description(st.session_state.pdf_url)
+        st.session_state.cookbook_description = get_cookbook_description(st.session_state.pdf_url, assistant)
 else:
     assistant = None
 
@@ -296,12 +417,14 @@ else:
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
+        if message.get("latency"):
+            show_latency_breakdown(message["latency"])
 
 # Check if we need to process the last message (from sample question or new input)
 if 'process_question' not in st.session_state:
     st.session_state.process_question = False
 
-if st.session_state.process_question and st.session_state.messages:
+if st.session_state.process_question and st.session_state.messages and st.session_state.pdf_url:
     # Process the last user message
     last_message = st.session_state.messages[-1]
     if last_message["role"] == "user":
@@ -311,14 +434,7 @@ if st.session_state.process_question and st.session_state.messages:
 
         # Get assistant response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = assistant.chat(last_message["content"])
-
-                # Display assistant response
-                st.markdown(response)
-
-                # Add assistant response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": response})
+            stream_response(assistant, last_message["content"])
 
         # Clear the flag
         st.session_state.process_question = False
@@ -339,13 +455,24 @@ if st.session_state.pdf_url:
 
         # Get assistant response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = assistant.chat(prompt)
+            stream_response(assistant, prompt)
+elif st.session_state.get("ingest_job_id"):
+    st.info("⏳ The cookbook is being loaded in the background; you can chat as soon as it is ready.")
+else:
+    st.info("📌 Please enter a Cookbook PDF URL and click 'Load PDF' to begin.")
 
-                # Display assistant response
-                st.markdown(response)
 
-                # Add assistant response to chat history
-                st.session_state.messages.append({"role": "assistant", "content": response})
-else:
-    st.info("📌 Please enter a Cookbook PDF URL and click 'Load PDF' to begin.")
\ No newline at end of file
+def show_pool_stats():
+    """Fill in the connection pool caption under Advanced Options."""
+    # Imported last, so a cold start paints the page before SQLAlchemy is loaded
+    from db_pool import get_engine, pool_stats
+
+    # Connection pool shared by every session in this server process
+    pool = pool_stats(get_engine(db_url))
+    pool_caption.caption(
+        f"🗄️ DB pool: {pool['checked_out']}/{pool['size'] + pool['overflow']} connections in use · "
+        f"{pool['waits']} waits ({pool['wait_seconds']:.2f}s) · {pool['timeouts']} timeouts"
+    )
+
+
+show_pool_stats()
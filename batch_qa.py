@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import random
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# Questions answered at once, and retries of a question after rate-limit errors
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+DEFAULT_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "5"))
+# Backoff after a rate-limit error without Retry-After: base * 2^attempt seconds with jitter, capped
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether an LLM or embeddings API error is a rate limit (HTTP 429) rather than a real failure."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or "RateLimit" in type(error).__name__ or "rate limit" in str(error).lower()
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked to wait before retrying (Retry-After header), if it said."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def read_questions(path: str) -> List[str]:
+    """Read questions from a file: one per line (# starts a comment line), or a JSON list."""
+    with open(path) as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        entries = json.loads(content)
+        return [entry["question"] if isinstance(entry, dict) else entry for entry in entries]
+    return [line.strip() for line in content.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+class BatchQA:
+    """Answer many questions about one cookbook concurrently, e.g. for evaluation or precomputation.
+
+    Every question goes through assistant.answer(): the catalog and ingredient indexes,
+    then the answer cache, then a session-less phi Assistant. All of them share the
+    assistant's loaded knowledge base, so the cookbook is loaded once. At most
+    concurrency questions are in flight. A rate-limit error pauses every worker for the
+    server's Retry-After, or for an exponentially growing, jittered backoff, and the
+    question is retried up to max_retries times. Results come back in question order.
+    """
+
+    def __init__(self, assistant, concurrency: int = DEFAULT_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = BACKOFF_BASE_SECONDS, backoff_max: float = BACKOFF_MAX_SECONDS):
+        self.assistant = assistant
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._resume_at = 0.0
+
+    def run(self, questions: List[str]) -> List[Dict[str, Any]]:
+        """Answer questions and return one result per question, in order."""
+        return asyncio.run(self.answer_all(questions))
+
+    async def answer_all(self, questions: List[str]) -> List[Dict[str, Any]]:
+        # Load the knowledge base and indexes once, before the workers share them
+        self.assistant.initialize_recipe_catalog()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch-qa")
+        try:
+            return await asyncio.gather(*(self._answer(question, pool, semaphore) for question in questions))
+        finally:
+            pool.shutdown()
+
+    async def _answer(self, question: str, pool: ThreadPoolExecutor, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        result: Dict[str, Any] = {"question": question, "answer": None, "source": None, "attempts": 0}
+        async with semaphore:
+            start = time.perf_counter()
+            for attempt in range(self.max_retries + 1):
+                # Another worker may have been rate limited while this one was waiting
+                delay = self._resume_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                result["attempts"] = attempt + 1
+                try:
+                    answer, source = await loop.run_in_executor(pool, self.assistant.answer, question)
+                    result.update(answer=answer, source=source)
+                    result.pop("error", None)
+                    break
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    if not is_rate_limited(e) or attempt == self.max_retries:
+                        break
+                    backoff = retry_after(e)
+                    if backoff is None:
+                        backoff = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    # The limit is shared by all workers, so they all pause
+                    self._resume_at = max(self._resume_at, loop.time() + backoff)
+                    print(f"Rate limited, retrying in {backoff:.1f}s: {question[:60]}")
+            result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+
+def main():
+    """Answer a file of questions about one cookbook and write the answers as JSON lines."""
+    parser = argparse.ArgumentParser(description="Answer many questions about one cookbook concurrently.")
+    parser.add_argument("pdf_url", help="Cookbook PDF URL (downloaded and ingested if needed)")
+    parser.add_argument("questions", help="File with one question per line, or a JSON list of questions")
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--output", default=None, help="JSON-lines file for the answers (default: stdout)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Questions answered at once")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES, help="Retries after rate limits")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Always ask the LLM (e.g. for evaluation)")
+    args = parser.parse_args()
+
+    from pdf_assistant import PDFAssistant
+
+    db_url = args.db_url or os.getenv("DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+    assistant = PDFAssistant(pdf_url=args.pdf_url, collection_name=None, db_url=db_url,
+                             use_answer_cache=not args.no_answer_cache)
+    batch = BatchQA(assistant, concurrency=args.concurrency, max_retries=args.max_retries)
+
+    start = time.perf_counter()
+    results = batch.run(read_questions(args.questions))
+    elapsed = time.perf_counter() - start
+
+    lines = [json.dumps(result) for result in results]
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write("\n".join(lines) + "\n")
+    else:
+        print("\n".join(lines))
+    sources: Dict[str, int] = {}
+    for result in results:
+        sources[result["source"] or "failed"] = sources.get(result["source"] or "failed", 0) + 1
+    print(f"Answered {len(results)} questions in {elapsed:.1f}s ({sources})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from itertools import product
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from phi.assistant.run import AssistantRun
+from phi.document import Document
+from phi.embedder.base import Embedder
+from phi.llm.base import LLM
+from phi.llm.message import Message
+from phi.storage.assistant.base import AssistantStorage
+from phi.vectordb.base import VectorDb
+
+# Local stand-ins for the PDF host, OpenAI embeddings, the LLM, pgvector and chat storage. All are
+# deterministic, so two benchmark runs of the same code do the same work.
+ADJECTIVES = ["Maple", "Smoked", "Country", "Spiced", "Braised", "Golden", "Rustic", "Creamy", "Honey", "Herbed",
+              "Roasted", "Glazed"]
+INGREDIENTS = ["Pork", "Chicken", "Salmon", "Beef", "Lentil", "Potato", "Apple", "Onion", "Cabbage", "Bean",
+               "Mushroom", "Pea", "Carrot", "Turnip", "Cranberry", "Blueberry", "Ham", "Trout", "Squash", "Barley"]
+DISHES = ["Stew", "Soup", "Pie", "Tart", "Casserole", "Fritters", "Pudding", "Roast", "Salad", "Dumplings",
+          "Loaf", "Chowder", "Hash", "Cake", "Preserve"]
+SECTIONS = ["Soups and Chowders", "Main Dishes", "Pies and Tourtieres", "Vegetables", "Desserts", "Preserves"]
+PANTRY = ["flour", "butter", "brown sugar", "maple syrup", "salt", "black pepper", "cinnamon", "nutmeg", "milk",
+          "eggs", "baking powder", "water", "beef broth", "cream", "savory", "bay leaf"]
+WORDS = ("stir simmer gently until tender season taste cover pan oven bake golden brown serve warm slice chop "
+         "fold mix bowl rest minutes heat medium low pour dish spoon crust dough roll knead cool").split()
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+
+
+def recipe_titles(count: int, seed: int = 0) -> List[str]:
+    """count distinct recipe titles ("Maple Pork Stew"), in a seed-determined order."""
+    titles = [" ".join(parts) for parts in product(ADJECTIVES, INGREDIENTS, DISHES)]
+    random.Random(seed).shuffle(titles)
+    return titles[:count]
+
+
+def make_cookbook(path: str, pages: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Write a synthetic cookbook PDF of exactly `pages` pages and return its recipes.
+
+    Layout follows real cookbooks closely enough for title detection and recipe
+    chunking: 22pt section headings, 16pt recipe titles, bold "Ingredients" and
+    "Directions" headings, and one recipe per page with every fifth recipe running
+    onto a second page.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    recipes: List[Dict[str, Any]] = []
+    titles = iter(recipe_titles(pages, seed))
+    section = None
+    page = None
+
+    def new_page():
+        return doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+
+    while doc.page_count < pages:
+        title = next(titles)
+        adjective, main, dish = title.split(" ", 2)
+        section_name = SECTIONS[(len(recipes) // 10) % len(SECTIONS)]
+        ingredients = [f"{rng.randint(1, 4)} cups {main.lower()}"] + [
+            f"{rng.randint(1, 3)} tbsp {item}" for item in rng.sample(PANTRY, rng.randint(3, 7))
+        ]
+        recipes.append({"title": title, "page": doc.page_count + 1, "section": section_name,
+                        "ingredients": ingredients})
+
+        page, y = new_page(), 72
+        if section_name != section:
+            page.insert_text((72, y), section_name, fontsize=22)
+            section, y = section_name, y + 40
+        page.insert_text((72, y), title, fontsize=16)
+        y += 28
+        page.insert_text((72, y), "Ingredients", fontsize=12, fontname="hebo")
+        y += 18
+        for ingredient in ingredients:
+            page.insert_text((72, y), ingredient, fontsize=10)
+            y += 14
+        page.insert_text((72, y + 10), "Directions", fontsize=12, fontname="hebo")
+        y += 30
+
+        spans_two_pages = len(recipes) % 5 == 0 and doc.page_count < pages
+        for step in range(rng.randint(8, 14) * (3 if spans_two_pages else 1)):
+            if y > PAGE_HEIGHT - 72:
+                if doc.page_count >= pages:
+                    break
+                page, y = new_page(), 72
+            sentence = " ".join(rng.choice(WORDS) for _ in range(12))
+            page.insert_text((72, y), f"{step + 1}. {sentence.capitalize()} the {main.lower()}.", fontsize=10)
+            y += 14
+    doc.save(path)
+    return recipes
+
+
+def serve_directory(directory: str, port: int = 0) -> Tuple[str, ThreadingHTTPServer]:
+    """Serve directory over HTTP on localhost in a daemon thread; returns (base_url, server)."""
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True, name="benchmark-http").start()
+    return f"http://127.0.0.1:{server.server_address[1]}", server
+
+
+class FakeEmbedder(Embedder):
+    """Deterministic hashed bag-of-words embedder: texts sharing words get similar vectors.
+
+    latency adds a fixed delay per call to emulate a remote embeddings API.
+    """
+
+    dimensions: int = 256
+    latency: float = 0.0
+
+    def get_embedding(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm == 0:
+            vector[0], norm = 1.0, 1.0
+        return (vector / norm).tolist()
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        return self.get_embedding(text), None
+
+
+class FakeLLM(LLM):
+    """Deterministic LLM that searches the knowledge base once and answers from the results.
+
+    Like a tool-calling model it calls search_knowledge_base (when the Assistant
+    provides it) with the user's question, so chat() exercises retrieval. Answers are
+    answer_words words long; first_token_delay and token_delay emulate API latency.
+    """
+
+    model: str = "fake-llm"
+    answer_words: int = 60
+    first_token_delay: float = 0.0
+    token_delay: float = 0.0
+
+    def response(self, messages: List[Message]) -> str:
+        return "".join(self.response_stream(messages))
+
+    def response_stream(self, messages: List[Message]) -> Iterator[str]:
+        question = _question(messages)
+        context = ""
+        search = (self.functions or {}).get("search_knowledge_base")
+        if search is not None and search.entrypoint is not None:
+            context = search.entrypoint(query=question) or ""
+        words = (f"From the cookbook, about {question}: " + _plain_text(context)).split()[:self.answer_words]
+
+        if self.first_token_delay:
+            time.sleep(self.first_token_delay)
+        for word in words:
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word + " "
+        messages.append(Message(role="assistant", content=" ".join(words)))
+
+
+def _question(messages: List[Message]) -> str:
+    for message in reversed(messages):
+        if message.role == "user":
+            content = message.get_content_string()
+            # Prompts built with chat history quote the question as "USER: ..." (last one is the current message)
+            quoted = re.findall(r"^USER: (.*)$", content, re.MULTILINE)
+            return quoted[-1].strip() if quoted else content.strip()
+    return ""
+
+
+def _plain_text(context: str) -> str:
+    try:
+        documents = json.loads(context)
+        return " ".join(doc.get("content", "") for doc in documents)
+    except (ValueError, TypeError, AttributeError):
+        return context
+
+
+class InMemoryVectorDb(VectorDb):
+    """Brute-force cosine-similarity vector store held in a numpy matrix, standing in for pgvector."""
+
+    def __init__(self, embedder: Embedder):
+        self.embedder = embedder
+        self.documents: List[Document] = []
+        self._matrix = np.zeros((0, embedder.dimensions), dtype=np.float32)
+        self._pending: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def create(self) -> None:
+        pass
+
+    def doc_exists(self, document: Document) -> bool:
+        return any(doc.content == document.content for doc in self.documents)
+
+    def name_exists(self, name: str) -> bool:
+        return any(doc.name == name for doc in self.documents)
+
+    def id_exists(self, id: str) -> bool:
+        return any(doc.id == id for doc in self.documents)
+
+    def insert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        for document in documents:
+            if document.embedding is None:
+                document.embed(embedder=self.embedder)
+        with self._lock:
+            self.documents.extend(documents)
+            self._pending.extend(document.embedding for document in documents)
+
+    def upsert_available(self) -> bool:
+        return True
+
+    def upsert(self, documents: List[Document], filters: Optional[Dict[str, Any]] = None) -> None:
+        self.insert([doc for doc in documents if not self.doc_exists(doc)], filters)
+
+    def _vectors(self) -> np.ndarray:
+        with self._lock:
+            if self._pending:
+                self._matrix = np.vstack([self._matrix, np.asarray(self._pending, dtype=np.float32)])
+                self._pending = []
+            return self._matrix
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        vectors = self._vectors()
+        if not len(vectors):
+            return []
+        query_vector = np.asarray(self.embedder.get_embedding(query), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+        scores = vectors @ query_vector / np.where(norms == 0, 1.0, norms)
+        top = np.argsort(-scores)[:limit]
+        return [self.documents[i] for i in top if not math.isnan(scores[i])]
+
+    def drop(self) -> None:
+        self.delete()
+
+    def exists(self) -> bool:
+        return True
+
+    def optimize(self) -> None:
+        pass
+
+    def delete(self) -> bool:
+        with self._lock:
+            self.documents = []
+            self._pending = []
+            self._matrix = np.zeros((0, self.embedder.dimensions), dtype=np.float32)
+        return True
+
+    def get_count(self) -> int:
+        return len(self.documents)
+
+
+class InMemoryStorage(AssistantStorage):
+    """Chat storage held in a dict, standing in for SessionStorage; runs are copied in and out like rows."""
+
+    def __init__(self):
+        self.runs: Dict[str, AssistantRun] = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> None:
+        pass
+
+    def read(self, run_id: str) -> Optional[AssistantRun]:
+        with self._lock:
+            run = self.runs.get(run_id)
+        return run.model_copy(deep=True) if run is not None else None
+
+    def get_all_run_ids(self, user_id: Optional[str] = None) -> List[str]:
+        return [run.run_id for run in self.get_all_runs(user_id)]
+
+    def get_all_runs(self, user_id: Optional[str] = None) -> List[AssistantRun]:
+        with self._lock:
+            return [run.model_copy(deep=True) for run in self.runs.values() if user_id in (None, run.user_id)]
+
+    def upsert(self, row: AssistantRun) -> Optional[AssistantRun]:
+        with self._lock:
+            self.runs[row.run_id] = row.model_copy(deep=True)
+        return self.read(row.run_id)
+
+    def delete(self) -> None:
+        with self._lock:
+            self.runs = {}
@@ -0,0 +1,150 @@
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from benchmarks.run import RESULTS_DIR, git_commit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules profiled on their own, besides everything app.py imports before its first render
+DEFAULT_MODULES = ["pdf_assistant", "ingestion_jobs", "db_pool", "tracing", "utils"]
+# Import times vary by tens of ms between runs; smaller changes are noise, whatever the relative change
+MIN_REGRESSION_MS = 50.0
+
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def app_startup_modules(path: str = os.path.join(REPO_ROOT, "app.py")) -> List[str]:
+    """Modules app.py imports at module level, i.e. before anything is rendered."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Entries of `python -X importtime` output: module, depth, self and cumulative time in ms."""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({"module": module, "depth": len(indent) // 2, "self_ms": int(self_us) / 1000,
+                            "cumulative_ms": int(cumulative_us) / 1000})
+    return entries
+
+
+def profile_imports(modules: List[str], runs: int = 5) -> Dict[str, Any]:
+    """Import modules in fresh interpreters and summarize where the time goes.
+
+    The first interpreter only warms the bytecode cache; import_ms is the median over
+    runs of the total time spent importing, and "packages" breaks the median run down
+    by top-level package (self time, so nothing is counted twice).
+    """
+    env = {**os.environ, "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION": "python"}
+    command = [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"]
+    samples = []
+    for run in range(runs + 1):
+        result = subprocess.run(command, cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+            return {"modules": modules, "error": error}
+        if run > 0:
+            samples.append(parse_importtime(result.stderr))
+
+    totals = [sum(entry["self_ms"] for entry in entries) for entries in samples]
+    median_run = samples[totals.index(sorted(totals)[len(totals) // 2])]
+    packages: Dict[str, float] = {}
+    for entry in median_run:
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + entry["self_ms"]
+    return {
+        "modules": modules,
+        "import_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "modules_imported": len(median_run),
+        "packages": {name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])[:15]},
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return one line per target whose import time grew by more than tolerance (and MIN_REGRESSION_MS)."""
+    regressions = []
+    previous = baseline.get("targets", {})
+    for target, profile in results["targets"].items():
+        old, new = previous.get(target, {}).get("import_ms"), profile.get("import_ms")
+        if not old or not new:
+            continue
+        change = (new - old) / old
+        line = f"{target:<16} {old:>8.1f} ms -> {new:>8.1f} ms ({change:+.1%})"
+        print(line)
+        if change > tolerance and new - old > MIN_REGRESSION_MS:
+            regressions.append(line)
+    return regressions
+
+
+def main():
+    """Profile import times with `python -X importtime` and save them as JSON."""
+    parser = argparse.ArgumentParser(description="Measure the import cost of the app's cold start.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to profile one by one")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per target")
+    parser.add_argument("--output", default=None, help="Results file (default benchmarks/results/imports-<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression vs the baseline")
+    args = parser.parse_args()
+
+    startup = app_startup_modules()
+    # Profiled without the ones not installed here (e.g. streamlit in a headless environment)
+    missing = [module for module in startup if importlib.util.find_spec(module.split(".")[0]) is None]
+    targets = {"app_startup": [module for module in startup if module not in missing]}
+    targets.update({module: [module] for module in args.modules})
+
+    results: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "app_startup_skipped": missing,
+        "targets": {},
+    }
+    for target, modules in targets.items():
+        profile = profile_imports(modules, runs=args.runs)
+        results["targets"][target] = profile
+        if "error" in profile:
+            print(f"{target}: failed ({profile['error']})")
+        else:
+            heaviest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in list(profile["packages"].items())[:4])
+            print(f"{target:<16} {profile['import_ms']:>8.1f} ms  {profile['modules_imported']:>5} modules  "
+                  f"({heaviest})")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"imports-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} import times regressed by more than {args.tolerance:.0%}:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
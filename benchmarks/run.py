@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.fakes import FakeEmbedder, FakeLLM, InMemoryStorage, InMemoryVectorDb, make_cookbook, serve_directory
+
+DEFAULT_PAGES = [10, 100, 1000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BENCHMARK_USER = "benchmark"
+
+# Metrics compared against a baseline, and whether higher values are better
+TRACKED_METRICS = {
+    "ingestion.pages_per_second": True,
+    "ingestion.chunks_per_second": True,
+    "retrieval.p50_ms": False,
+    "retrieval.p95_ms": False,
+    "chat.p50_ms": False,
+    "chat.p95_ms": False,
+    "memory.peak_rss_mb": False,
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds of samples given in seconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+
+    return {"count": len(ordered), "p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn: Callable[[], Any]):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def make_questions(recipes: List[Dict[str, Any]], count: int) -> List[str]:
+    """Deterministic mix of recipe lookups, ingredient questions and cooking questions."""
+    templates = ["How do I make the {title}?", "What goes into the {title}?", "Which recipes use {ingredient}?",
+                 "How long should the {title} cook?"]
+    questions = []
+    for i in range(count):
+        recipe = recipes[(i * 7) % len(recipes)]
+        ingredient = recipe["ingredients"][0].split(" ", 2)[-1]
+        questions.append(templates[i % len(templates)].format(title=recipe["title"], ingredient=ingredient))
+    return questions
+
+
+def ingestion_report(pages: int, chunks: int, stage_seconds: Dict[str, float]) -> Dict[str, Any]:
+    total = sum(stage_seconds.values())
+    return {
+        "pages": pages,
+        "chunks": chunks,
+        **{f"{stage}_seconds": round(seconds, 4) for stage, seconds in stage_seconds.items()},
+        "seconds": round(total, 4),
+        "pages_per_second": round(pages / total, 2) if total else None,
+        "chunks_per_second": round(chunks / total, 2) if total else None,
+    }
+
+
+def search_latencies(search: Callable[[str], Any], questions: List[str], warmup: int = 3) -> Dict[str, float]:
+    for question in questions[:warmup]:
+        search(question)
+    return percentiles([timed(lambda: search(question))[1] for question in questions])
+
+
+def bench_memory(url: str, pages: int, recipes: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    """Ingest and query through the in-memory vector store; chat runs PDFAssistant over the in-memory stand-ins.
+
+    PDFAssistant gets the in-memory vector store and chat storage in place of pgvector and
+    SessionStorage, so chat covers the catalog and ingredient lookups, history windowing and
+    retrieval, but not the answer cache (it needs pgvector) or the SQL of hybrid search.
+    """
+    from phi.knowledge import AssistantKnowledge
+
+    from extract_recipe_titles import extract_text_lines
+    from ingredient_index import build_ingredient_index
+    from pdf_assistant import PDFAssistant
+    from pdf_cache import pdf_cache, collection_name_for
+    from recipe_chunking import RecipeChunking, recipe_segments
+    from recipe_index import build_catalog
+
+    stages: Dict[str, float] = {}
+    cached, stages["download"] = timed(lambda: pdf_cache.fetch(url))
+    lines, stages["parse"] = timed(lambda: extract_text_lines(cached.path))
+    chunker = RecipeChunking()
+    chunks, stages["chunk"] = timed(lambda: [c for unit in recipe_segments(lines) for c in chunker.chunk(unit)])
+    vector_db = InMemoryVectorDb(embedder=FakeEmbedder(latency=args.embed_latency))
+    _, stages["embed"] = timed(lambda: vector_db.insert(chunks))
+    catalog, stages["catalog"] = timed(lambda: build_catalog(lines))
+    ingredient_index, stages["ingredient_index"] = timed(lambda: build_ingredient_index(catalog))
+    result = {"ingestion": ingestion_report(pages, len(chunks), stages), "memory": {"rss_mb_after_ingestion": rss_mb()}}
+
+    questions = make_questions(recipes, args.queries)
+    result["retrieval"] = search_latencies(lambda q: vector_db.search(q, limit=5), questions)
+
+    assistant = PDFAssistant(
+        pdf_url=url, collection_name=collection_name_for(cached.sha256), db_url=args.db_url, pdf_path=cached.path,
+        user_id=BENCHMARK_USER, use_answer_cache=False,
+        llm=FakeLLM(first_token_delay=args.llm_latency, token_delay=args.token_latency),
+    )
+    # What initialize_assistant() would otherwise load from Postgres
+    assistant.knowledge_base = AssistantKnowledge(vector_db=vector_db, num_documents=5)
+    assistant.storage = InMemoryStorage()
+    assistant.recipes, assistant.ingredient_index = catalog, ingredient_index
+    _, setup_seconds = timed(assistant.initialize_assistant)
+    result["chat"] = {**chat_latencies(assistant, make_questions(recipes, args.chat_turns)),
+                      "setup_ms": round(setup_seconds * 1000, 3),
+                      "note": "PDFAssistant over the in-memory stand-ins, without the answer cache"}
+    result["memory"]["rss_mb_after_chat"] = rss_mb()
+    return result
+
+
+def chat_latencies(assistant, questions: List[str]) -> Dict[str, Any]:
+    """Latency percentiles of assistant.chat() over questions, and how many turns each source answered."""
+    latencies, sources = [], {}
+    for question in questions:
+        latencies.append(timed(lambda: assistant.chat(question))[1])
+        source = assistant.last_response_metrics["source"]
+        sources[source] = sources.get(source, 0) + 1
+    return {**percentiles(latencies), "sources": sources}
+
+
+def cleanup_collection(db_url: str, collection: str) -> None:
+    """Remove everything the pipeline stored for a collection, so every run ingests from scratch."""
+    from sqlalchemy.sql.expression import delete
+
+    from db_pool import get_engine
+    from hybrid_search import HybridPgVector2
+    from ingestion import PageManifest
+    from ingredient_index import IngredientIndexStore
+    from recipe_index import RecipeCatalog
+    from registry import ingredient_indexes, knowledge_bases, recipe_catalogs
+    from session_storage import SessionStorage
+
+    engine = get_engine(db_url)
+    HybridPgVector2(collection=collection, db_engine=engine, embedder=FakeEmbedder()).drop()
+    PageManifest(engine).drop_collection(collection)
+    RecipeCatalog(engine).drop_collection(collection)
+    IngredientIndexStore(engine).drop_collection(collection)
+    storage = SessionStorage(table_name="pdf_assistant", db_engine=engine)
+    if storage.table_exists():
+        with storage.Session() as sess, sess.begin():
+            sess.execute(delete(storage.table).where(storage.table.c.user_id == BENCHMARK_USER))
+    for registry in (knowledge_bases, recipe_catalogs, ingredient_indexes):
+        registry.evict((collection, db_url))
+
+
+def bench_postgres(url: str, pages: int, recipes: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    """Ingest, search and chat through PDFAssistant on pgvector, with the fake embedder and LLM."""
+    from extract_recipe_titles import extract_text_lines
+    from pdf_assistant import PDFAssistant
+    from pdf_cache import pdf_cache, collection_name_for
+    from recipe_chunking import RecipeChunking, recipe_segments
+
+    stages: Dict[str, float] = {}
+    cached, stages["download"] = timed(lambda: pdf_cache.fetch(url))
+    collection = collection_name_for(cached.sha256)
+    cleanup_collection(args.db_url, collection)
+
+    def make_assistant() -> PDFAssistant:
+        return PDFAssistant(
+            pdf_url=url, collection_name=collection, db_url=args.db_url, pdf_path=cached.path,
+            user_id=BENCHMARK_USER, use_answer_cache=False,
+            embedder=FakeEmbedder(latency=args.embed_latency),
+            llm=FakeLLM(first_token_delay=args.llm_latency, token_delay=args.token_latency),
+        )
+
+    try:
+        lines, stages["parse"] = timed(lambda: extract_text_lines(cached.path))
+        # Chunking also runs inside sync_collection; timed separately here to show its share
+        chunker = RecipeChunking()
+        _, stages["chunk"] = timed(lambda: [c for unit in recipe_segments(lines) for c in chunker.chunk(unit)])
+        assistant = make_assistant()
+        _, stages["embed_and_write"] = timed(lambda: assistant.initialize_knowledge_base(text_lines=lines))
+        stats = assistant.last_sync_stats or {}
+        result = {"ingestion": ingestion_report(pages, stats.get("chunks", 0), stages),
+                  "memory": {"rss_mb_after_ingestion": rss_mb()}}
+
+        questions = make_questions(recipes, args.queries)
+        vector_db = assistant.knowledge_base.vector_db
+        result["retrieval"] = search_latencies(lambda q: vector_db.search(q, limit=5), questions)
+
+        chat_assistant = make_assistant()
+        _, setup_seconds = timed(chat_assistant.initialize_assistant)
+        result["chat"] = {**chat_latencies(chat_assistant, make_questions(recipes, args.chat_turns)),
+                          "setup_ms": round(setup_seconds * 1000, 3)}
+        result["memory"]["rss_mb_after_chat"] = rss_mb()
+        return result
+    finally:
+        if not args.keep:
+            cleanup_collection(args.db_url, collection)
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return one line per tracked metric that got worse than baseline by more than tolerance."""
+    regressions = []
+    previous = {run["pages"]: run for run in baseline.get("runs", [])}
+    for run in results["runs"]:
+        base = previous.get(run["pages"])
+        if base is None:
+            continue
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            group, key = metric.split(".")
+            new, old = run.get(group, {}).get(key), base.get(group, {}).get(key)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            line = f"{run['pages']:>5} pages  {metric:<30} {old:>10.2f} -> {new:>10.2f} ({change:+.1%})"
+            print(line)
+            if worse > tolerance:
+                regressions.append(line)
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Run the end-to-end benchmark on synthetic cookbooks and save the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark ingestion, retrieval and chat with local stand-ins.")
+    parser.add_argument("--pages", type=int, nargs="+", default=DEFAULT_PAGES, help="Cookbook sizes to benchmark")
+    parser.add_argument("--backend", choices=["memory", "postgres"], default="memory",
+                        help="In-memory vector store, or PDFAssistant on Postgres/pgvector (--db-url)")
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--queries", type=int, default=50, help="Retrieval queries per cookbook")
+    parser.add_argument("--chat-turns", type=int, default=10, help="chat() calls per cookbook")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Seconds added per embedding call")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds before the first LLM token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Seconds between LLM tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results file (default benchmarks/results/<backend>-<time>.json)")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression vs the baseline")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections in Postgres")
+    args = parser.parse_args()
+    args.db_url = args.db_url or os.getenv("DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+
+    workdir = tempfile.mkdtemp(prefix="recipe-benchmark-")
+    # Cold caches: the PDF and embedding caches are read from the environment when first imported
+    os.environ["PDF_CACHE_DIR"] = os.path.join(workdir, "pdf-cache")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embeddings.sqlite")
+    pdf_dir = os.path.join(workdir, "pdfs")
+    os.makedirs(pdf_dir)
+    base_url, server = serve_directory(pdf_dir)
+
+    results: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "settings": {k: v for k, v in vars(args).items() if k not in ("db_url", "output", "baseline")},
+        "runs": [],
+    }
+    bench = bench_postgres if args.backend == "postgres" else bench_memory
+    try:
+        for pages in args.pages:
+            filename = f"cookbook-{pages}.pdf"
+            recipes = make_cookbook(os.path.join(pdf_dir, filename), pages, seed=args.seed)
+            print(f"Benchmarking {pages} pages ({len(recipes)} recipes) on {args.backend}...")
+            run = {"pages": pages, "recipes": len(recipes), **bench(f"{base_url}/{filename}", pages, recipes, args)}
+            run["memory"]["peak_rss_mb"] = round(max(peak_rss_mb(), run["memory"]["rss_mb_after_chat"]), 1)
+            results["runs"].append(run)
+            print(json.dumps(run, indent=2))
+    finally:
+        server.shutdown()
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{args.backend}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved results to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.tolerance:.0%}:")
+            print("\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
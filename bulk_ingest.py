@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import fitz  # PyMuPDF
+
+from db_pool import create_pooled_engine, pool_stats
+from extract_recipe_titles import TextLine, extract_text_lines
+from pdf_cache import pdf_cache, collection_name_for
+
+DEFAULT_REPORT_PATH = "bulk_ingest_report.jsonl"
+
+
+def read_manifest(path: str) -> List[str]:
+    """Read cookbook URLs from a manifest: one URL per line (# starts a comment), or a JSON list."""
+    with open(path) as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        entries = json.loads(content)
+        urls = [entry["url"] if isinstance(entry, dict) else entry for entry in entries]
+    else:
+        urls = [line.split("#", 1)[0].strip() for line in content.splitlines()]
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+def completed_urls(report_path: str) -> Set[str]:
+    """URLs fully ingested according to an earlier run's report; a rerun skips them.
+
+    "partial" records (some chunks could not be embedded) are not included, so a rerun
+    embeds the missing chunks.
+    """
+    done = set()
+    try:
+        with open(report_path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write can leave a truncated last line
+                    continue
+                if record.get("status") == "done":
+                    done.add(record["url"])
+    except OSError:
+        pass
+    return done
+
+
+def parse_pdf(pdf_path: str) -> Tuple[int, List[TextLine]]:
+    """Return the page count and text lines of a PDF; runs in a worker process of the parse pool."""
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    # Each document is parsed by one worker, so parallelism comes from the pool, not from extract_text_lines
+    return page_count, extract_text_lines(pdf_path, workers=1)
+
+
+class BulkIngestion:
+    """Ingest many cookbooks concurrently, each stage with its own bounded pool.
+
+    Downloads run on an aiohttp connection pool, parsing on a process pool, and
+    chunking/embedding/writing on a thread pool whose size bounds how many documents
+    are embedded at once. Every database write goes through one SQLAlchemy engine,
+    so the whole run shares a single connection pool. At most max_in_flight documents
+    are between download and write at any time, which bounds memory use.
+
+    Unless describe is False, each cookbook's one-line description is generated with
+    the LLM and stored too (see PDFAssistant.get_description).
+
+    Each finished document is appended to the report file as soon as it completes, as
+    "done", "partial" (ingested, but some chunks could not be embedded) or "failed". A
+    rerun skips URLs the report lists as done; partial and failed documents only embed
+    the chunks not already in the collection or the embedding cache.
+    """
+
+    def __init__(self, db_url: str, report_path: str = DEFAULT_REPORT_PATH, download_workers: int = 8,
+                 parse_workers: Optional[int] = None, embed_workers: int = 2, max_in_flight: Optional[int] = None,
+                 force_revalidate: bool = False, describe: bool = True):
+        self.db_url = db_url
+        self.report_path = report_path
+        self.download_workers = download_workers
+        self.parse_workers = parse_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.embed_workers = embed_workers
+        self.max_in_flight = max_in_flight or self.download_workers + self.parse_workers + self.embed_workers
+        self.force_revalidate = force_revalidate
+        self.describe = describe
+        # Connection pool usage of the last run (see db_pool.pool_stats)
+        self.pool_stats: Optional[Dict[str, Any]] = None
+        self._report_lock = threading.Lock()
+
+    def run(self, urls: List[str], resume: bool = True) -> Dict[str, Any]:
+        """Ingest urls and return a summary of the run."""
+        skipped = completed_urls(self.report_path) if resume else set()
+        pending = [url for url in urls if url not in skipped]
+        if skipped:
+            print(f"Skipping {len(urls) - len(pending)} cookbooks already ingested (see {self.report_path})")
+
+        start = time.perf_counter()
+        records = asyncio.run(self._run(pending))
+        elapsed = time.perf_counter() - start
+
+        done = [r for r in records if r["status"] == "done"]
+        partial = [r for r in records if r["status"] == "partial"]
+        pages = sum(r["pages"] for r in done + partial)
+        chunks = sum(r["chunks"] for r in done + partial)
+        return {
+            "documents": len(urls),
+            "done": len(done),
+            "partial": len(partial),
+            "failed": len(records) - len(done) - len(partial),
+            "skipped": len(urls) - len(pending),
+            "pages": pages,
+            "chunks": chunks,
+            "seconds": round(elapsed, 3),
+            "pages_per_second": round(pages / elapsed, 2) if elapsed else None,
+            "chunks_per_second": round(chunks / elapsed, 2) if elapsed else None,
+            "db_pool": self.pool_stats,
+        }
+
+    async def _run(self, urls: List[str]) -> List[Dict[str, Any]]:
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("`aiohttp` not installed, required for bulk ingestion")
+        # One connection per embedding worker, plus headroom for catalog and manifest writes
+        db_engine = create_pooled_engine(self.db_url, pool_size=self.embed_workers, max_overflow=self.embed_workers)
+        # Spawned workers do not inherit the event loop's or the thread pools' state
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers,
+                                         mp_context=multiprocessing.get_context("spawn"))
+        embed_pool = ThreadPoolExecutor(max_workers=self.embed_workers, thread_name_prefix="embedding")
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        connector = aiohttp.TCPConnector(limit=self.download_workers)
+        try:
+            async with aiohttp.ClientSession(connector=connector) as session:
+                return await asyncio.gather(*(
+                    self._ingest(url, session, parse_pool, embed_pool, db_engine, in_flight) for url in urls
+                ))
+        finally:
+            parse_pool.shutdown()
+            embed_pool.shutdown()
+            self.pool_stats = pool_stats(db_engine)
+            db_engine.dispose()
+
+    async def _ingest(self, url: str, session, parse_pool: ProcessPoolExecutor, embed_pool: ThreadPoolExecutor,
+                      db_engine, in_flight: asyncio.Semaphore) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        record: Dict[str, Any] = {"url": url, "status": "failed", "pages": 0, "chunks": 0}
+        async with in_flight:
+            start = time.perf_counter()
+            stage_start = start
+            stage = "downloading"
+            try:
+                cached = await pdf_cache.fetch_async(session, url, force_revalidate=self.force_revalidate)
+                record.update(collection_name=collection_name_for(cached.sha256),
+                              bytes=os.path.getsize(cached.path),
+                              download_seconds=round(time.perf_counter() - stage_start, 3))
+
+                stage, stage_start = "parsing", time.perf_counter()
+                page_count, lines = await loop.run_in_executor(parse_pool, parse_pdf, cached.path)
+                record.update(pages=page_count, parse_seconds=round(time.perf_counter() - stage_start, 3))
+
+                stage, stage_start = "embedding", time.perf_counter()
+                stats = await loop.run_in_executor(embed_pool, self._ingest_parsed, url, cached, lines, db_engine)
+                ingest_seconds = time.perf_counter() - stage_start
+                record.update(units=stats.get("units", 0), chunks=stats.get("chunks", 0),
+                              described=stats.get("described", False),
+                              ingest_seconds=round(ingest_seconds, 3),
+                              chunks_per_second=round(stats.get("chunks", 0) / ingest_seconds, 2)
+                              if ingest_seconds else None,
+                              # Units whose chunks failed to embed are retried by the next run
+                              failed_units=stats.get("failed", 0),
+                              status="partial" if stats.get("failed") else "done")
+            except Exception as e:
+                record.update(error=f"{stage}: {type(e).__name__}: {e}")
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            if record["status"] in ("done", "partial") and record["seconds"]:
+                record["pages_per_second"] = round(record["pages"] / record["seconds"], 2)
+        self._append_report(record)
+        print(f"[{record['status']}] {url} {record['pages']} pages, {record['chunks']} chunks "
+              f"in {record['seconds']}s" + (f" ({record['error']})" if "error" in record else ""))
+        return record
+
+    def _ingest_parsed(self, url: str, cached, lines: List[TextLine], db_engine) -> Dict[str, Any]:
+        """Chunk, embed and write one parsed cookbook, then its catalog and description; runs on the embedding pool."""
+        from pdf_assistant import PDFAssistant
+
+        assistant = PDFAssistant(
+            pdf_url=url,
+            collection_name=collection_name_for(cached.sha256),
+            db_url=self.db_url,
+            pdf_path=cached.path,
+            db_engine=db_engine,
+        )
+        assistant.initialize_knowledge_base(text_lines=lines)
+        # None if the collection was already loaded in this process, e.g. a mirror listed twice
+        stats = dict(assistant.last_sync_stats or {})
+        if self.describe:
+            try:
+                stats["described"] = assistant.get_description() is not None
+            except Exception as e:
+                print(f"Error generating cookbook description for {url}: {e}")
+        return stats
+
+    def _append_report(self, record: Dict[str, Any]) -> None:
+        with self._report_lock, open(self.report_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+
+
+def main():
+    """Ingest every cookbook listed in a manifest file, printing per-document throughput."""
+    parser = argparse.ArgumentParser(description="Concurrently download, parse and embed many cookbook PDFs.")
+    parser.add_argument("manifest", help="File with one PDF URL per line, or a JSON list of URLs")
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH,
+                        help="JSON-lines report, appended per document; URLs marked done are skipped on rerun")
+    parser.add_argument("--download-workers", type=int, default=8, help="Concurrent downloads")
+    parser.add_argument("--parse-workers", type=int, default=None, help="Parser processes (default: CPUs - 1)")
+    parser.add_argument("--embed-workers", type=int, default=2, help="Documents embedded and written at once")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Documents between download and write")
+    parser.add_argument("--force-revalidate", action="store_true", help="Revalidate cached PDFs with the server")
+    parser.add_argument("--no-resume", action="store_true", help="Ingest URLs the report already lists as done")
+    parser.add_argument("--no-describe", action="store_true", help="Skip generating cookbook descriptions")
+    args = parser.parse_args()
+
+    db_url = args.db_url or os.getenv("DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+    bulk = BulkIngestion(db_url, report_path=args.report, download_workers=args.download_workers,
+                         parse_workers=args.parse_workers, embed_workers=args.embed_workers,
+                         max_in_flight=args.max_in_flight, force_revalidate=args.force_revalidate,
+                         describe=not args.no_describe)
+    summary = bulk.run(read_manifest(args.manifest), resume=not args.no_resume)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
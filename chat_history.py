@@ -0,0 +1,99 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from phi.llm.message import Message
+
+# Recent turns sent to the LLM verbatim, and their token budget; older turns are summarized
+DEFAULT_HISTORY_TURNS = int(os.getenv("CHAT_HISTORY_TURNS", "6"))
+DEFAULT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1500"))
+# Target length of the rolling summary
+SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "300"))
+# Key of the rolling summary in the run's run_data column
+SUMMARY_KEY = "history_summary"
+
+Turn = Tuple[Message, Optional[Message]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def chat_turns(messages: List[Message]) -> List[Turn]:
+    """Pair each user message with the assistant reply that follows it (None if unanswered)."""
+    turns: List[Turn] = []
+    for message in messages:
+        if message.role == "user":
+            turns.append((message, None))
+        elif message.role == "assistant" and turns and turns[-1][1] is None:
+            turns[-1] = (turns[-1][0], message)
+    return turns
+
+
+def format_turns(turns: List[Turn]) -> str:
+    lines = []
+    for question, answer in turns:
+        lines.append(f"USER: {question.get_content_string()}")
+        if answer is not None:
+            lines.append(f"ASSISTANT: {answer.get_content_string()}")
+    return "\n".join(lines)
+
+
+def extractive_summary(previous: str, transcript: str, max_tokens: int = SUMMARY_MAX_TOKENS) -> str:
+    """Summary without an LLM: the previous summary plus the transcript, keeping the most recent text."""
+    text = f"{previous}\n{transcript}".strip() if previous else transcript
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else "..." + text[-max_chars:]
+
+
+class HistoryWindow:
+    """Bounds the chat history an LLM sees to a rolling summary plus the most recent turns.
+
+    The summary is a dict {"text": ..., "turns": n}, where n is how many of the run's
+    leading turns it covers. Once the turns after it exceed max_turns or max_tokens,
+    compact() folds the oldest of them into the summary until the rest fits in half
+    the budget, so the summarizer runs every few turns rather than on every one.
+    summarize(previous_summary, transcript) returns the new summary text.
+    """
+
+    def __init__(self, max_turns: int = DEFAULT_HISTORY_TURNS, max_tokens: int = DEFAULT_HISTORY_TOKENS,
+                 summarize: Callable[[str, str], str] = extractive_summary):
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.summarize = summarize
+
+    def _fits(self, turns: List[Turn], max_turns: int, max_tokens: int) -> bool:
+        return len(turns) <= max_turns and estimate_tokens(format_turns(turns)) <= max_tokens
+
+    def _recent(self, turns: List[Turn], max_turns: int, max_tokens: int) -> List[Turn]:
+        # Longest suffix within the budget, but always the latest turn
+        keep = 1
+        while keep < len(turns) and self._fits(turns[-(keep + 1):], max_turns, max_tokens):
+            keep += 1
+        return turns[-keep:] if turns else []
+
+    def compact(self, turns: List[Turn], summary: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return the updated summary if older turns had to be folded into it, otherwise None."""
+        summary = summary or {"text": "", "turns": 0}
+        pending = turns[summary["turns"]:]
+        if self._fits(pending, self.max_turns, self.max_tokens):
+            return None
+        recent = self._recent(pending, max(1, self.max_turns // 2), self.max_tokens // 2)
+        folded = pending[:len(pending) - len(recent)]
+        if not folded:
+            return None
+        return {
+            "text": self.summarize(summary["text"], format_turns(folded)),
+            "turns": summary["turns"] + len(folded),
+        }
+
+    def render(self, turns: List[Turn], summary: Optional[Dict[str, Any]]) -> Optional[str]:
+        """The history to put in the prompt: the summary, then the recent turns within budget."""
+        summary = summary or {"text": "", "turns": 0}
+        recent = self._recent(turns[summary["turns"]:], self.max_turns, self.max_tokens)
+        parts = []
+        if summary["text"]:
+            parts.append(f"Summary of the earlier conversation:\n{summary['text']}")
+        if recent:
+            parts.append(format_turns(recent))
+        return "\n\n".join(parts) or None
@@ -0,0 +1,66 @@
+from typing import Optional
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import MetaData, Table, Column
+from sqlalchemy.sql.expression import text, select
+from sqlalchemy.types import DateTime, String, Text
+
+# Question that produces the one-line description shown in the sidebar
+DESCRIPTION_PROMPT = """Based on the cookbook content you have access to, provide a brief 1-2 sentence description of this cookbook.
+Focus on: cuisine type, author/origin, main themes, and what makes it special.
+Start with 'This cookbook...' and keep it concise and engaging. Maximum 150 characters."""
+MAX_DESCRIPTION_CHARS = 150
+
+
+def shorten_description(description: str, max_chars: int = MAX_DESCRIPTION_CHARS) -> str:
+    """Trim an LLM description to max_chars, at the end of the first sentence if possible."""
+    description = description.strip()
+    if len(description) <= max_chars:
+        return description
+    # Try to find the end of the first sentence
+    sentence_end = description.find('. ')
+    if 50 < sentence_end < max_chars:
+        return description[:sentence_end + 1]
+    # Just truncate at word boundary
+    words = description[:max_chars - 3].split()
+    return ' '.join(words[:-1]) + "..."
+
+
+class CookbookDescriptions:
+    """Cookbook descriptions generated once at ingestion time, per collection (ai.cookbook_description)."""
+
+    def __init__(self, db_engine, schema: Optional[str] = "ai", table_name: str = "cookbook_description"):
+        self.db_engine = db_engine
+        self.schema = schema
+        self.metadata = MetaData(schema=schema)
+        self.table = Table(
+            table_name,
+            self.metadata,
+            Column("collection", String, primary_key=True),
+            Column("description", Text, nullable=False),
+            Column("created_at", DateTime(timezone=True), server_default=text("now()")),
+            extend_existing=True,
+        )
+        self._created = False
+
+    def create(self) -> None:
+        if self._created:
+            return
+        if self.schema is not None:
+            with self.db_engine.begin() as conn:
+                conn.execute(text(f"create schema if not exists {self.schema};"))
+        self.table.create(self.db_engine, checkfirst=True)
+        self._created = True
+
+    def load(self, collection: str) -> Optional[str]:
+        self.create()
+        stmt = select(self.table.c.description).where(self.table.c.collection == collection)
+        with self.db_engine.connect() as conn:
+            return conn.execute(stmt).scalar()
+
+    def save(self, collection: str, description: str) -> None:
+        self.create()
+        stmt = postgresql.insert(self.table).values(collection=collection, description=description)
+        stmt = stmt.on_conflict_do_update(index_elements=["collection"], set_={"description": description})
+        with self.db_engine.begin() as conn:
+            conn.execute(stmt)
@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.pool import QueuePool
+
+DEFAULT_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DEFAULT_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DEFAULT_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections before server-side or proxy idle timeouts close them
+DEFAULT_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DEFAULT_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() not in ("0", "false", "no")
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that counts checkouts and how often, and for how long, they wait for a free connection.
+
+    A checkout waits when every connection the pool may open (pool_size + max_overflow)
+    is already checked out. The counters restart when the engine is disposed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self._metrics_lock = threading.Lock()
+
+    def connect(self):
+        with self._metrics_lock:
+            self.checkouts += 1
+        return super().connect()
+
+    def _do_get(self):
+        exhausted = self._max_overflow > -1 and self.checkedin() == 0 and self._overflow >= self._max_overflow
+        if not exhausted:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            with self._metrics_lock:
+                self.waits += 1
+                self.wait_seconds += time.perf_counter() - start
+
+
+def create_pooled_engine(db_url: str, pool_size: int = DEFAULT_POOL_SIZE, max_overflow: int = DEFAULT_MAX_OVERFLOW,
+                         pool_timeout: float = DEFAULT_POOL_TIMEOUT, pool_recycle: int = DEFAULT_POOL_RECYCLE,
+                         pool_pre_ping: bool = DEFAULT_POOL_PRE_PING) -> Engine:
+    """Create an engine whose connection pool reports metrics (see pool_stats)."""
+    return create_engine(
+        db_url,
+        poolclass=MeteredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        # Test connections on checkout so ones dropped by the server are replaced transparently
+        pool_pre_ping=pool_pre_ping,
+    )
+
+
+_engines: Dict[str, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_url: str) -> Engine:
+    """Return this process's engine for db_url, creating it with the DB_POOL_* settings on first use.
+
+    Every vector DB, assistant storage and cache built for the same database shares this
+    engine, so the process holds one connection pool per database instead of one per
+    object (and per Streamlit rerun).
+    """
+    with _engines_lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            engine = _engines[db_url] = create_pooled_engine(db_url)
+        return engine
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Connection pool usage of an engine: connections checked out / idle, overflow in use, and waits."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+    }
+    if isinstance(pool, MeteredQueuePool):
+        with pool._metrics_lock:
+            stats.update(checkouts=pool.checkouts, waits=pool.waits,
+                         wait_seconds=round(pool.wait_seconds, 3), timeouts=pool.timeouts)
+    return stats
+
+
+def all_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """pool_stats for every engine created by get_engine, keyed by URL with the password hidden."""
+    with _engines_lock:
+        engines = list(_engines.values())
+    return {engine.url.render_as_string(hide_password=True): pool_stats(engine) for engine in engines}
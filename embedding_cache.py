@@ -0,0 +1,213 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from phi.embedder.base import Embedder
+
+from pdf_cache import DEFAULT_CACHE_DIR
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent embedding store keyed by (embedder model, chunk-text hash).
+
+    Backed by a local SQLite file, opened on first use, so re-ingesting a cookbook, or
+    ingesting a duplicate, reuses earlier embeddings. When the cache grows past max_entries
+    the least recently used rows are evicted. Hits only update last_used in memory; the
+    times are written with the next put_many() or after touch_batch hits, so a lookup
+    does not have to write to the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 500_000, touch_batch: int = 1000):
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH", os.path.join(DEFAULT_CACHE_DIR, "embeddings.sqlite"))
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._touched: Dict[Tuple[str, str], float] = {}
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Caller must hold self._lock
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, text_hash TEXT NOT NULL, embedding BLOB NOT NULL,"
+                " last_used REAL NOT NULL, PRIMARY KEY (model, text_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            conn.commit()
+            self._db = conn
+        return self._db
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Return the cached embeddings among hashes, counting hits and misses."""
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, embedding FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+            now = time.time()
+            self._touched.update(((model, h), now) for h in found)
+            if len(self._touched) >= self.touch_batch:
+                self._write_touched()
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, model: str, items: List[Tuple[str, List[float]]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, embedding, last_used) VALUES (?, ?, ?, ?)",
+                [(model, h, array("f", emb).tobytes(), now) for h, emb in items],
+            )
+            self._write_touched()
+            self._writes_since_evict += len(items)
+            if self._writes_since_evict >= 1000:
+                self._evict()
+            self._conn.commit()
+
+    def _write_touched(self) -> None:
+        # Caller must hold self._lock and commit
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [(used, model, h) for (model, h), used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        # Caller must hold self._lock
+        self._writes_since_evict = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+            print(f"Evicted {excess} embeddings from the cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachedEmbedder(Embedder):
+    """Embedder wrapper that serves embeddings from an EmbeddingCache.
+
+    embed_texts() sends cache misses to the wrapped embedder in batches of batch_size,
+    with at most max_workers batches in flight. A batch whose request raises is retried
+    max_retries times with exponential backoff and then left as None, so one failed
+    request does not lose the rest of the cookbook. Documents are embedded through the cache
+    (get_embedding_and_usage); search queries (get_embedding) go straight to the wrapped
+    embedder, so user questions are neither stored nor slowed down by the cache.
+    """
+
+    embedder: Embedder
+    cache: Any
+    batch_size: int = 64
+    max_workers: int = 4
+    max_retries: int = 2
+    retry_backoff: float = 1.0
+
+    def model_post_init(self, __context: Any) -> None:
+        self.dimensions = self.embedder.dimensions
+
+    @property
+    def model_key(self) -> str:
+        model = getattr(self.embedder, "model", None) or type(self.embedder).__name__
+        return f"{model}:{self.dimensions}"
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.embedder.get_embedding(text)
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        embedding = self.embed_texts([text])[0]
+        if embedding is None:
+            # Rather than storing the document with an empty vector
+            raise ValueError(f"Could not embed document: {text[:60]!r}")
+        return embedding, None
+
+    def embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Return embeddings for texts, computing only the ones not already cached; None where embedding failed."""
+        model = self.model_key
+        hashes = [text_hash(t) for t in texts]
+        found = self.cache.get_many(model, hashes)
+
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = t
+
+        if missing:
+            items = list(missing.items())
+            batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for batch, embeddings in zip(batches, pool.map(self._embed_batch, batches)):
+                    new_items = [(h, emb) for (h, _), emb in zip(batch, embeddings) if emb]
+                    self.cache.put_many(model, new_items)
+                    found.update(new_items)
+
+        return [found.get(h) for h in hashes]
+
+    def _embed_batch(self, batch: List[Tuple[str, str]]) -> List[Optional[List[float]]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._request_batch([t for _, t in batch])
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"Error embedding a batch of {len(batch)} texts: {e}")
+                    return [None] * len(batch)
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _request_batch(self, texts: List[str]) -> List[List[float]]:
+        try:
+            from phi.embedder.openai import OpenAIEmbedder
+        except ImportError:
+            OpenAIEmbedder = None
+
+        if OpenAIEmbedder is not None and isinstance(self.embedder, OpenAIEmbedder):
+            # The embeddings endpoint accepts a list of inputs: one request per batch
+            response = self.embedder.response(text=texts)
+            return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+        return [self.embedder.get_embedding(t) for t in texts]
+
+
+embedding_cache = EmbeddingCache()
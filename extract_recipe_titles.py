@@ -1,38 +1,141 @@
-import fitz  # PyMuPDF
+import os
 import re
-from typing import List
-from urllib.request import urlopen
-from tempfile import NamedTemporaryFile
+import fitz  # PyMuPDF
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from pdf_cache import pdf_cache
+
+# Documents shorter than this are scanned in-process; a pool is not worth its start-up cost
+SERIAL_PAGE_THRESHOLD = 40
+
+TITLE_PATTERN = re.compile(r"^[A-Z][A-Za-z\s,'()&-]+$")
+
+
+class TitleSpan(NamedTuple):
+    page: int  # 1-based page number
+    text: str
+    size: float
+    bold: bool
+
+
+def is_bold(span: dict) -> bool:
+    """Return True if a PyMuPDF text span is set in a bold face."""
+    return "bold" in span.get("font", "").lower() or bool(span.get("flags", 0) & 16)
+
 
-def extract_recipe_titles(pdf_url: str) -> List[str]:
+def is_title_span(span: dict) -> bool:
+    """Heuristic for recipe titles: a short capitalised line in a large or bold font."""
+    text = span["text"].strip()
+    if not text or len(text.split()) > 12:
+        return False
+    if span.get("size", 0) < 11 and not is_bold(span):
+        return False
+    return bool(TITLE_PATTERN.match(text))
+
+
+class TextLine(NamedTuple):
+    page: int  # 1-based page number
+    text: str
+    size: float  # largest font size on the line
+    bold: bool
+    is_title: bool
+
+
+def _scan_pages(args: Tuple[str, int, int, bool]) -> list:
+    """Scan pages [start, stop) of a PDF. Runs inside pool workers.
+
+    Returns TitleSpan records for title spans only, or TextLine records for every
+    line when all_lines is set.
+    """
+    pdf_path, start, stop, all_lines = args
+    records = []
+    # Each worker opens the document itself; fitz documents cannot be shared across processes
+    with fitz.open(pdf_path) as doc:
+        for page_index in range(start, stop):
+            blocks = doc[page_index].get_text("dict")["blocks"]
+            for block in blocks:
+                for line in block.get("lines", []):
+                    spans = line.get("spans", [])
+                    if all_lines:
+                        text = "".join(span["text"] for span in spans).strip()
+                        if text:
+                            records.append(TextLine(
+                                page_index + 1,
+                                text,
+                                max(span.get("size", 0) for span in spans),
+                                all(is_bold(span) for span in spans if span["text"].strip()),
+                                any(is_title_span(span) and span["text"].strip() == text for span in spans),
+                            ))
+                        continue
+                    for span in spans:
+                        if is_title_span(span):
+                            records.append(TitleSpan(page_index + 1, span["text"].strip(), span["size"], is_bold(span)))
+    return records
+
+
+def _scan(pdf_path: str, workers: Optional[int], all_lines: bool,
+          progress: Optional[Callable[[str, int, int], None]] = None) -> list:
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or page_count < SERIAL_PAGE_THRESHOLD:
+        records = _scan_pages((pdf_path, 0, page_count, all_lines))
+        if progress:
+            progress("parsing", page_count, page_count)
+        return records
+
+    # A few ranges per worker keeps the pool busy when some pages are much denser than others
+    num_ranges = min(page_count, workers * 4)
+    bounds = [page_count * i // num_ranges for i in range(num_ranges + 1)]
+    ranges = [(pdf_path, bounds[i], bounds[i + 1], all_lines) for i in range(num_ranges)]
+
+    records = []
+    # Spawned, not forked: this runs in threads of the app and bulk ingestion, and a forked child
+    # could inherit locks (logging, database pools, SQLite) held by another thread
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # map() yields results in submission order, so the merged list stays in page order
+        for (_, _, stop, _), part in zip(ranges, pool.map(_scan_pages, ranges)):
+            records.extend(part)
+            if progress:
+                progress("parsing", stop, page_count)
+    return records
+
+
+def extract_title_spans(pdf_path: str, workers: Optional[int] = None) -> List[TitleSpan]:
+    """Return candidate title spans of a local PDF, in page order.
+
+    The page range is split across a process pool of `workers` processes (default: CPU
+    count). Small documents, or workers=1, are scanned serially.
+    """
+    return _scan(pdf_path, workers, all_lines=False)
+
+
+def extract_text_lines(pdf_path: str, workers: Optional[int] = None,
+                       progress: Optional[Callable[[str, int, int], None]] = None) -> List[TextLine]:
+    """Return every text line of a local PDF with its font size and title flag, in page order.
+
+    progress, if given, is called as progress("parsing", pages_done, page_count).
+    """
+    return _scan(pdf_path, workers, all_lines=True, progress=progress)
+
+
+def extract_titles_from_file(pdf_path: str, workers: Optional[int] = None) -> List[str]:
+    """Return unique recipe titles of a local PDF in order of first appearance."""
+    return list(dict.fromkeys(span.text for span in extract_title_spans(pdf_path, workers=workers)))
+
+
+def extract_recipe_titles(pdf_url: str, workers: Optional[int] = None) -> List[str]:
     """
     Extract recipe titles from the PDF using simple heuristics:
     - Detect lines in bold or large font
     - Use regex to find lines that look like recipe names
     """
-    titles = set()
     try:
-        # Download the PDF temporarily
-        with urlopen(pdf_url) as response, NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            tmp_file.write(response.read())
-            tmp_path = tmp_file.name
-
-        doc = fitz.open(tmp_path)
-
-        for page in doc:
-            blocks = page.get_text("dict")['blocks']
-            for block in blocks:
-                if 'lines' not in block:
-                    continue
-                for line in block['lines']:
-                    for span in line['spans']:
-                        text = span['text'].strip()
-                        if not text or len(text.split()) > 12:
-                            continue
-                        if span['size'] >= 11 and re.match(r"^[A-Z][A-Za-z\s,'()&-]+$", text):
-                            titles.add(text)
-
-        return list(titles)
+        cached = pdf_cache.fetch(pdf_url)
+        return extract_titles_from_file(cached.path, workers=workers)
 
     except Exception as e:
         print(f"Error extracting recipe titles: {e}")
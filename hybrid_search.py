@@ -0,0 +1,188 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.sql.expression import text, func, select
+
+from phi.document import Document
+from phi.reranker.base import Reranker
+from phi.vectordb.pgvector import PgVector2
+
+from tracing import span
+from vector_index import DEFAULT_RESCORE_FACTOR, ann_select, as_list
+from vector_storage import STORAGE_TYPES, column_type, current_column_type
+
+# Words shorter than this are dropped from the full-text query
+MIN_QUERY_WORD = 2
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """Fuse several ranked lists of keys: score(d) = sum over lists of 1 / (k + rank of d)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=lambda key: scores[key], reverse=True)
+
+
+def or_query(query: str) -> Optional[str]:
+    """Turn a natural-language question into an OR-ed tsquery string ("tourtière | pork")."""
+    words = [w for w in re.findall(r"\w+", query.lower()) if len(w) >= MIN_QUERY_WORD]
+    return " | ".join(dict.fromkeys(words)) or None
+
+
+class HybridPgVector2(PgVector2):
+    """PgVector2 that fuses Postgres full-text search with vector search.
+
+    Recipe names and ingredients ("tourtière", "cretons") are exact terms that embedding
+    search ranks poorly. search() takes the top `candidates` rows from both the vector
+    index and a GIN-indexed tsvector query, fuses the two rankings with reciprocal rank
+    fusion and, if a reranker is set, reranks the fused candidates before returning
+    the top `limit`.
+
+    storage selects how embeddings are stored ("vector", "halfvec" or "binary", see
+    vector_storage.py); binary storage fetches rescore_factor times more ANN candidates
+    and re-ranks them by their half-precision distance to the query embedding.
+    """
+
+    def __init__(self, *args, text_config: str = "english", candidates: int = 20, rrf_k: int = 60,
+                 storage: str = "vector", rescore_factor: int = DEFAULT_RESCORE_FACTOR, **kwargs):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown vector storage: {storage}")
+        # get_table() runs inside PgVector2.__init__ and needs the storage type
+        self.storage = storage
+        self.rescore_factor = rescore_factor
+        # The reranker runs over the fused list, not just the vector results
+        reranker = kwargs.pop("reranker", None)
+        super().__init__(*args, **kwargs)
+        self.hybrid_reranker: Optional[Reranker] = reranker
+        self.text_config = text_config
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+
+    def get_table(self):
+        table = super().get_table()
+        table.c.embedding.type = column_type(self.storage, self.dimensions)
+        return table
+
+    def _tsvector(self):
+        # Must match the indexed expression exactly for Postgres to use the GIN index
+        return func.to_tsvector(text(f"'{self.text_config}'::regconfig"), self.table.c.content)
+
+    def create(self) -> None:
+        current = current_column_type(self.db_engine, self.schema, self.collection)
+        expected = "vector" if self.storage == "vector" else "halfvec"
+        if current is not None and not current.startswith(expected):
+            raise ValueError(
+                f"Collection {self.collection} stores {current} embeddings but {self.storage} storage is configured; "
+                f"run `python vector_storage.py migrate {self.collection} --storage {self.storage}`"
+            )
+        super().create()
+        with self.Session() as sess, sess.begin():
+            sess.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {self.collection}_fts_index ON {self.table} "
+                f"USING gin (to_tsvector('{self.text_config}'::regconfig, content));"
+            ))
+
+    def _filters(self, filters: Optional[Dict[str, Any]]) -> list:
+        return [getattr(self.table.c, key) == value for key, value in (filters or {}).items()
+                if hasattr(self.table.c, key)]
+
+    def _run(self, stmt, settings: List[str]) -> List[Document]:
+        with self.Session() as sess, sess.begin():
+            for setting in settings:
+                sess.execute(text(setting))
+            rows = sess.execute(stmt).fetchall()
+        return [
+            Document(name=row.name, meta_data=row.meta_data, content=row.content,
+                     embedder=self.embedder, embedding=as_list(row.embedding), usage=row.usage)
+            for row in rows
+        ]
+
+    def _columns(self):
+        return (self.table.c.name, self.table.c.meta_data, self.table.c.content,
+                self.table.c.embedding, self.table.c.usage)
+
+    def vector_search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Nearest-neighbour search, with ef_search/probes set for this query's limit (see vector_index.ann_select)."""
+        with span("embed_query"):
+            query_embedding = self.embedder.get_embedding(query)
+        if not query_embedding:
+            print(f"Error getting embedding for query: {query}")
+            return []
+        stmt, settings = ann_select(self, self._columns(), query_embedding, limit, where=self._filters(filters),
+                                    rescore_factor=self.rescore_factor)
+        try:
+            return self._run(stmt, settings)
+        except Exception as e:
+            print(f"Error in vector search: {e}")
+            return []
+
+    def keyword_search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Full-text search ranked by ts_rank_cd, matching any word of the query."""
+        terms = or_query(query)
+        if terms is None:
+            return []
+        tsquery = func.to_tsquery(text(f"'{self.text_config}'::regconfig"), terms)
+        rank = func.ts_rank_cd(self._tsvector(), tsquery, 32)
+        stmt = (
+            select(*self._columns())
+            .where(self._tsvector().op("@@")(tsquery), *self._filters(filters))
+            .order_by(rank.desc())
+            .limit(limit)
+        )
+        try:
+            return self._run(stmt, [])
+        except Exception as e:
+            print(f"Error in keyword search: {e}")
+            return []
+
+    def search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        with span("search", limit=limit) as attributes:
+            results = self._hybrid_search(query, limit, filters)
+            attributes["results"] = len(results)
+        return results
+
+    def _hybrid_search(self, query: str, limit: int, filters: Optional[Dict[str, Any]]) -> List[Document]:
+        candidates = max(limit, self.candidates)
+        with span("vector_search"):
+            vector_hits = self.vector_search(query, limit=candidates, filters=filters)
+        with span("keyword_search"):
+            keyword_hits = self.keyword_search(query, limit=candidates, filters=filters)
+
+        by_content: Dict[str, Document] = {}
+        for doc in vector_hits + keyword_hits:
+            by_content.setdefault(doc.content, doc)
+        fused = reciprocal_rank_fusion(
+            [[doc.content for doc in vector_hits], [doc.content for doc in keyword_hits]], k=self.rrf_k
+        )
+        results = [by_content[content] for content in fused]
+
+        if self.hybrid_reranker is not None and results:
+            with span("rerank", candidates=len(results)):
+                results = self.hybrid_reranker.rerank(query=query, documents=results)
+        return results[:limit]
+
+
+class CrossEncoderReranker(Reranker):
+    """CPU-only reranker scoring (query, chunk) pairs with a small sentence-transformers cross-encoder."""
+
+    model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    batch_size: int = 16
+    cross_encoder: Optional[Any] = None
+
+    def _get_cross_encoder(self):
+        if self.cross_encoder is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError:
+                raise ImportError("`sentence-transformers` not installed, required for CrossEncoderReranker")
+            self.cross_encoder = CrossEncoder(self.model, device="cpu")
+        return self.cross_encoder
+
+    def rerank(self, query: str, documents: List[Document]) -> List[Document]:
+        scores = self._get_cross_encoder().predict(
+            [(query, doc.content) for doc in documents], batch_size=self.batch_size
+        )
+        for doc, score in zip(documents, scores):
+            doc.reranking_score = float(score)
+        return sorted(documents, key=lambda doc: doc.reranking_score, reverse=True)
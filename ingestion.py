@@ -0,0 +1,259 @@
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.inspection import inspect
+from sqlalchemy.schema import MetaData, Table, Column
+from sqlalchemy.sql.expression import text, select, delete, func
+from sqlalchemy.types import DateTime, Integer, String
+
+from phi.document import Document
+from phi.document.reader.pdf import PDFReader
+from phi.vectordb.pgvector import PgVector2
+
+from tracing import span
+
+
+# Chunks embedded between two progress reports
+EMBED_PROGRESS_STEP = 256
+
+
+def page_hash(content: str) -> str:
+    """Return the content hash used to detect changed pages."""
+    return hashlib.sha256(content.encode("utf-8", "replace")).hexdigest()
+
+
+class PageManifest:
+    """Per-page content-hash manifest stored next to the pgvector collections.
+
+    Each row records which page of a collection has which content hash and the ids of the
+    vector rows created from it, so a reload only has to embed pages that changed. When
+    a collection is synced by recipe segments rather than pages, "page" is the segment's
+    position in the document.
+    """
+
+    def __init__(self, db_engine, schema: Optional[str] = "ai", table_name: str = "pdf_page_manifest"):
+        self.db_engine = db_engine
+        self.schema = schema
+        self.metadata = MetaData(schema=schema)
+        self.table = Table(
+            table_name,
+            self.metadata,
+            Column("collection", String, primary_key=True),
+            Column("page", Integer, primary_key=True),
+            Column("page_hash", String, nullable=False),
+            Column("chunk_ids", postgresql.JSONB, nullable=False),
+            Column("updated_at", DateTime(timezone=True), server_default=text("now()")),
+            extend_existing=True,
+        )
+        self._created = False
+
+    def create(self) -> None:
+        if self._created:
+            return
+        if not inspect(self.db_engine).has_table(self.table.name, schema=self.schema):
+            with self.db_engine.begin() as conn:
+                if self.schema is not None:
+                    conn.execute(text(f"create schema if not exists {self.schema};"))
+            self.table.create(self.db_engine, checkfirst=True)
+        self._created = True
+
+    def load(self, collection: str) -> Dict[int, Tuple[str, List[str]]]:
+        """Return {page: (page_hash, chunk_ids)} for a collection."""
+        self.create()
+        stmt = select(self.table.c.page, self.table.c.page_hash, self.table.c.chunk_ids).where(
+            self.table.c.collection == collection
+        )
+        with self.db_engine.connect() as conn:
+            return {row.page: (row.page_hash, list(row.chunk_ids)) for row in conn.execute(stmt)}
+
+    def record(self, collection: str, page: int, hash_: str, chunk_ids: List[str]) -> None:
+        self.create()
+        stmt = postgresql.insert(self.table).values(
+            collection=collection, page=page, page_hash=hash_, chunk_ids=chunk_ids
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["collection", "page"],
+            set_=dict(page_hash=hash_, chunk_ids=chunk_ids, updated_at=text("now()")),
+        )
+        with self.db_engine.begin() as conn:
+            conn.execute(stmt)
+
+    def truncate(self, collection: str, num_pages: int) -> None:
+        """Forget pages beyond the end of the current version of the document."""
+        self.create()
+        stmt = delete(self.table).where(self.table.c.collection == collection, self.table.c.page > num_pages)
+        with self.db_engine.begin() as conn:
+            conn.execute(stmt)
+
+    def drop_collection(self, collection: str) -> None:
+        self.create()
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.collection == collection))
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_pages(pdf_path: str) -> List[Document]:
+    """Read a PDF into one unchunked Document per page."""
+    return PDFReader(chunk=False).read(pdf=pdf_path)
+
+
+def sync_collection(knowledge_base, pdf_path: str, manifest: PageManifest,
+                    base_collection: Optional[str] = None,
+                    read_units: Callable[[str], List[Document]] = read_pages,
+                    progress: Optional[Callable[[str, int, int], None]] = None) -> Dict[str, int]:
+    """Bring a knowledge base's collection in line with the PDF at pdf_path, page by page.
+
+    Pages whose content hash is already in the collection are kept, pages found in
+    base_collection (typically the previous version of the same PDF) are copied with
+    their embeddings, and only new or changed pages are embedded. Rows for pages that
+    no longer exist are deleted.
+
+    read_units splits the PDF into the units that are hashed and chunked, one Document
+    per page by default; recipe_chunking.recipe_segments gives one per recipe instead.
+    A unit's meta_data "page" is where it starts in the PDF.
+
+    Page 0 of the manifest records the hash of the whole file once a sync completes, so
+    an up-to-date collection is detected without parsing the PDF.
+
+    progress, if given, is called as progress("embedding", chunks_done, chunks_total).
+    Units with a chunk the embedder failed on are skipped and left out of the manifest,
+    so the next sync embeds them again.
+    Returns unit counts per outcome, plus "chunks": the number of chunks embedded.
+    """
+    vector_db: PgVector2 = knowledge_base.vector_db
+    collection = vector_db.collection
+    vector_db.create()
+
+    stats = {"units": 0, "kept": 0, "copied": 0, "embedded": 0, "failed": 0, "removed": 0, "chunks": 0}
+    # Hashes depend on the chunking too, so changing it re-chunks the collection
+    salt = getattr(knowledge_base.chunking_strategy, "cache_key", "")
+    document_hash = page_hash(salt + file_hash(pdf_path)) if salt else file_hash(pdf_path)
+    current = manifest.load(collection)
+    if current.get(0, (None,))[0] == document_hash:
+        print(f"Collection {collection} is up to date")
+        return stats
+    if not current and vector_db.get_count() > 0:
+        # Populated before manifests existed; content-addressed, so already complete
+        print(f"Collection {collection} has no page manifest, leaving it as is")
+        return stats
+
+    donor = manifest.load(base_collection) if base_collection and base_collection != collection else {}
+    current_by_hash = {h: ids for page, (h, ids) in current.items() if page > 0}
+    donor_by_hash = {h: ids for page, (h, ids) in donor.items() if page > 0}
+
+    with span("parse") as attributes:
+        pages = read_units(pdf_path)
+        attributes["units"] = len(pages)
+    stats["units"] = len(pages)
+    hashes = [page_hash(salt + (page.content or "")) for page in pages]
+    page_numbers = [page.meta_data.get("page", n) for n, page in enumerate(pages, start=1)]
+
+    new_chunks: Dict[str, List[Document]] = {}
+    with span("chunk") as attributes:
+        for page, h, page_number in zip(pages, hashes, page_numbers):
+            if h not in current_by_hash and h not in donor_by_hash and h not in new_chunks:
+                new_chunks[h] = _chunk_page(knowledge_base, page, h, page_number)
+        attributes["units"] = len(new_chunks)
+    # Embed all new chunks up front so a caching embedder can batch the misses
+    texts = [chunk.content for chunks in new_chunks.values() for chunk in chunks]
+    stats["chunks"] = len(texts)
+    failed = set()
+    if texts and hasattr(vector_db.embedder, "embed_texts"):
+        with span("embed", chunks=len(texts)):
+            for start in range(0, len(texts), EMBED_PROGRESS_STEP):
+                batch = texts[start:start + EMBED_PROGRESS_STEP]
+                embeddings = vector_db.embedder.embed_texts(batch)
+                failed.update(t for t, embedding in zip(batch, embeddings) if embedding is None)
+                if progress:
+                    progress("embedding", min(start + EMBED_PROGRESS_STEP, len(texts)), len(texts))
+
+    with span("write"):
+        seen: Dict[str, List[str]] = {}
+        for position, (h, page_number) in enumerate(zip(hashes, page_numbers), start=1):
+            if h in seen:
+                # Identical page earlier in the document (e.g. a repeated divider page)
+                chunk_ids = seen[h]
+            elif h in current_by_hash:
+                chunk_ids = current_by_hash[h]
+                _set_page(vector_db, chunk_ids, page_number)
+                stats["kept"] += 1
+            elif h in donor_by_hash:
+                chunk_ids = donor_by_hash[h]
+                _copy_rows(vector_db, base_collection, chunk_ids, page_number)
+                stats["copied"] += 1
+            else:
+                chunks = new_chunks[h]
+                if any(chunk.content in failed for chunk in chunks):
+                    # Recorded without a hash, so the next sync embeds it again
+                    manifest.record(collection, position, "", [])
+                    stats["failed"] += 1
+                    continue
+                if chunks:
+                    vector_db.upsert(documents=chunks)
+                chunk_ids = [chunk.id for chunk in chunks]
+                stats["embedded"] += 1
+
+            seen[h] = chunk_ids
+            if current.get(position) != (h, chunk_ids):
+                manifest.record(collection, position, h, chunk_ids)
+
+        removed_ids = [i for h, ids in current_by_hash.items() if h not in seen for i in ids]
+        if removed_ids:
+            with vector_db.Session() as sess, sess.begin():
+                sess.execute(delete(vector_db.table).where(vector_db.table.c.id.in_(removed_ids)))
+            stats["removed"] = len([h for h in current_by_hash if h not in seen])
+        manifest.truncate(collection, len(pages))
+        if stats["failed"]:
+            print(f"Could not embed {stats['failed']} units of {collection}, they are retried on the next sync")
+        else:
+            manifest.record(collection, 0, document_hash, [])
+
+    print(f"Synced collection {collection}: {stats}")
+    return stats
+
+
+def _chunk_page(knowledge_base, page: Document, hash_: str, page_number: int) -> List[Document]:
+    if not page.content or not page.content.strip():
+        return []
+    # Chunk ids derive from the page content, so unchanged pages keep their rows across versions
+    page.id = hash_[:24]
+    page.meta_data = {**page.meta_data, "page": page_number}
+    return knowledge_base.chunking_strategy.chunk(page)
+
+
+def _set_page(vector_db: PgVector2, chunk_ids: List[str], page_number: int) -> None:
+    if not chunk_ids:
+        return
+    table = vector_db.table
+    stmt = (
+        table.update()
+        .where(table.c.id.in_(chunk_ids), table.c.meta_data["page"].as_integer() != page_number)
+        .values(meta_data=table.c.meta_data.op("||")(func.jsonb_build_object("page", page_number)))
+    )
+    with vector_db.Session() as sess, sess.begin():
+        sess.execute(stmt)
+
+
+def _copy_rows(vector_db: PgVector2, base_collection: str, chunk_ids: List[str], page_number: int) -> None:
+    if not chunk_ids:
+        return
+    base = PgVector2(collection=base_collection, schema=vector_db.schema,
+                     db_engine=vector_db.db_engine, embedder=vector_db.embedder)
+    columns = ["id", "name", "meta_data", "content", "embedding", "usage", "content_hash"]
+    with vector_db.Session() as sess, sess.begin():
+        rows = sess.execute(
+            select(*[base.table.c[c] for c in columns]).where(base.table.c.id.in_(chunk_ids))
+        ).fetchall()
+        for row in rows:
+            values = dict(zip(columns, row))
+            values["meta_data"] = {**(values["meta_data"] or {}), "page": page_number}
+            sess.execute(postgresql.insert(vector_db.table).values(**values).on_conflict_do_nothing())
@@ -0,0 +1,159 @@
+import os
+import time
+import uuid
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from pdf_cache import pdf_cache, collection_name_for
+from tracing import span, traced
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class IngestionJob:
+    """State of one background ingestion, written by its worker thread and polled by the UI."""
+
+    def __init__(self, key: Hashable, description: str = ""):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.description = description
+        self.status = "queued"  # queued | running | done | failed
+        self.stage = "queued"  # downloading | parsing | embedding | indexing | describing | done
+        self.pages_parsed = 0
+        self.pages_total = 0
+        self.chunks_embedded = 0
+        self.chunks_total = 0
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def update(self, **fields) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def report(self, stage: str, done: int, total: int) -> None:
+        """Progress callback for sync_collection / extract_text_lines."""
+        if stage == "parsing":
+            self.update(stage=stage, pages_parsed=done, pages_total=total)
+        elif stage == "embedding":
+            self.update(stage=stage, chunks_embedded=done, chunks_total=total)
+        else:
+            self.update(stage=stage)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+    @property
+    def fraction(self) -> float:
+        """Rough overall progress in [0, 1]: parsing is the first third, embedding the rest."""
+        with self._lock:
+            if self.status == "done":
+                return 1.0
+            parsed = self.pages_parsed / self.pages_total if self.pages_total else 0.0
+            embedded = self.chunks_embedded / self.chunks_total if self.chunks_total else 0.0
+            return min(1.0, parsed / 3 + embedded * 2 / 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {k: v for k, v in vars(self).items() if not k.startswith("_")}
+
+
+class JobQueue:
+    """Runs ingestion jobs on a small thread pool, one job per key at a time.
+
+    Submitting a job whose key (e.g. PDF URL, database and whether the download is
+    revalidated) already has a queued or running job returns that job instead of
+    starting a duplicate. Like the resource registries, a module-level queue is shared
+    by every Streamlit session in the process.
+    """
+
+    def __init__(self, max_workers: int = 2, max_finished: int = 50):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingestion")
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._active: Dict[Hashable, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, fn: Callable[[IngestionJob], Any], description: str = "") -> IngestionJob:
+        """Queue fn(job) under key, or return the job already queued/running for key."""
+        with self._lock:
+            job_id = self._active.get(key)
+            if job_id is not None:
+                return self._jobs[job_id]
+            job = IngestionJob(key, description)
+            self._jobs[job.job_id] = job
+            self._active[key] = job.job_id
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """Snapshots of known jobs, oldest first."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def _run(self, job: IngestionJob, fn: Callable[[IngestionJob], Any]) -> None:
+        job.update(status="running", started_at=time.time())
+        try:
+            result = fn(job)
+            job.update(status="done", stage="done", result=result, finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            job.update(status="failed", error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._active.pop(job.key, None)
+
+    def _prune(self) -> None:
+        # Caller must hold self._lock; forget the oldest finished jobs
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+def ingest_pdf(job: IngestionJob, pdf_url: str, db_url: str, force_revalidate: bool = False) -> Dict[str, str]:
+    """Download (through the PDF cache) and ingest a cookbook.
+
+    Returns its pdf_path, collection_name and cookbook_description (None if it could not be generated).
+    """
+    # Imported here, on the worker thread, so importing this module does not load phi and SQLAlchemy
+    from pdf_assistant import PDFAssistant
+
+    job.update(stage="downloading")
+    with traced("ingest", url=pdf_url):
+        with span("download"):
+            cached = pdf_cache.fetch(pdf_url, force_revalidate=force_revalidate)
+        assistant = PDFAssistant(
+            pdf_url=pdf_url,
+            collection_name=collection_name_for(cached.sha256),
+            db_url=db_url,
+            pdf_path=cached.path,
+        )
+        assistant.initialize_knowledge_base(progress=job.report)
+        assistant.initialize_recipe_catalog()
+        # Generated once per cookbook here, so sessions only read it
+        job.update(stage="describing")
+        try:
+            description = assistant.get_description()
+        except Exception as e:
+            print(f"Error generating cookbook description: {e}")
+            description = None
+    return {"pdf_url": pdf_url, "pdf_path": cached.path, "collection_name": assistant.collection_name,
+            "cookbook_description": description}
+
+
+# Background ingestion jobs for this process
+ingestion_jobs = JobQueue(max_workers=int(os.getenv("INGESTION_WORKERS", "2")))
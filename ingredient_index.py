@@ -0,0 +1,202 @@
+import re
+import json
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.schema import MetaData, Table, Column
+from sqlalchemy.sql.expression import text, select, delete
+from sqlalchemy.types import Integer, String
+
+from recipe_index import UNIT_PATTERN
+
+# Preparation words and fillers that do not change which ingredient is meant
+STOPWORDS = {
+    "a", "an", "the", "of", "and", "or", "to", "for", "into", "in", "with", "some", "taste", "about",
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "melted", "softened", "beaten",
+    "dried", "fresh", "frozen", "large", "small", "medium", "finely", "coarsely", "thinly", "cut", "pieces",
+    "ground", "whole", "optional", "peeled", "cubed", "cooked", "boiled", "packed", "divided", "room", "temperature",
+}
+MAX_TERM_WORDS = 3
+
+# List-style questions only ("what can I make with X", "which recipes use X", "recipes with X"),
+# anchored at the start: "how do I make pea soup with ham?" is a cooking question for the LLM
+INGREDIENT_QUERY_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:"
+    r"what\s+(?:can|could|should)\s+(?:i|we)\s+(?:make|cook|bake|prepare)"
+    r"|(?:which|what)\s+(?:recipes?|dishes?)(?:\s+(?:can|could)\s+(?:i|we)\s+(?:make|cook|bake|prepare))?"
+    r"|(?:(?:show|give)(?:\s+me)?|list|find)\s+(?:all\s+)?(?:the\s+)?(?:recipes?|dishes?)"
+    r"|(?:recipes?|dishes?)"
+    r")\s+(?:(?:that|which)\s+)?(?:(?:are|is)\s+made\s+)?"
+    r"(?:with|using|containing|including|uses?|contains?|has|have|includes?|calls?\s+for)"
+    r"\s+(.+?)\s*[?.!]*$",
+    re.IGNORECASE,
+)
+
+
+def singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith("ss"):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_words(phrase: str) -> List[str]:
+    """Lowercase an ingredient phrase and drop quantities, units, punctuation and descriptors."""
+    phrase = UNIT_PATTERN.sub(" ", phrase.lower())
+    words = re.findall(r"[a-zà-ÿ]+", phrase)
+    return [singular(w) for w in words if w not in STOPWORDS]
+
+
+def normalize_term(phrase: str) -> str:
+    return " ".join(normalize_words(phrase))
+
+
+def build_ingredient_index(recipes: List[Dict[str, Any]]) -> Dict[str, Set[int]]:
+    """Map normalized ingredient terms (1-3 word n-grams) to catalog recipe numbers (1-based)."""
+    index: Dict[str, Set[int]] = {}
+    for recipe_no, recipe in enumerate(recipes, start=1):
+        for ingredient in recipe.get("ingredients") or []:
+            words = normalize_words(ingredient)
+            for n in range(1, MAX_TERM_WORDS + 1):
+                for i in range(len(words) - n + 1):
+                    index.setdefault(" ".join(words[i:i + n]), set()).add(recipe_no)
+    return index
+
+
+def search_ingredients(index: Dict[str, Set[int]], terms: List[str], match_all: bool = True) -> Optional[Set[int]]:
+    """Return recipe numbers containing all (or any) of terms.
+
+    None means the index cannot answer: a term is unknown in AND mode, or no term is known
+    in OR mode (the question may name an ingredient differently than the recipes do).
+    """
+    postings = []
+    for term in terms:
+        key = normalize_term(term)
+        if not key:
+            continue
+        if key not in index:
+            if match_all:
+                return None
+            continue
+        postings.append(index[key])
+    if not postings:
+        return None
+    if match_all:
+        return set.intersection(*postings)
+    return set.union(*postings)
+
+
+def parse_ingredient_query(message: str) -> Optional[Tuple[List[str], bool]]:
+    """Extract (ingredient terms, match_all) from questions like "what can I make with X and Y"."""
+    match = INGREDIENT_QUERY_PATTERN.search(message.strip())
+    if not match:
+        return None
+    phrase = match.group(1)
+    match_all = not re.search(r"\bor\b", phrase, re.IGNORECASE)
+    terms = [t.strip() for t in re.split(r",|&|\band\b|\bor\b", phrase, flags=re.IGNORECASE) if t.strip()]
+    return (terms, match_all) if terms else None
+
+
+def answer_ingredient_query(message: str, index: Dict[str, Set[int]],
+                            recipes: List[Dict[str, Any]]) -> Optional[str]:
+    """Answer "recipes with X and/or Y" questions from the inverted index, or return None."""
+    if not index:
+        return None
+    parsed = parse_ingredient_query(message)
+    if parsed is None:
+        return None
+    terms, match_all = parsed
+    found = search_ingredients(index, terms, match_all=match_all)
+    if found is None:
+        return None
+
+    joiner = " and " if match_all else " or "
+    wanted = joiner.join(terms)
+    if not found:
+        return f"None of the recipes in the cookbook use {wanted}."
+    lines = [f"- {recipes[n - 1]['title']} (page {recipes[n - 1]['page']})" for n in sorted(found)]
+    return f"Recipes with {wanted}:\n\n" + "\n".join(lines)
+
+
+class IngredientIndexStore:
+    """Persistent ingredient inverted index stored next to the pgvector collections (ai.ingredient_index).
+
+    Like RecipeCatalog, save() writes a recipe_no 0 marker row so an empty index counts as built.
+    """
+
+    def __init__(self, db_engine, schema: Optional[str] = "ai", table_name: str = "ingredient_index"):
+        self.db_engine = db_engine
+        self.schema = schema
+        self.metadata = MetaData(schema=schema)
+        self.table = Table(
+            table_name,
+            self.metadata,
+            Column("collection", String, primary_key=True),
+            Column("term", String, primary_key=True),
+            Column("recipe_no", Integer, primary_key=True),
+            extend_existing=True,
+        )
+        self._created = False
+
+    def create(self) -> None:
+        if self._created:
+            return
+        if self.schema is not None:
+            with self.db_engine.begin() as conn:
+                conn.execute(text(f"create schema if not exists {self.schema};"))
+        self.table.create(self.db_engine, checkfirst=True)
+        self._created = True
+
+    def exists(self, collection: str) -> bool:
+        self.create()
+        stmt = select(self.table.c.term).where(self.table.c.collection == collection).limit(1)
+        with self.db_engine.connect() as conn:
+            return conn.execute(stmt).first() is not None
+
+    def save(self, collection: str, index: Dict[str, Set[int]]) -> None:
+        self.create()
+        rows = [{"collection": collection, "term": "", "recipe_no": 0}]
+        rows.extend({"collection": collection, "term": term, "recipe_no": n} for term, nos in index.items() for n in nos)
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.collection == collection))
+            conn.execute(self.table.insert(), rows)
+        print(f"Saved {len(index)} ingredient terms to the index for {collection}")
+
+    def drop_collection(self, collection: str) -> None:
+        self.create()
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.collection == collection))
+
+    def load(self, collection: str) -> Dict[str, Set[int]]:
+        self.create()
+        stmt = select(self.table.c.term, self.table.c.recipe_no).where(
+            self.table.c.collection == collection, self.table.c.recipe_no > 0
+        )
+        index: Dict[str, Set[int]] = {}
+        with self.db_engine.connect() as conn:
+            for row in conn.execute(stmt):
+                index.setdefault(row.term, set()).add(row.recipe_no)
+        return index
+
+
+def ingredient_tools(index: Dict[str, Set[int]], recipes: List[Dict[str, Any]]) -> list:
+    """Return a function that exposes the ingredient index to the LLM as a phi tool."""
+
+    def find_recipes_by_ingredients(ingredients: List[str], match_all: bool = True) -> str:
+        """Use this function to find recipes that use given ingredients, instead of searching the knowledge base.
+
+        Args:
+            ingredients: Ingredient names, e.g. ["maple syrup", "pork"].
+            match_all: If True, return recipes containing every ingredient; if False, any of them.
+
+        Returns:
+            str: A JSON list of matching recipes with title and page.
+        """
+        found = search_ingredients(index, ingredients, match_all=match_all) or set()
+        return json.dumps([{"title": recipes[n - 1]["title"], "page": recipes[n - 1]["page"]} for n in sorted(found)])
+
+    return [find_recipes_by_ingredients]
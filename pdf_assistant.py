@@ -1,5 +1,7 @@
 import os
 import inspect
+import time
+from functools import lru_cache
 
 # Set environment variable for protobuf
 os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
@@ -8,11 +10,36 @@ os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
 if not hasattr(inspect, 'getargspec'):
     inspect.getargspec = inspect.getfullargspec
 
-from typing import Optional, List
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, List, Iterator, Tuple
 from phi.assistant import Assistant
-from phi.storage.assistant.postgres import PgAssistantStorage
-from phi.knowledge.pdf import PDFUrlKnowledgeBase
-from phi.vectordb.pgvector import PgVector2
+from phi.embedder.base import Embedder
+from phi.embedder.openai import OpenAIEmbedder
+from phi.knowledge.pdf import PDFKnowledgeBase
+from phi.llm.base import LLM
+from phi.llm.message import Message
+from sqlalchemy.dialects.postgresql import JSONPATH
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.expression import cast, func, literal, select
+
+from answer_cache import AnswerCache, is_standalone
+from cookbook_description import DESCRIPTION_PROMPT, CookbookDescriptions, shorten_description
+from chat_history import (DEFAULT_HISTORY_TOKENS, DEFAULT_HISTORY_TURNS, SUMMARY_KEY, SUMMARY_MAX_TOKENS,
+                          HistoryWindow, chat_turns, extractive_summary)
+from db_pool import get_engine
+from embedding_cache import CachedEmbedder, embedding_cache
+from extract_recipe_titles import TextLine, extract_text_lines
+from hybrid_search import CrossEncoderReranker, HybridPgVector2
+from ingestion import PageManifest, sync_collection
+from ingredient_index import IngredientIndexStore, answer_ingredient_query, build_ingredient_index, ingredient_tools
+from pdf_cache import pdf_cache, collection_name_for
+from vector_index import build_index, index_from_env
+from vector_storage import storage_from_env
+from recipe_chunking import RecipeChunking, recipe_segments, DEFAULT_MAX_CHUNK_SIZE
+from recipe_index import RecipeCatalog, answer_catalog_query, build_catalog, catalog_tools
+from session_storage import COLLECTION_KEY, SessionStorage
+from tracing import Trace, current_trace, span, traced
+from registry import answer_caches, ingredient_indexes, knowledge_bases, recipe_catalogs, storages
 
 
 class PDFAssistant:
@@ -21,102 +48,537 @@ class PDFAssistant:
                  collection_name: str,
                  db_url: str,
                  run_id: Optional[str] = None,
-                 user_id: str = 'user'):
-        """Initialize the PDF Assistant with necessary parameters."""
+                 user_id: str = 'user',
+                 pdf_path: Optional[str] = None,
+                 use_answer_cache: bool = True,
+                 vector_storage: Optional[str] = None,
+                 chunk_size: Optional[int] = None,
+                 db_engine: Optional[Engine] = None,
+                 history_turns: Optional[int] = None,
+                 history_tokens: Optional[int] = None,
+                 embedder: Optional[Embedder] = None,
+                 llm: Optional[LLM] = None):
+        """Initialize the PDF Assistant with necessary parameters.
+
+        pdf_path is the local copy of the PDF from the PDF cache. If it (or collection_name)
+        is missing, the PDF is fetched through the cache and the collection is named after
+        its content hash. With use_answer_cache, LLM answers to standalone questions (and
+        to the first question of a conversation) are reused for the same question about
+        the same collection (see answer_cache.py). vector_storage
+        ("vector", "halfvec" or "binary", default VECTOR_STORAGE) sets how new collections
+        store their embeddings; convert existing ones with `python vector_storage.py migrate`.
+        The PDF is chunked one recipe per chunk, splitting recipes longer than chunk_size
+        characters (default RECIPE_CHUNK_SIZE). All database access goes through db_engine,
+        by default the process-wide pooled engine for db_url (see db_pool.py).
+        The LLM sees at most history_turns recent turns / history_tokens tokens of the
+        chat (default CHAT_HISTORY_TURNS / CHAT_HISTORY_TOKENS); older turns are folded
+        into a rolling summary saved with the run. embedder and llm replace the default
+        OpenAI embeddings and the Assistant's default LLM (e.g. with the benchmark fakes).
+        """
         self.pdf_url = pdf_url
         self.collection_name = collection_name
+        self.pdf_path = pdf_path
         self.db_url = db_url
+        self.db_engine = db_engine or get_engine(db_url)
         self.user_id = user_id
         self.run_id = run_id
         self.assistant = None
         self.storage = None
         self.knowledge_base = None
+        self.recipes = None
+        self.ingredient_index = None
+        self.use_answer_cache = use_answer_cache
+        self.answer_cache = None
+        self.vector_storage = vector_storage or storage_from_env()
+        self.chunk_size = chunk_size or DEFAULT_MAX_CHUNK_SIZE
+        self.embedder = embedder
+        self.llm = llm
+        self.history_window = HistoryWindow(
+            max_turns=history_turns or DEFAULT_HISTORY_TURNS,
+            max_tokens=history_tokens or DEFAULT_HISTORY_TOKENS,
+            summarize=self._summarize_history,
+        )
+        # Latency metrics and timing spans of the most recent response (see stream_chat)
+        self.last_response_metrics = None
+        # Trace of an initialize_assistant() call made outside a turn, reported with the next response
+        self._setup_trace = None
+        # sync_collection stats of the last ingestion run by this instance, None if it reused a loaded one
+        self.last_sync_stats = None
+
+    def initialize_knowledge_base(self, progress: Optional[Callable[[str, int, int], None]] = None,
+                                  text_lines: Optional[List[TextLine]] = None):
+        """Load the knowledge base from the PDF URL.
 
-    def initialize_knowledge_base(self):
-        """Load the knowledge base from the PDF URL."""
+        Loaded knowledge bases are shared process-wide, so reruns and other sessions
+        using the same cookbook reuse it instead of ingesting the PDF again. progress is
+        called as progress(stage, done, total) while the PDF is parsed and embedded.
+        text_lines are the PDF's already-extracted lines (see extract_text_lines), for
+        callers that parse elsewhere, e.g. in a process pool.
+        """
+        with traced("knowledge_base") as attributes:
+            if not self.pdf_path or not self.collection_name:
+                with span("download"):
+                    cached = pdf_cache.fetch(self.pdf_url)
+                self.pdf_path = cached.path
+                self.collection_name = self.collection_name or collection_name_for(cached.sha256)
+
+            # Collections are content-addressed, so mirrors of the same PDF share one entry
+            key = (self.collection_name, self.db_url)
+            attributes.update(collection=self.collection_name, reused=knowledge_bases.get(key) is not None)
+            self.knowledge_base = knowledge_bases.get_or_create(
+                key, lambda: self._load_knowledge_base(progress, text_lines)
+            )
+        return self.knowledge_base
+
+    def _load_knowledge_base(self, progress: Optional[Callable[[str, int, int], None]] = None,
+                             lines: Optional[List[TextLine]] = None):
+        """Create the knowledge base and ingest the PDF into the vector DB."""
         print(f"Attempting to load PDF from: {self.pdf_url}")
         print(f"Database URL: {self.db_url}")
         print(f"Collection name: {self.collection_name}")
 
-        # Create knowledge base with vector DB (using default OpenAI embeddings)
-        self.knowledge_base = PDFUrlKnowledgeBase(
-            urls=[self.pdf_url],
-            vector_db=PgVector2(collection=self.collection_name, db_url=self.db_url)
+        # Create knowledge base with vector DB (default OpenAI embeddings, served through
+        # the persistent embedding cache so repeated chunks are never embedded twice)
+        embedder = CachedEmbedder(embedder=self.embedder or OpenAIEmbedder(), cache=embedding_cache)
+        # Hybrid full-text + vector retrieval, so exact recipe and ingredient names rank well;
+        # set RERANKER_MODEL to rerank the fused candidates with a local cross-encoder
+        reranker_model = os.getenv("RERANKER_MODEL")
+        knowledge_base = PDFKnowledgeBase(
+            path=self.pdf_path,
+            vector_db=HybridPgVector2(
+                collection=self.collection_name,
+                db_url=self.db_url,
+                db_engine=self.db_engine,
+                embedder=embedder,
+                index=index_from_env(),
+                storage=self.vector_storage,
+                reranker=CrossEncoderReranker(model=reranker_model) if reranker_model else None,
+            ),
+            # One chunk per recipe (title, ingredients and method together) instead of fixed-size pieces
+            chunking_strategy=RecipeChunking(max_chunk_size=self.chunk_size),
         )
+        # The PDF's text lines drive both chunking and the recipe catalog; parse them at most once
+        text_lines = lru_cache(maxsize=1)(lambda: lines or extract_text_lines(self.pdf_path, progress=progress))
 
         try:
             print("Loading knowledge base...")
-            self.knowledge_base.load()
+            # Only new or changed recipes are embedded; unchanged ones are reused from this
+            # collection or from the previous version of the PDF at the same URL
+            stats = sync_collection(
+                knowledge_base,
+                self.pdf_path,
+                PageManifest(knowledge_base.vector_db.db_engine),
+                base_collection=self._previous_collection_name(),
+                read_units=lambda pdf_path: recipe_segments(text_lines()),
+                progress=progress,
+            )
+            self.last_sync_stats = stats
+            # ANN index per VECTOR_INDEX / HNSW_* / IVFFLAT_*; a no-op when it already exists
+            if progress:
+                progress("indexing", 0, 0)
+            with span("index"):
+                build_index(knowledge_base.vector_db)
+            # Cached answers may quote pages that have just changed
+            if stats["copied"] or stats["embedded"] or stats["removed"]:
+                self._get_answer_cache(knowledge_base).invalidate(self.collection_name)
+            # Structured recipe catalog for list/count/lookup questions
+            engine = knowledge_base.vector_db.db_engine
+            with span("catalog"):
+                catalog = RecipeCatalog(engine)
+                if not catalog.exists(self.collection_name):
+                    catalog.save(self.collection_name, build_catalog(text_lines()))
+                # Ingredient -> recipe inverted index for "what can I make with X" questions
+                ingredients = IngredientIndexStore(engine)
+                if not ingredients.exists(self.collection_name):
+                    ingredients.save(self.collection_name, build_ingredient_index(catalog.load(self.collection_name)))
             print("Knowledge base loaded successfully")
-            print(f"Number of documents: {self.knowledge_base.num_documents}")
+            print(f"Number of documents: {knowledge_base.num_documents}")
         except Exception as e:
             print(f"Error loading knowledge base: {e}")
             import traceback
             traceback.print_exc()
             raise
 
-        return self.knowledge_base
+        return knowledge_base
+
+    def _previous_collection_name(self) -> Optional[str]:
+        """Return the collection of the version this URL served before its content changed."""
+        cached = pdf_cache.lookup(self.pdf_url)
+        if cached and cached.previous_sha256 and collection_name_for(cached.sha256) == self.collection_name:
+            return collection_name_for(cached.previous_sha256)
+        return None
+
+    def initialize_recipe_catalog(self):
+        """Load the recipe catalog and ingredient index built for this collection at ingestion time."""
+        if not self.knowledge_base:
+            self.initialize_knowledge_base()
+
+        engine = self.knowledge_base.vector_db.db_engine
+        key = (self.collection_name, self.db_url)
+        with span("recipe_catalog"):
+            self.recipes = recipe_catalogs.get_or_create(key, lambda: RecipeCatalog(engine).load(self.collection_name))
+            self.ingredient_index = ingredient_indexes.get_or_create(
+                key, lambda: IngredientIndexStore(engine).load(self.collection_name)
+            )
+        return self.recipes
+
+    def _get_answer_cache(self, knowledge_base) -> AnswerCache:
+        """Return the process-wide answer cache for this database."""
+        vector_db = knowledge_base.vector_db
+        return answer_caches.get_or_create(self.db_url, lambda: AnswerCache(vector_db.db_engine, vector_db.embedder))
 
     def initialize_storage(self):
         """Initialize the assistant storage."""
-        self.storage = PgAssistantStorage(table_name='pdf_assistant', db_url=self.db_url)
+        self.storage = storages.get_or_create(
+            (self.db_url, 'pdf_assistant'),
+            lambda: SessionStorage(table_name='pdf_assistant', db_url=self.db_url, db_engine=self.db_engine)
+        )
         return self.storage
 
-    def get_existing_run_ids(self):
-        """Get all existing run IDs for the current user."""
+    def get_latest_run_id(self) -> Optional[str]:
+        """Return the current user's most recently active session for this cookbook, if any."""
+        if not self.storage:
+            self.initialize_storage()
+        # Expired sessions are deleted here rather than on every message
+        self.storage.maybe_prune()
+        return self.storage.latest_run_id(self.user_id, self.collection_name)
+
+    def list_sessions(self, limit: int = 20, before: Optional[Tuple[datetime, str]] = None,
+                      all_cookbooks: bool = False) -> List[Dict[str, Any]]:
+        """Return a page of the current user's sessions (for this cookbook unless all_cookbooks), newest first.
+
+        For the next page, pass (updated_at, run_id) of the last session returned as before.
+        """
         if not self.storage:
             self.initialize_storage()
-        return self.storage.get_all_run_ids(self.user_id)
+        collection = None if all_cookbooks else self.collection_name
+        return self.storage.list_runs(self.user_id, collection, limit=limit, before=before)
+
+    def get_existing_run_ids(self, limit: int = 20) -> List[str]:
+        """Get the run IDs of the current user's most recent sessions for this cookbook."""
+        return [run["run_id"] for run in self.list_sessions(limit=limit)]
 
     def initialize_assistant(self):
         """Initialize the assistant with the knowledge base and storage."""
+        outer = current_trace()
+        with traced("setup"):
+            if outer is None:
+                # Not part of a response: keep the trace so the next response can report it
+                self._setup_trace = current_trace()
+            return self._initialize_assistant()
+
+    def _initialize_assistant(self):
         if not self.knowledge_base:
             self.initialize_knowledge_base()
 
         if not self.storage:
             self.initialize_storage()
 
-        self.assistant = Assistant(
-            run_id=self.run_id,
-            user_id=self.user_id,
+        if self.recipes is None:
+            self.initialize_recipe_catalog()
+
+        if self.use_answer_cache and self.answer_cache is None:
+            self.answer_cache = self._get_answer_cache(self.knowledge_base)
+
+        self.assistant = self._create_assistant(session=True)
+        self.run_id = self.assistant.run_id
+        return self.assistant
+
+    def _create_assistant(self, session: bool) -> Assistant:
+        """Build a phi Assistant over the loaded knowledge base, recipe catalog and ingredient index.
+
+        With session, it is this instance's chat run, stored in chat storage with a windowed
+        chat history. Without, it answers single questions and keeps no state, so several
+        can run at once (see answer()).
+        """
+        session_args = {}
+        if session:
+            session_args = dict(
+                run_id=self.run_id,
+                user_id=self.user_id,
+                storage=self.storage,
+                # Lets sessions be looked up per cookbook (see session_storage.py)
+                assistant_data={COLLECTION_KEY: self.collection_name, "pdf_url": self.pdf_url},
+                # A bounded window of the conversation (rolling summary + recent turns) goes in the
+                # prompt, instead of a chat-history tool that returns the whole run
+                add_chat_history_to_prompt=True,
+                chat_history_function=self._windowed_history,
+            )
+        llm = self.llm
+        if llm is not None and not session:
+            # The Assistant registers its tools on the LLM, so concurrent ones must not share it
+            llm = llm.model_copy(update={"tools": None, "functions": None})
+        return Assistant(
+            llm=llm,
             knowledge_base=self.knowledge_base,
-            storage=self.storage,
             show_tool_calls=False,  # Temporarily enable to debug
             search_knowledge=True,  # Enable vector search
-            read_chat_history=True,
+            # Recipe catalog and ingredient lookups, so these do not depend on top-k vector search
+            tools=catalog_tools(self.recipes) + ingredient_tools(self.ingredient_index, self.recipes),
             # Add instructions to help the assistant understand its role
             instructions=[
                 f"You are a helpful assistant that answers questions about a cookbook PDF document loaded from: {self.pdf_url}",
                 f"The PDF content is stored in the '{self.collection_name}' collection.",
                 "Always search the knowledge base first when answering questions about the document content.",
-                "When prompted about listing recipes, search thoroughly and provide ALL recipes found in the document.",
+                "When prompted about listing recipes, use the `list_recipes` tool and provide ALL recipes it returns.",
+                "Use the `find_recipe` tool to look up a specific recipe's page, section or ingredients.",
+                "When asked which recipes use certain ingredients, use the `find_recipes_by_ingredients` tool.",
                 "If you find relevant information in the knowledge base, use it to provide detailed answers.",
                 "If the user asks about recipes, ingredients, or cooking instructions, search for this information in the PDF.",
                 "Be specific about which document you're referencing and include the PDF source information."
-            ]
+            ],
+            **session_args,
         )
 
-        self.run_id = self.assistant.run_id
-        return self.assistant
-
     def chat(self, message: str):
         """Send a message to the assistant and get a response."""
-        if not self.assistant:
-            self.initialize_assistant()
-
-        response = self.assistant.chat(message)
-
-        # Handle generator response
-        if hasattr(response, '__iter__') and not isinstance(response, str):
-            return "".join(str(chunk) for chunk in response)
-        else:
-            return str(response)
-
-    def get_chat_history(self):
-        """Get the chat history for the current session."""
-        # Note: Chat history is managed by the storage backend
-        # The assistant will automatically load previous conversations
-        # when initialized with the same run_id
-        if not self.assistant:
-            self.initialize_assistant()
-        return []  # Return empty list for now, as history is managed internally
\ No newline at end of file
+        return "".join(self.stream_chat(message))
+
+    def _index_answer(self, message: str) -> Optional[str]:
+        """Answer from the ingredient index or the recipe catalog; None sends the question to the LLM.
+
+        The ingredient index goes first, so "how many recipes use X" is not answered with the catalog size.
+        """
+        return (answer_ingredient_query(message, self.ingredient_index or {}, self.recipes or [])
+                or answer_catalog_query(message, self.recipes or []))
+
+    def answer(self, question: str) -> Tuple[str, str]:
+        """Answer one question outside any chat session; returns (answer, source).
+
+        Nothing is read from or written to chat storage, so any number of calls can run
+        at once on one loaded cookbook (see batch_qa.py). As in stream_chat, source is
+        "index", "cache" or "llm", and LLM answers are added to the answer cache.
+        """
+        if self.recipes is None:
+            self.initialize_recipe_catalog()
+        if self.use_answer_cache and self.answer_cache is None:
+            self.answer_cache = self._get_answer_cache(self.knowledge_base)
+
+        with traced("answer") as attributes:
+            with span("index_lookup"):
+                answer = self._index_answer(question)
+            source = "index"
+            if answer is None and self.answer_cache is not None:
+                with span("answer_cache_lookup"):
+                    answer = self.answer_cache.lookup(self.collection_name, question)
+                source = "cache"
+            if answer is None:
+                source = "llm"
+                with span("llm"):
+                    answer = self._create_assistant(session=False).run(question, stream=False)
+                if self.answer_cache is not None:
+                    with span("answer_cache_store"):
+                        self.answer_cache.store(self.collection_name, question, answer)
+            attributes["source"] = source
+        return answer, source
+
+    def get_description(self, generate: bool = True) -> Optional[str]:
+        """Return the cookbook's one-line description, generating and storing it first if missing.
+
+        Ingestion generates it (see ingestion_jobs.ingest_pdf), so sessions only read it;
+        with generate=False a missing description is returned as None.
+        """
+        if not self.collection_name:
+            self.initialize_knowledge_base()
+        descriptions = CookbookDescriptions(self.db_engine)
+        description = descriptions.load(self.collection_name)
+        if description is None and generate:
+            answer, _ = self.answer(DESCRIPTION_PROMPT)
+            description = shorten_description(answer or "") or None
+            if description:
+                descriptions.save(self.collection_name, description)
+        return description
+
+    def stream_chat(self, message: str) -> Iterator[str]:
+        """Send a message to the assistant and yield the response as it is generated.
+
+        Once the stream is exhausted, time-to-first-token and tokens/sec for the
+        response are available in self.last_response_metrics, along with the turn's
+        timing spans ("spans", see tracing.Trace.breakdown) and total ms per span name
+        ("timings"). "setup_spans" holds the spans of an initialize_assistant() call
+        made since the previous response.
+        """
+        turn = Trace("chat_turn")
+        # The trace is only active while this generator runs, not while the caller handles a chunk
+        with turn.activate():
+            if not self.assistant:
+                self.initialize_assistant()
+
+            start = time.perf_counter()
+            first_token_at = None
+            num_tokens = 0
+
+            # List/count/lookup and ingredient questions are answered from the indexes without the LLM
+            with span("index_lookup") as attributes:
+                index_answer = self._index_answer(message)
+                attributes["hit"] = index_answer is not None
+            # Follow-ups ("how long do I bake it?") are answered from this run's conversation, so only
+            # standalone questions, or the first one of a run, go through the cache shared by all sessions
+            use_cache = (index_answer is None and self.answer_cache is not None
+                         and (is_standalone(message) or not self._has_context()))
+            cached_answer = None
+            if use_cache:
+                with span("answer_cache_lookup") as attributes:
+                    cached_answer = self.answer_cache.lookup(self.collection_name, message)
+                    attributes["hit"] = cached_answer is not None
+
+            if index_answer is not None:
+                source = "index"
+                self._record_turn(message, index_answer)
+                response = [index_answer]
+            elif cached_answer is not None:
+                source = "cache"
+                self._record_turn(message, cached_answer)
+                response = [cached_answer]
+            else:
+                source = "llm"
+                response = self.assistant.chat(message, stream=True)
+            # Non-streamable assistants return the full response at once
+            if isinstance(response, str) or not hasattr(response, '__iter__'):
+                response = [response]
+
+        # Storage reads, history and knowledge-base searches of the Assistant run nest under "llm";
+        # its self time is the model itself
+        llm_span = turn.start("llm") if source == "llm" else None
+        chunks = iter(response)
+        done = object()
+        parts = []
+        while True:
+            with turn.activate():
+                chunk = next(chunks, done)
+            if chunk is done:
+                break
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            # Streaming LLM APIs emit roughly one token per chunk
+            num_tokens += 1
+            parts.append(str(chunk))
+            yield parts[-1]
+        if llm_span is not None:
+            turn.end(llm_span, tokens=num_tokens)
+
+        with turn.activate():
+            if source == "llm" and use_cache:
+                with span("answer_cache_store"):
+                    self.answer_cache.store(self.collection_name, message, "".join(parts))
+            self._compact_history()
+
+        end = time.perf_counter()
+        if first_token_at is None:
+            first_token_at = end
+        generation_time = end - first_token_at
+        turn.finish(source=source, run_id=self.run_id, collection=self.collection_name)
+        self.last_response_metrics = {
+            "time_to_first_token": first_token_at - start,
+            "total_time": end - start,
+            "tokens": num_tokens,
+            "tokens_per_second": num_tokens / generation_time if generation_time > 0 else 0.0,
+            "source": source,
+            "spans": turn.breakdown(),
+            "timings": turn.totals(),
+        }
+        if self._setup_trace is not None:
+            self.last_response_metrics["setup_spans"] = self._setup_trace.breakdown()
+            self._setup_trace = None
+
+    def _has_context(self) -> bool:
+        """Whether the run already has turns or a summary, i.e. a new message may depend on them."""
+        if not self.assistant.memory.chat_history and not (self.assistant.run_data or {}).get(SUMMARY_KEY):
+            # Nothing loaded in this process yet; a resumed run's history is still in storage
+            self.assistant.read_from_storage()
+        return bool(self.assistant.memory.chat_history or (self.assistant.run_data or {}).get(SUMMARY_KEY))
+
+    def _record_turn(self, message: str, answer: str):
+        """Save a question answered outside the LLM to the run's chat history."""
+        self.assistant.read_from_storage()
+        self.assistant.memory.add_chat_message(Message(role="user", content=message))
+        self.assistant.memory.add_chat_message(Message(role="assistant", content=answer))
+        self.assistant.write_to_storage()
+
+    def _windowed_history(self, conversation: Assistant) -> Optional[str]:
+        """chat_history_function for the Assistant: rolling summary plus the recent turns."""
+        with span("history") as attributes:
+            turns = chat_turns(conversation.memory.chat_history)
+            attributes["turns"] = len(turns)
+            return self.history_window.render(turns, (conversation.run_data or {}).get(SUMMARY_KEY))
+
+    def _compact_history(self):
+        """Fold turns that no longer fit the history window into the run's rolling summary."""
+        memory = self.assistant.memory
+        turns = chat_turns(memory.chat_history)
+        try:
+            with span("history_compaction"):
+                summary = self.history_window.compact(turns, (self.assistant.run_data or {}).get(SUMMARY_KEY))
+        except Exception as e:
+            print(f"Error compacting chat history: {e}")
+            return
+        if summary is None:
+            return
+
+        self.assistant.run_data = {**(self.assistant.run_data or {}), SUMMARY_KEY: summary}
+        # Prompts of summarized turns are not needed any more; the transcript stays in chat_history
+        keep = len(turns) - summary["turns"]
+        user_positions = [i for i, m in enumerate(memory.llm_messages) if m.role == "user"]
+        if len(user_positions) > keep:
+            memory.llm_messages = memory.llm_messages[user_positions[-keep] if keep else len(memory.llm_messages):]
+        self.assistant.write_to_storage()
+
+    def _summarize_history(self, previous: str, transcript: str) -> str:
+        """Update the rolling summary with the LLM, falling back to an extractive summary."""
+        # The Assistant only creates its LLM on its first run; until then use the configured one
+        # or phi's default, as Assistant.update_llm would
+        base = (self.assistant.llm if self.assistant is not None else None) or self.llm
+        instructions = (
+            f"Summarize this conversation about a cookbook in at most {SUMMARY_MAX_TOKENS} tokens. "
+            "Keep the recipes, ingredients, preferences and open questions the user mentioned. "
+            "Reply with the summary only."
+        )
+        content = f"Summary so far:\n{previous}\n\nNew messages:\n{transcript}" if previous else transcript
+        try:
+            if base is None:
+                from phi.llm.openai import OpenAIChat
+
+                llm = OpenAIChat()
+            else:
+                # A tool-free copy, so summarizing cannot trigger knowledge-base searches
+                llm = base.model_copy(update={"tools": None, "functions": None, "tool_choice": None})
+            with span("summarize"):
+                summary = llm.response(messages=[Message(role="system", content=instructions),
+                                                 Message(role="user", content=content)])
+        except Exception as e:
+            print(f"Error summarizing chat history: {e}")
+            summary = None
+        if not summary or not summary.strip():
+            return extractive_summary(previous, transcript)
+        # Keep a verbose model from growing the summary past its budget
+        return extractive_summary("", summary.strip())
+
+    def get_chat_history(self, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """Get one page of the current session's chat history from storage.
+
+        Page 1 holds the most recent page_size messages; messages within a page are in
+        chronological order. The page is sliced in Postgres, so the rest of the run's
+        history is not loaded. "summary" is the run's rolling summary of older turns.
+        Raises ValueError if page or page_size is less than 1.
+        """
+        if not isinstance(page, int) or not isinstance(page_size, int) or page < 1 or page_size < 1:
+            raise ValueError(f"page and page_size must be integers >= 1, got page={page!r}, page_size={page_size!r}")
+        if not self.storage:
+            self.initialize_storage()
+        result: Dict[str, Any] = {"messages": [], "page": page, "page_size": page_size, "total": 0, "summary": None}
+        if not self.run_id:
+            return result
+
+        table = self.storage.table
+        history = table.c.memory["chat_history"]
+        newest, oldest = (page - 1) * page_size, page * page_size - 1
+        stmt = select(
+            func.coalesce(func.jsonb_array_length(history), 0),
+            func.jsonb_path_query_array(history, cast(literal(f"$[last - {oldest} to last - {newest}]"), JSONPATH)),
+            table.c.run_data[SUMMARY_KEY]["text"].astext,
+        ).where(table.c.run_id == self.run_id)
+        with self.storage.Session() as sess:
+            row = sess.execute(stmt).first()
+        if row is not None:
+            result.update(total=row[0], messages=row[1] or [], summary=row[2])
+        return result
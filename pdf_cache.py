@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "recipe-pdf-assistant")
+
+
+class CachedPDF(NamedTuple):
+    url: str
+    path: str
+    sha256: str
+    # Hash of the previous version served at this URL, if the content has changed
+    previous_sha256: Optional[str] = None
+
+
+def collection_name_for(sha256: str) -> str:
+    """Return the pgvector collection name for a PDF with the given content hash."""
+    return f"pdf_{sha256[:24]}"
+
+
+class PDFCache:
+    """On-disk, content-addressed cache for downloaded PDFs.
+
+    Files are stored once per SHA-256 of their bytes, so the same cookbook mirrored at
+    several URLs is downloaded and embedded once. Each URL keeps its ETag/Last-Modified
+    validators and is revalidated with a conditional GET once max_age has elapsed.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age: int = 3600, timeout: int = 60):
+        self.cache_dir = cache_dir or os.getenv("PDF_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.max_age = max_age
+        self.timeout = timeout
+        self.blob_dir = os.path.join(self.cache_dir, "blobs")
+        self.url_dir = os.path.join(self.cache_dir, "urls")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.url_dir, exist_ok=True)
+
+    def blob_path(self, sha256: str) -> str:
+        """Return the local path of the cached PDF with the given content hash."""
+        return os.path.join(self.blob_dir, f"{sha256}.pdf")
+
+    def lookup(self, url: str) -> Optional[CachedPDF]:
+        """Return what the cache currently holds for url, without touching the network."""
+        meta = self._read_meta(url)
+        if not meta or not os.path.exists(self.blob_path(meta["sha256"])):
+            return None
+        return self._result(url, meta)
+
+    def fetch(self, url: str, force_revalidate: bool = False) -> CachedPDF:
+        """Return the local copy of url, downloading or revalidating it only when needed."""
+        meta, has_blob = self._cached(url)
+        if self._is_fresh(meta, has_blob, force_revalidate):
+            return self._result(url, meta)
+
+        request = Request(url, headers=self._validators(meta) if has_blob else {})
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                data = response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except HTTPError as e:
+            if e.code == 304 and has_blob:
+                return self._not_modified(url, meta)
+            raise
+        except URLError as e:
+            if has_blob:
+                print(f"Could not revalidate {url} ({e}), using cached copy")
+                return self._result(url, meta)
+            raise
+
+        return self._store(url, meta, data, etag, last_modified)
+
+    async def fetch_async(self, session, url: str, force_revalidate: bool = False) -> CachedPDF:
+        """Like fetch, but downloads through an aiohttp ClientSession so many URLs can be fetched concurrently."""
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("`aiohttp` not installed, required for PDFCache.fetch_async")
+
+        meta, has_blob = self._cached(url)
+        if self._is_fresh(meta, has_blob, force_revalidate):
+            return self._result(url, meta)
+
+        headers = self._validators(meta) if has_blob else {}
+        try:
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
+                if response.status == 304 and has_blob:
+                    return self._not_modified(url, meta)
+                response.raise_for_status()
+                data = await response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except aiohttp.ClientResponseError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if has_blob:
+                print(f"Could not revalidate {url} ({e}), using cached copy")
+                return self._result(url, meta)
+            raise
+
+        return self._store(url, meta, data, etag, last_modified)
+
+    def _cached(self, url: str) -> Tuple[Optional[dict], bool]:
+        meta = self._read_meta(url)
+        cached_sha = meta.get("sha256") if meta else None
+        return meta, cached_sha is not None and os.path.exists(self.blob_path(cached_sha))
+
+    def _is_fresh(self, meta: Optional[dict], has_blob: bool, force_revalidate: bool) -> bool:
+        return has_blob and not force_revalidate and time.time() - meta.get("checked_at", 0) < self.max_age
+
+    def _validators(self, meta: dict) -> Dict[str, str]:
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def _not_modified(self, url: str, meta: dict) -> CachedPDF:
+        print(f"PDF not modified, using cached copy: {url}")
+        meta["checked_at"] = time.time()
+        self._write_meta(url, meta)
+        return self._result(url, meta)
+
+    def _store(self, url: str, meta: Optional[dict], data: bytes,
+               etag: Optional[str], last_modified: Optional[str]) -> CachedPDF:
+        sha256 = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_path(sha256)
+        if not os.path.exists(blob_path):
+            tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, blob_path)
+            print(f"Cached PDF {url} as {sha256}")
+
+        cached_sha = meta.get("sha256") if meta else None
+        previous_sha = meta.get("previous_sha256") if meta else None
+        if cached_sha is not None and cached_sha != sha256:
+            previous_sha = cached_sha
+
+        meta = {
+            "url": url,
+            "sha256": sha256,
+            "previous_sha256": previous_sha,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": time.time(),
+        }
+        self._write_meta(url, meta)
+        return self._result(url, meta)
+
+    def _result(self, url: str, meta: dict) -> CachedPDF:
+        return CachedPDF(
+            url=url,
+            path=self.blob_path(meta["sha256"]),
+            sha256=meta["sha256"],
+            previous_sha256=meta.get("previous_sha256"),
+        )
+
+    def _meta_path(self, url: str) -> str:
+        return os.path.join(self.url_dir, f"{hashlib.md5(url.encode()).hexdigest()}.json")
+
+    def _read_meta(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(url)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, url: str, meta: dict) -> None:
+        path = self._meta_path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+
+pdf_cache = PDFCache()
@@ -0,0 +1,113 @@
+import os
+from typing import Dict, List, Optional
+
+from phi.document import Document
+from phi.document.chunking.strategy import ChunkingStrategy
+
+from extract_recipe_titles import TextLine
+from recipe_index import is_heading, recipe_title_size
+
+# Recipes longer than this many characters are split, at line boundaries, into several chunks
+DEFAULT_MAX_CHUNK_SIZE = int(os.getenv("RECIPE_CHUNK_SIZE", "3000"))
+
+
+def recipe_segments(lines: List[TextLine]) -> List[Document]:
+    """Split a PDF's text lines into one Document per recipe, from its title to the next title.
+
+    A recipe that runs over a page break stays in one segment. Text outside recipes
+    (front matter, section introductions) is grouped per page; a section heading
+    directly above a recipe stays with that recipe. Each segment carries
+    title, section and page (where it starts) metadata; title is None outside recipes.
+    If no titles are detected at all, this falls back to one segment per page.
+    """
+    recipe_size = recipe_title_size(lines)
+    segments: List[Dict] = []
+    current: Optional[Dict] = None
+    section: Optional[str] = None
+
+    for line in lines:
+        size = round(line.size)
+        if is_heading(line) and recipe_size is not None and size >= recipe_size:
+            if size > recipe_size:
+                section = line.text
+                current = {"title": None, "section": section, "page": line.page, "lines": []}
+                segments.append(current)
+            elif current is not None and current["title"] is None and all(is_heading(seen) for seen in current["lines"]):
+                # A section heading directly above the recipe is part of its chunk
+                current["title"] = line.text
+            else:
+                current = {"title": line.text, "section": section, "page": line.page, "lines": []}
+                segments.append(current)
+        elif current is None or (current["title"] is None and line.page != current["page"]):
+            current = {"title": None, "section": section, "page": line.page, "lines": []}
+            segments.append(current)
+        current["lines"].append(line)
+
+    documents = []
+    for segment in segments:
+        if not segment["lines"]:
+            continue
+        meta_data = {"page": segment["page"], "title": segment["title"], "section": segment["section"]}
+        last_page = segment["lines"][-1].page
+        if last_page != segment["page"]:
+            meta_data["last_page"] = last_page
+        documents.append(Document(
+            name=segment["title"] or f"page {segment['page']}",
+            content="\n".join(line.text for line in segment["lines"]),
+            meta_data=meta_data,
+        ))
+    return documents
+
+
+class RecipeChunking(ChunkingStrategy):
+    """Chunking strategy for recipe segments (see recipe_segments).
+
+    A segment up to max_chunk_size characters becomes a single chunk, so a recipe's
+    title, ingredients and method are retrieved together. Longer segments are split at
+    line boundaries; every continuation chunk starts with the recipe title.
+    """
+
+    def __init__(self, max_chunk_size: int = DEFAULT_MAX_CHUNK_SIZE):
+        self.max_chunk_size = max_chunk_size
+        # Included in ingestion hashes, so changing the size (or how chunks are cut, "v2") re-chunks
+        # existing collections
+        self.cache_key = f"recipe:v2:{max_chunk_size}"
+
+    def chunk(self, document: Document) -> List[Document]:
+        title = document.meta_data.get("title")
+        # Continuation chunks start with the title; it counts towards max_chunk_size like the rest
+        prefix = f"{title} (continued)\n" if title else ""
+        if len(prefix) > self.max_chunk_size // 2:
+            prefix = ""
+        parts: List[str] = []
+        head, body = "", ""
+        for line in document.content.split("\n"):
+            separator = "\n" if body else ""
+            if len(head) + len(body) + len(separator) + len(line) <= self.max_chunk_size:
+                body += separator + line
+                continue
+            if body:
+                parts.append(head + body)
+                head, body = prefix, ""
+            while len(head) + len(line) > self.max_chunk_size:
+                # A single line longer than a chunk: cut it at a space
+                room = self.max_chunk_size - len(head)
+                cut = line.rfind(" ", 0, room)
+                cut = cut if cut > 0 else room
+                parts.append(head + line[:cut])
+                head = prefix
+                line = line[cut:].lstrip()
+            body = line
+        if body.strip():
+            parts.append(head + body)
+
+        chunks = []
+        for chunk_number, content in enumerate(parts, start=1):
+            meta_data = {**document.meta_data, "chunk": chunk_number}
+            chunks.append(Document(
+                id=f"{document.id}_{chunk_number}" if document.id else None,
+                name=document.name,
+                meta_data=meta_data,
+                content=content,
+            ))
+        return chunks
@@ -0,0 +1,256 @@
+import re
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import MetaData, Table, Column
+from sqlalchemy.sql.expression import text, select, delete
+from sqlalchemy.types import DateTime, Integer, String
+
+from extract_recipe_titles import TextLine, extract_text_lines
+
+# Subheadings inside a recipe that the title heuristic would otherwise pick up
+SECTION_MARKERS = {"ingredients", "ingredient", "directions", "direction", "method", "preparation",
+                   "instructions", "steps", "notes", "note", "serves", "yield", "variation", "variations"}
+METHOD_MARKERS = ("directions", "method", "preparation", "instructions", "steps")
+
+UNIT_PATTERN = re.compile(
+    r"\b(cups?|c\.|tbsp|tablespoons?|tsp|teaspoons?|lbs?|pounds?|oz|ounces?|g|kg|grams?|ml|l|litres?|liters?"
+    r"|pinch|dash|cloves?|cans?|packages?|slices?|sticks?|quarts?|pints?)\b",
+    re.IGNORECASE,
+)
+QUANTITY_PATTERN = re.compile(r"^([-•*·▪‣]|\d|[½¼¾⅓⅔⅛])")
+
+
+def looks_like_ingredient(line: str) -> bool:
+    """Heuristic for ingredient lines: a short line starting with a quantity/bullet or naming a unit."""
+    if len(line.split()) > 15:
+        return False
+    return bool(QUANTITY_PATTERN.match(line) or UNIT_PATTERN.search(line))
+
+
+def clean_ingredient(line: str) -> str:
+    return re.sub(r"^[-•*·▪‣]\s*", "", line).strip()
+
+
+def is_heading(line: TextLine) -> bool:
+    """True for title-like lines that are not recipe subheadings such as "Ingredients"."""
+    return line.is_title and line.text.lower().rstrip(":") not in SECTION_MARKERS
+
+
+def recipe_title_size(lines: List[TextLine]) -> Optional[int]:
+    """Return the font size of recipe titles: the most common size among heading lines."""
+    sizes = Counter(round(line.size) for line in lines if is_heading(line))
+    return sizes.most_common(1)[0][0] if sizes else None
+
+
+def build_catalog(lines: List[TextLine]) -> List[Dict[str, Any]]:
+    """Build a recipe catalog (title, page, section, ingredients) from a PDF's text lines.
+
+    The most common font size among title lines is taken as the recipe title size;
+    larger title lines are section headings (e.g. "Soups"), smaller ones are ignored.
+    """
+    recipe_size = recipe_title_size(lines)
+    if recipe_size is None:
+        return []
+
+    recipes: List[Dict[str, Any]] = []
+    section: Optional[str] = None
+    current: Optional[Dict[str, Any]] = None
+    in_ingredients = False
+
+    for line in lines:
+        lowered = line.text.lower().rstrip(":")
+        if is_heading(line):
+            size = round(line.size)
+            if size > recipe_size:
+                section = line.text
+                current = None
+                continue
+            if size == recipe_size:
+                current = {"title": line.text, "page": line.page, "section": section, "ingredients": []}
+                recipes.append(current)
+                in_ingredients = True
+                continue
+        if current is None:
+            continue
+        if lowered.startswith("ingredient"):
+            in_ingredients = True
+        elif lowered.startswith(METHOD_MARKERS):
+            in_ingredients = False
+        elif in_ingredients:
+            if looks_like_ingredient(line.text):
+                current["ingredients"].append(clean_ingredient(line.text))
+            elif current["ingredients"] and len(line.text.split()) > 15:
+                # Prose after the ingredient list: the method has started
+                in_ingredients = False
+    return recipes
+
+
+def build_catalog_from_file(pdf_path: str, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    return build_catalog(extract_text_lines(pdf_path, workers=workers))
+
+
+class RecipeCatalog:
+    """Persistent recipe catalog stored next to the pgvector collections (ai.recipe_catalog).
+
+    save() also writes a recipe_no 0 marker row, so a cookbook without recognizable recipes
+    still counts as built and is not re-extracted on every load.
+    """
+
+    def __init__(self, db_engine, schema: Optional[str] = "ai", table_name: str = "recipe_catalog"):
+        self.db_engine = db_engine
+        self.schema = schema
+        self.metadata = MetaData(schema=schema)
+        self.table = Table(
+            table_name,
+            self.metadata,
+            Column("collection", String, primary_key=True),
+            Column("recipe_no", Integer, primary_key=True),
+            Column("title", String, nullable=False),
+            Column("page", Integer),
+            Column("section", String),
+            Column("ingredients", postgresql.JSONB),
+            Column("created_at", DateTime(timezone=True), server_default=text("now()")),
+            extend_existing=True,
+        )
+        self._created = False
+
+    def create(self) -> None:
+        if self._created:
+            return
+        if self.schema is not None:
+            with self.db_engine.begin() as conn:
+                conn.execute(text(f"create schema if not exists {self.schema};"))
+        self.table.create(self.db_engine, checkfirst=True)
+        self._created = True
+
+    def exists(self, collection: str) -> bool:
+        self.create()
+        stmt = select(self.table.c.recipe_no).where(self.table.c.collection == collection).limit(1)
+        with self.db_engine.connect() as conn:
+            return conn.execute(stmt).first() is not None
+
+    def save(self, collection: str, recipes: List[Dict[str, Any]]) -> None:
+        self.create()
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.collection == collection))
+            # Every row needs the same keys: executemany takes the columns from the first one
+            marker = {"title": "", "page": None, "section": None, "ingredients": None}
+            conn.execute(self.table.insert(), [
+                {"collection": collection, "recipe_no": 0, **marker},
+                *({"collection": collection, "recipe_no": i, **recipe} for i, recipe in enumerate(recipes, start=1)),
+            ])
+        print(f"Saved {len(recipes)} recipes to the catalog for {collection}")
+
+    def drop_collection(self, collection: str) -> None:
+        self.create()
+        with self.db_engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.collection == collection))
+
+    def load(self, collection: str) -> List[Dict[str, Any]]:
+        self.create()
+        stmt = (
+            select(self.table.c.title, self.table.c.page, self.table.c.section, self.table.c.ingredients)
+            .where(self.table.c.collection == collection, self.table.c.recipe_no > 0)
+            .order_by(self.table.c.recipe_no)
+        )
+        with self.db_engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(stmt)]
+
+
+# List/count questions about the whole catalog; the rest of the question must be CATALOG_FILLER,
+# so "how many recipes use maple syrup" or "list all vegetarian recipes" go to the ingredient index or the LLM
+LIST_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:(?:can|could) you\s+)?(?:list|show(?:\s+me)?|give(?:\s+me)?|what\s+are|tell\s+me)"
+    r"\s+(?:a\s+list\s+of\s+)?(?:all|every)(?:\s+of)?(?:\s+the)?\s+recipes?\b(.*)$",
+    re.IGNORECASE,
+)
+COUNT_PATTERN = re.compile(
+    r"^(?:how\s+many\s+recipes|(?:what(?:'s|\s+is)\s+)?the\s+(?:total\s+)?number\s+of\s+recipes"
+    r"|count\s+(?:the\s+|all\s+)?recipes)\b(.*)$",
+    re.IGNORECASE,
+)
+CATALOG_FILLER = {
+    "are", "is", "there", "in", "on", "the", "this", "that", "cookbook", "book", "pdf", "document", "does", "do",
+    "it", "have", "has", "contain", "contains", "include", "includes", "total", "altogether", "overall", "all",
+    "of", "please",
+}
+LOOKUP_PATTERN = re.compile(r"\b(?:which|what) page\b.*?\b(?:is|for|has)\b\s+(?:the\s+)?(?:recipe\s+for\s+)?(.+?)\s*\??$",
+                            re.IGNORECASE)
+LOOKUP_SUFFIX = re.compile(r"(\s+(recipe|on|found|located|in the cookbook|in the book))+$", re.IGNORECASE)
+
+
+def format_recipe_list(recipes: List[Dict[str, Any]]) -> str:
+    lines = []
+    section = None
+    for recipe in recipes:
+        if recipe.get("section") and recipe["section"] != section:
+            section = recipe["section"]
+            lines.append(f"\n**{section}**")
+        lines.append(f"- {recipe['title']} (page {recipe['page']})")
+    return "\n".join(lines).strip()
+
+
+def find_recipes(recipes: List[Dict[str, Any]], name: str) -> List[Dict[str, Any]]:
+    """Return recipes whose title contains name (case-insensitive), exact matches first."""
+    needle = name.strip().lower()
+    matches = [r for r in recipes if needle in r["title"].lower()]
+    return sorted(matches, key=lambda r: r["title"].lower() != needle)
+
+
+def is_unfiltered(rest: str) -> bool:
+    """True if the words after "recipes" in a list/count question only refer to the whole cookbook."""
+    return all(word in CATALOG_FILLER for word in re.findall(r"[a-z']+", rest.lower()))
+
+
+def answer_catalog_query(message: str, recipes: List[Dict[str, Any]]) -> Optional[str]:
+    """Answer list/count/page-lookup questions straight from the catalog, or return None."""
+    if not recipes:
+        return None
+    message = message.strip()
+
+    match = COUNT_PATTERN.match(message)
+    if match and is_unfiltered(match.group(1)):
+        return f"The cookbook contains {len(recipes)} recipes."
+
+    match = LIST_PATTERN.match(message)
+    if match and is_unfiltered(match.group(1)):
+        return f"The cookbook contains {len(recipes)} recipes:\n\n{format_recipe_list(recipes)}"
+
+    match = LOOKUP_PATTERN.search(message)
+    if match:
+        found = find_recipes(recipes, LOOKUP_SUFFIX.sub("", match.group(1)))
+        if found:
+            return "\n".join(f"- **{r['title']}** is on page {r['page']}" for r in found)
+    return None
+
+
+def catalog_tools(recipes: List[Dict[str, Any]]) -> list:
+    """Return functions that expose the catalog to the LLM as phi tools."""
+
+    def list_recipes(section: Optional[str] = None) -> str:
+        """Use this function to get the complete list of recipes in the cookbook, with their pages.
+
+        Args:
+            section: Optional cookbook section (e.g. "Desserts") to restrict the list to.
+
+        Returns:
+            str: A JSON list of recipes with title, page and section.
+        """
+        selected = [r for r in recipes if not section or (r.get("section") or "").lower() == section.lower()]
+        return json.dumps([{k: r[k] for k in ("title", "page", "section")} for r in selected])
+
+    def find_recipe(name: str) -> str:
+        """Use this function to look up a recipe by (part of) its name.
+
+        Args:
+            name: The recipe name to look for.
+
+        Returns:
+            str: A JSON list of matching recipes with title, page, section and ingredients.
+        """
+        return json.dumps(find_recipes(recipes, name))
+
+    return [list_recipes, find_recipe]
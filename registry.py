@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class ResourceRegistry:
+    """Process-wide LRU cache for expensive objects shared across Streamlit reruns and sessions.
+
+    Streamlit re-executes app.py on every interaction, but imported modules stay loaded,
+    so a module-level registry outlives reruns and is shared by all browser sessions
+    served by the same process.
+    """
+
+    def __init__(self, name: str, max_entries: int = 8):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key so concurrent sessions asking for the same resource build it only once
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key (marking it most recently used), or None."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, building it with factory() on first use."""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another session may have finished building it while we were waiting
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            print(f"[{self.name}] Creating entry for {key}")
+            value = factory()
+
+            with self._lock:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                self._evict()
+        return value
+
+    def evict(self, key: Hashable) -> None:
+        """Drop a single entry, e.g. after its collection has been re-ingested."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._key_locks.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def keys(self) -> List[Hashable]:
+        """Return the cached keys, least recently used first."""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def _evict(self) -> None:
+        # Caller must hold self._lock
+        while len(self._entries) > self.max_entries:
+            old_key, _ = self._entries.popitem(last=False)
+            self._key_locks.pop(old_key, None)
+            print(f"[{self.name}] Evicted least recently used entry {old_key}")
+
+
+# Loaded knowledge bases (and their PgVector2 handles), keyed by (collection_name, db_url)
+knowledge_bases = ResourceRegistry("knowledge_bases", max_entries=int(os.getenv("KB_REGISTRY_SIZE", "8")))
+
+# Recipe catalogs (lists of recipe dicts), keyed by (collection_name, db_url)
+recipe_catalogs = ResourceRegistry("recipe_catalogs", max_entries=int(os.getenv("KB_REGISTRY_SIZE", "8")))
+
+# Ingredient inverted indexes ({term: recipe numbers}), keyed by (collection_name, db_url)
+ingredient_indexes = ResourceRegistry("ingredient_indexes", max_entries=int(os.getenv("KB_REGISTRY_SIZE", "8")))
+
+# Semantic answer caches (answer_cache.AnswerCache), keyed by db_url
+answer_caches = ResourceRegistry("answer_caches", max_entries=int(os.getenv("STORAGE_REGISTRY_SIZE", "4")))
+
+# Assistant storage objects, keyed by (db_url, table_name)
+storages = ResourceRegistry("storages", max_entries=int(os.getenv("STORAGE_REGISTRY_SIZE", "4")))
@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.expression import delete, func, literal_column, select, text, tuple_, update
+
+from phi.assistant.run import AssistantRun
+from phi.storage.assistant.postgres import PgAssistantStorage
+
+from tracing import span
+
+# Runs not updated for this many days are deleted (0 keeps them forever)
+DEFAULT_SESSION_TTL_DAYS = float(os.getenv("SESSION_TTL_DAYS", "90"))
+# Minimum seconds between two pruning passes in one process
+PRUNE_INTERVAL = 3600
+
+# Key of the cookbook collection in a run's assistant_data
+COLLECTION_KEY = "collection_name"
+
+
+class SessionStorage(PgAssistantStorage):
+    """PgAssistantStorage with indexed per-user, per-cookbook session lookup and retention.
+
+    Runs record their cookbook collection in assistant_data, and an index on
+    (user_id, collection, updated_at) makes "latest session of this user for this
+    cookbook" and each page of a session listing a short index scan, however many runs
+    the table holds. Unlike PgAssistantStorage, upsert() also maintains updated_at, so
+    sessions are ordered by last activity and expire ttl_days after it.
+    """
+
+    def __init__(self, *args, ttl_days: float = DEFAULT_SESSION_TTL_DAYS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ttl_days = ttl_days
+        self._indexed = False
+        self._last_pruned = 0.0
+        self._prune_lock = threading.Lock()
+
+    def _collection(self):
+        # Literal key so the expression matches the index definition exactly
+        return literal_column(f"{self.table.name}.assistant_data ->> '{COLLECTION_KEY}'")
+
+    def create(self) -> None:
+        super().create()
+        self._create_indexes()
+
+    def _create_indexes(self) -> None:
+        if self._indexed or not self.table_exists():
+            return
+        name = self.table.name
+        indexes = {
+            f"{name}_user_collection_recent_idx":
+                f"(user_id, (assistant_data ->> '{COLLECTION_KEY}'), updated_at DESC, run_id DESC)",
+            f"{name}_updated_at_idx": "(updated_at)",
+        }
+        with self.Session() as sess, sess.begin():
+            existing = set(sess.execute(
+                text("select indexname from pg_indexes where schemaname = :schema and tablename = :table"),
+                {"schema": self.schema, "table": name},
+            ).scalars())
+            # Rows written by a plain PgAssistantStorage have no updated_at. Once the updated_at
+            # index exists this probe is an index lookup, so starts without such rows skip the UPDATE
+            probe = select(self.table.c.run_id).where(self.table.c.updated_at.is_(None)).limit(1)
+            if sess.execute(probe).first() is not None:
+                sess.execute(update(self.table).where(self.table.c.updated_at.is_(None))
+                             .values(updated_at=self.table.c.created_at))
+            for index, columns in indexes.items():
+                if index not in existing:
+                    sess.execute(text(f"CREATE INDEX IF NOT EXISTS {index} ON {self.schema}.{name} {columns}"))
+        self._indexed = True
+
+    def read(self, run_id: str) -> Optional[AssistantRun]:
+        with span("storage_read"):
+            return super().read(run_id)
+
+    def upsert(self, row: AssistantRun) -> Optional[AssistantRun]:
+        """Create or update a run, stamping updated_at (ON CONFLICT updates skip onupdate defaults)."""
+        values = dict(
+            name=row.name,
+            run_name=row.run_name,
+            user_id=row.user_id,
+            llm=row.llm,
+            memory=row.memory,
+            assistant_data=row.assistant_data,
+            run_data=row.run_data,
+            user_data=row.user_data,
+            task_data=row.task_data,
+            updated_at=func.now(),
+        )
+        stmt = postgresql.insert(self.table).values(run_id=row.run_id, **values)
+        stmt = stmt.on_conflict_do_update(index_elements=["run_id"], set_=values)
+        with span("storage_write"):
+            if not self._indexed:
+                self.create()
+            with self.Session() as sess, sess.begin():
+                sess.execute(stmt)
+        return self.read(run_id=row.run_id)
+
+    def latest_run_id(self, user_id: str, collection: str) -> Optional[str]:
+        """Return the most recently active run of user_id for a cookbook collection, or None."""
+        runs = self.list_runs(user_id, collection, limit=1)
+        return runs[0]["run_id"] if runs else None
+
+    def list_runs(self, user_id: str, collection: Optional[str] = None, limit: int = 20,
+                  before: Optional[Tuple[datetime, str]] = None) -> List[Dict[str, Any]]:
+        """Return one page of user_id's runs, most recently active first.
+
+        Pass the (updated_at, run_id) of the last run of a page as before to get the
+        next page; keyset pagination keeps every page an index range scan.
+        """
+        self._create_indexes()
+        if not self._indexed:
+            return []  # No run has been stored yet
+        table = self.table
+        stmt = (
+            select(
+                table.c.run_id,
+                table.c.run_name,
+                table.c.created_at,
+                table.c.updated_at,
+                self._collection().label("collection_name"),
+                func.coalesce(func.jsonb_array_length(table.c.memory["chat_history"]), 0).label("messages"),
+            )
+            .where(table.c.user_id == user_id)
+            .order_by(table.c.updated_at.desc(), table.c.run_id.desc())
+            .limit(limit)
+        )
+        if collection is not None:
+            stmt = stmt.where(self._collection() == collection)
+        if before is not None:
+            stmt = stmt.where(tuple_(table.c.updated_at, table.c.run_id) < tuple_(*before))
+        with self.Session() as sess:
+            return [dict(row._mapping) for row in sess.execute(stmt)]
+
+    def prune(self, ttl_days: Optional[float] = None) -> int:
+        """Delete runs not updated for ttl_days (default self.ttl_days); returns the number deleted."""
+        ttl_days = self.ttl_days if ttl_days is None else ttl_days
+        self._create_indexes()
+        if not ttl_days or not self._indexed:
+            return 0
+        stmt = delete(self.table).where(
+            self.table.c.updated_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, ttl_days * 86400)
+        )
+        with self.Session() as sess, sess.begin():
+            deleted = sess.execute(stmt).rowcount
+        if deleted:
+            print(f"Pruned {deleted} sessions older than {ttl_days:g} days from {self.table.name}")
+        return deleted
+
+    def maybe_prune(self) -> int:
+        """prune(), at most once per PRUNE_INTERVAL in this process."""
+        with self._prune_lock:
+            if time.time() - self._last_pruned < PRUNE_INTERVAL:
+                return 0
+            self._last_pruned = time.time()
+        return self.prune()
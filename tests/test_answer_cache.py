@@ -0,0 +1,69 @@
+import os
+import uuid
+
+import pytest
+
+from answer_cache import AnswerCache, is_standalone, normalize_question
+from utils import get_example_queries
+
+# Postgres with pgvector, e.g. postgresql+psycopg://ai:ai@localhost:5532/ai; the database tests are skipped without it
+TEST_DB_URL = os.getenv("TEST_DB_URL")
+
+
+class ConstantEmbedder:
+    """Embeds every question the same way: the worst case for telling templated questions apart."""
+
+    dimensions = 3
+
+    def get_embedding(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+def test_normalize_question():
+    assert normalize_question("  What can I make with PORK?! ") == "what can i make with pork"
+
+
+@pytest.fixture
+def cache():
+    if not TEST_DB_URL:
+        pytest.skip("TEST_DB_URL not set")
+    from sqlalchemy import create_engine
+
+    engine = create_engine(TEST_DB_URL)
+    cache = AnswerCache(engine, ConstantEmbedder(), table_name=f"answer_cache_test_{uuid.uuid4().hex[:8]}")
+    yield cache
+    cache.table.drop(engine)
+    engine.dispose()
+
+
+def test_short_questions_only_match_exactly(cache):
+    cache.store("cookbook", "Recipes with pork?", "Tourtière")
+    assert cache.lookup("cookbook", "recipes with pork") == "Tourtière"
+    assert cache.lookup("cookbook", "Recipes with beef?") is None
+
+
+def test_long_questions_match_semantically(cache):
+    cache.store("cookbook", "How long should I bake the tourtière for at 400 degrees?", "About 45 minutes")
+    assert cache.lookup("cookbook", "How long do I bake the tourtière for at 400 degrees?") == "About 45 minutes"
+    assert cache.lookup("other-cookbook", "How long do I bake the tourtière for at 400 degrees?") is None
+
+
+@pytest.mark.parametrize("question", get_example_queries() + [
+    "Which recipes use maple syrup?",
+    "How long should I bake the tourtière at 400 degrees?",
+])
+def test_standalone_questions(question):
+    assert is_standalone(question)
+
+
+@pytest.mark.parametrize("question", [
+    "How long do I bake it?",
+    "Make it vegetarian",
+    "What about dessert?",
+    "And the sauce?",
+    "Can I use butter instead?",
+    "Which one is easier?",
+    "Why?",
+])
+def test_follow_up_questions(question):
+    assert not is_standalone(question)
@@ -0,0 +1,38 @@
+import json
+
+from bulk_ingest import BulkIngestion, completed_urls
+
+DONE, PARTIAL, FAILED, NEW = (f"https://example.com/{name}.pdf" for name in ("done", "partial", "failed", "new"))
+
+
+def write_report(path):
+    records = [
+        {"url": DONE, "status": "done", "pages": 10, "chunks": 9},
+        {"url": PARTIAL, "status": "partial", "pages": 10, "chunks": 9, "failed_units": 2},
+        {"url": FAILED, "status": "failed", "pages": 0, "chunks": 0, "error": "downloading: timeout"},
+    ]
+    with open(path, "w") as f:
+        f.write("\n".join(json.dumps(record) for record in records) + "\n")
+        f.write('{"url": "https://example.com/trunc')  # A run killed mid-write
+
+
+def test_only_done_urls_are_completed(tmp_path):
+    report = tmp_path / "report.jsonl"
+    write_report(report)
+    assert completed_urls(str(report)) == {DONE}
+
+
+def test_resume_retries_partial_documents(tmp_path):
+    report = tmp_path / "report.jsonl"
+    write_report(report)
+    bulk = BulkIngestion("postgresql+psycopg://ai:ai@localhost:1/ai", report_path=str(report))
+    ingested = []
+
+    async def fake_run(urls):
+        ingested.extend(urls)
+        return [{"url": url, "status": "done", "pages": 1, "chunks": 1} for url in urls]
+
+    bulk._run = fake_run
+    summary = bulk.run([DONE, PARTIAL, FAILED, NEW])
+    assert ingested == [PARTIAL, FAILED, NEW]
+    assert summary["skipped"] == 1 and summary["done"] == 3
@@ -0,0 +1,39 @@
+import pytest
+
+from pdf_assistant import PDFAssistant
+
+
+@pytest.fixture
+def assistant():
+    # The engine connects lazily, and invalid pages are rejected before storage is touched
+    return PDFAssistant(pdf_url="https://example.com/cookbook.pdf", collection_name="pdf_test",
+                        db_url="postgresql+psycopg://ai:ai@localhost:1/ai", run_id="run")
+
+
+@pytest.mark.parametrize("page, page_size", [(0, 20), (-1, 20), (1, 0), (1, -5), ("1", 20), (1.5, 20)])
+def test_invalid_pages_are_rejected(assistant, page, page_size):
+    with pytest.raises(ValueError):
+        assistant.get_chat_history(page=page, page_size=page_size)
+
+
+
+class NotYetRunAssistant:
+    """An Assistant before its first run: phi creates the LLM in update_llm()."""
+
+    llm = None
+
+
+def test_summary_before_the_first_llm_run(assistant):
+    from benchmarks.fakes import FakeLLM
+
+    assistant.llm = FakeLLM()
+    assistant.assistant = NotYetRunAssistant()
+    summary = assistant._summarize_history("", "User: What can I make with pork?")
+    assert summary and summary != "User: What can I make with pork?"
+
+
+def test_summary_falls_back_without_an_llm(assistant, monkeypatch):
+    # phi's default OpenAI LLM cannot run without a key, so the extractive summary is used
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assistant.assistant = NotYetRunAssistant()
+    assert assistant._summarize_history("", "User: Pea soup?") == "User: Pea soup?"
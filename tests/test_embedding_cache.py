@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from phi.embedder.base import Embedder
+
+from embedding_cache import CachedEmbedder, EmbeddingCache
+
+
+class CountingEmbedder(Embedder):
+    """Embeds a text as [len(text), 1.0]; texts containing "fail" come back empty, like a failed API call."""
+
+    dimensions: int = 2
+    calls: int = 0
+
+    def get_embedding(self, text):
+        self.calls += 1
+        return [] if "fail" in text else [float(len(text)), 1.0]
+
+
+class FlakyEmbedder(CountingEmbedder):
+    """Raises for texts containing "boom", like an API error on one batch."""
+
+    def get_embedding(self, text):
+        if "boom" in text:
+            self.calls += 1
+            raise RuntimeError("rate limited")
+        return super().get_embedding(text)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(path=str(tmp_path / "cache" / "embeddings.sqlite"))
+
+
+def test_database_opened_on_first_use(cache):
+    assert not os.path.exists(cache.path)
+    cache.get_many("model", ["hash"])
+    assert os.path.exists(cache.path)
+
+
+def test_documents_are_cached(cache):
+    embedder = CountingEmbedder()
+    cached = CachedEmbedder(embedder=embedder, cache=cache)
+    assert cached.embed_texts(["pea soup", "tourtière"]) == [[8.0, 1.0], [9.0, 1.0]]
+    assert cached.get_embedding_and_usage("pea soup") == ([8.0, 1.0], None)
+    assert embedder.calls == 2
+    assert cache.stats()["hits"] == 1
+
+
+def test_queries_skip_the_cache(cache):
+    cached = CachedEmbedder(embedder=CountingEmbedder(), cache=cache)
+    assert cached.get_embedding("what can I make with pork?") == [26.0, 1.0]
+    assert cache.stats()["entries"] == 0
+
+
+def test_failed_embeddings_are_not_empty_vectors(cache):
+    cached = CachedEmbedder(embedder=CountingEmbedder(), cache=cache)
+    assert cached.embed_texts(["pea soup", "fail"]) == [[8.0, 1.0], None]
+    with pytest.raises(ValueError):
+        cached.get_embedding_and_usage("fail")
+    assert cache.stats()["entries"] == 1
+
+
+def test_failed_batch_does_not_lose_the_others(cache):
+    embedder = FlakyEmbedder()
+    cached = CachedEmbedder(embedder=embedder, cache=cache, batch_size=1, retry_backoff=0)
+    assert cached.embed_texts(["pea soup", "boom", "tourtière"]) == [[8.0, 1.0], None, [9.0, 1.0]]
+    # Two texts embedded, plus the failing batch tried 1 + max_retries times
+    assert embedder.calls == 2 + 1 + cached.max_retries
+    assert cache.stats()["entries"] == 2
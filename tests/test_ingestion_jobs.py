@@ -0,0 +1,19 @@
+import threading
+
+from ingestion_jobs import JobQueue
+
+
+def test_jobs_share_a_key_only_while_active():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    url, db_url = "https://example.com/cookbook.pdf", "postgresql://db"
+
+    normal = queue.submit((url, db_url, False), lambda job: release.wait(5))
+    assert queue.submit((url, db_url, False), lambda job: None) is normal
+    # A forced reload is queued next to the normal load instead of being dropped
+    forced = queue.submit((url, db_url, True), lambda job: release.wait(5))
+    assert forced is not normal
+
+    release.set()
+    queue._executor.shutdown(wait=True)
+    assert normal.status == forced.status == "done"
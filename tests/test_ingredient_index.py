@@ -0,0 +1,49 @@
+import pytest
+
+from ingredient_index import answer_ingredient_query, build_ingredient_index, parse_ingredient_query
+
+RECIPES = [
+    {"title": "Maple Glazed Carrots", "page": 3, "ingredients": ["1/4 cup maple syrup", "1 lb carrots"]},
+    {"title": "Tourtière", "page": 7, "ingredients": ["1 lb ground pork", "2 potatoes, boiled"]},
+    {"title": "Pea Soup", "page": 12, "ingredients": ["2 cups dried peas", "1 ham bone"]},
+    {"title": "Sugar Pie", "page": 15, "ingredients": ["1 cup brown sugar", "1 cup heavy cream"]},
+]
+INDEX = build_ingredient_index(RECIPES)
+
+
+@pytest.mark.parametrize("question, terms, match_all", [
+    ("What can I make with pork?", ["pork"], True),
+    ("Which recipes use maple syrup and carrots?", ["maple syrup", "carrots"], True),
+    ("What recipes contain ham or pork", ["ham", "pork"], False),
+    ("Recipes with cream", ["cream"], True),
+    ("Show me all the recipes with pork", ["pork"], True),
+    ("Which dishes can I make with peas?", ["peas"], True),
+    ("What recipes are made with potatoes?", ["potatoes"], True),
+])
+def test_list_style_questions(question, terms, match_all):
+    assert parse_ingredient_query(question) == (terms, match_all)
+
+
+@pytest.mark.parametrize("question", [
+    "How do I make pea soup with ham?",
+    "Can I make the pie with cream?",
+    "How long do I cook the tourtière with the lid on?",
+    "Should I bake the carrots with maple syrup or honey?",
+    "What goes well with the sugar pie?",
+    "How many recipes use maple syrup?",
+])
+def test_cooking_questions_go_to_the_llm(question):
+    assert parse_ingredient_query(question) is None
+    assert answer_ingredient_query(question, INDEX, RECIPES) is None
+
+
+def test_answer_from_index():
+    answer = answer_ingredient_query("What can I make with pork?", INDEX, RECIPES)
+    assert answer == "Recipes with pork:\n\n- Tourtière (page 7)"
+    assert answer_ingredient_query("Recipes with lobster", INDEX, RECIPES) is None
+
+
+def test_or_query_needs_a_known_term():
+    answer = answer_ingredient_query("What recipes contain ham or lobster", INDEX, RECIPES)
+    assert answer == "Recipes with ham or lobster:\n\n- Pea Soup (page 12)"
+    assert answer_ingredient_query("What recipes contain lobster or crab", INDEX, RECIPES) is None
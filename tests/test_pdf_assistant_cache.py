@@ -0,0 +1,64 @@
+import os
+import uuid
+
+import pytest
+
+from utils import get_example_queries
+
+# Postgres with pgvector; skipped without it (see test_answer_cache.py)
+TEST_DB_URL = os.getenv("TEST_DB_URL")
+
+
+@pytest.fixture
+def make_assistant(tmp_path, monkeypatch):
+    if not TEST_DB_URL:
+        pytest.skip("TEST_DB_URL not set")
+    import embedding_cache
+    from benchmarks.fakes import FakeEmbedder, FakeLLM, make_cookbook
+    from benchmarks.run import BENCHMARK_USER, cleanup_collection
+    from pdf_assistant import PDFAssistant
+
+    monkeypatch.setattr(embedding_cache.embedding_cache, "path", str(tmp_path / "embeddings.sqlite"))
+    pdf_path = str(tmp_path / "cookbook.pdf")
+    make_cookbook(pdf_path, 10)
+    collection = f"pdf_test_{uuid.uuid4().hex[:12]}"
+
+    assistants = []
+
+    def make(run_id=None):
+        assistant = PDFAssistant(pdf_url=f"file://{pdf_path}", collection_name=collection, db_url=TEST_DB_URL,
+                                 pdf_path=pdf_path, user_id=BENCHMARK_USER, run_id=run_id, embedder=FakeEmbedder(),
+                                 llm=FakeLLM())
+        assistants.append(assistant)
+        return assistant
+
+    yield make
+    assistants[0].answer_cache.invalidate(collection)
+    cleanup_collection(TEST_DB_URL, collection)
+
+
+def test_quick_start_question_is_cached_in_resumed_session(make_assistant):
+    question = get_example_queries()[0]
+    first = make_assistant()
+    first.initialize_assistant()
+    first.chat("How long should the soup simmer?")
+    first.chat(question)
+    assert first.last_response_metrics["source"] == "llm"
+
+    resumed = make_assistant(run_id=first.run_id)
+    resumed.initialize_assistant()
+    resumed.chat(question)
+    assert resumed.last_response_metrics["source"] == "cache"
+
+
+def test_follow_ups_are_not_shared(make_assistant):
+    first = make_assistant()
+    first.initialize_assistant()
+    first.chat("How long should the soup simmer?")
+    first.chat("How long do I bake it?")
+
+    other = make_assistant()
+    other.initialize_assistant()
+    other.chat("How long should the soup simmer?")
+    other.chat("How long do I bake it?")
+    assert other.last_response_metrics["source"] == "llm"
@@ -0,0 +1,37 @@
+import pytest
+from phi.document import Document
+
+from recipe_chunking import RecipeChunking
+
+METHOD = ("Combine the flour and butter in a large bowl until crumbly. Stir in the maple syrup and the cream, "
+          "then pour into the crust and bake at 350°F for 45 minutes or until set. Let cool before slicing.")
+
+
+def recipe(title, lines):
+    return Document(id="doc", name=title, content="\n".join([title, *lines]),
+                    meta_data={"page": 3, "title": title, "section": "Desserts"})
+
+
+@pytest.mark.parametrize("max_chunk_size", [60, 100, 150, 400])
+def test_chunks_fit_max_chunk_size(max_chunk_size):
+    document = recipe("Maple Sugar Pie", ["1 cup brown sugar", "1/2 cup maple syrup", "2 tbsp flour",
+                                          "1 cup heavy cream", METHOD, "Serves 8"])
+    chunks = RecipeChunking(max_chunk_size=max_chunk_size).chunk(document)
+    assert all(len(chunk.content) <= max_chunk_size for chunk in chunks)
+    assert all(chunk.content.startswith("Maple Sugar Pie (continued)\n") for chunk in chunks[1:])
+    text = " ".join(chunk.content.replace("Maple Sugar Pie (continued)\n", "") for chunk in chunks)
+    assert text.split() == document.content.split()
+
+
+def test_short_recipe_is_one_chunk():
+    document = recipe("Pea Soup", ["2 cups dried peas", "1 ham bone", "Simmer for two hours."])
+    chunks = RecipeChunking(max_chunk_size=100).chunk(document)
+    assert [chunk.content for chunk in chunks] == [document.content]
+    assert chunks[0].id == "doc_1" and chunks[0].meta_data["chunk"] == 1
+
+
+def test_long_title_is_not_repeated():
+    title = "A Very Long Recipe Title For A Country Style Braised Pork"
+    chunks = RecipeChunking(max_chunk_size=60).chunk(recipe(title, [METHOD]))
+    assert all(len(chunk.content) <= 60 for chunk in chunks)
+    assert not any("(continued)" in chunk.content for chunk in chunks)
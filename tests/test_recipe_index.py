@@ -0,0 +1,85 @@
+import os
+import uuid
+
+import pytest
+
+from recipe_index import RecipeCatalog, answer_catalog_query
+
+# Postgres with pgvector; the database test is skipped without it (see test_answer_cache.py)
+TEST_DB_URL = os.getenv("TEST_DB_URL")
+
+RECIPES = [
+    {"title": "Maple Glazed Carrots", "page": 3, "section": "Sides", "ingredients": ["1/4 cup maple syrup"]},
+    {"title": "Tourtière", "page": 7, "section": "Mains", "ingredients": ["1 lb ground pork"]},
+    {"title": "Pea Soup", "page": 12, "section": "Soups", "ingredients": ["2 cups dried peas", "1 ham bone"]},
+]
+
+
+@pytest.mark.parametrize("question", [
+    "How many recipes are there?",
+    "How many recipes does this cookbook have?",
+    "how many recipes are in the book",
+    "What is the number of recipes in the cookbook?",
+])
+def test_count_questions(question):
+    assert answer_catalog_query(question, RECIPES) == "The cookbook contains 3 recipes."
+
+
+@pytest.mark.parametrize("question", [
+    "List all recipes",
+    "Show me all the recipes in the cookbook",
+    "What are all of the recipes?",
+    "Give me a list of every recipe",
+])
+def test_list_questions(question):
+    answer = answer_catalog_query(question, RECIPES)
+    assert answer.startswith("The cookbook contains 3 recipes:")
+    assert "Tourtière (page 7)" in answer
+
+
+@pytest.mark.parametrize("question", [
+    "How many recipes use maple syrup?",
+    "How many recipes have pork in them?",
+    "Show me all the recipes with pork",
+    "List all vegetarian recipes",
+    "List all the recipes without meat",
+    "List all recipes using the slow cooker",
+    "What are all the dessert recipes?",
+    "Which of all the recipes is the easiest?",
+    "Tell me about the pea soup recipe",
+])
+def test_filtered_questions_go_to_the_llm(question):
+    assert answer_catalog_query(question, RECIPES) is None
+
+
+def test_page_lookup():
+    assert answer_catalog_query("Which page is the pea soup on?", RECIPES) == "- **Pea Soup** is on page 12"
+
+
+def test_empty_catalog_counts_as_built():
+    if not TEST_DB_URL:
+        pytest.skip("TEST_DB_URL not set")
+    from sqlalchemy import create_engine
+
+    from ingredient_index import IngredientIndexStore
+
+    engine = create_engine(TEST_DB_URL)
+    suffix = uuid.uuid4().hex[:8]
+    catalog = RecipeCatalog(engine, table_name=f"recipe_catalog_test_{suffix}")
+    ingredients = IngredientIndexStore(engine, table_name=f"ingredient_index_test_{suffix}")
+    try:
+        assert not catalog.exists("cookbook") and not ingredients.exists("cookbook")
+        catalog.save("cookbook", [])
+        ingredients.save("cookbook", {})
+        assert catalog.exists("cookbook") and catalog.load("cookbook") == []
+        assert ingredients.exists("cookbook") and ingredients.load("cookbook") == {}
+
+        catalog.save("cookbook", RECIPES)
+        assert catalog.load("cookbook") == RECIPES
+        catalog.drop_collection("cookbook")
+        ingredients.drop_collection("cookbook")
+        assert not catalog.exists("cookbook") and not ingredients.exists("cookbook")
+    finally:
+        catalog.table.drop(engine)
+        ingredients.table.drop(engine)
+        engine.dispose()
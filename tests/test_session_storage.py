@@ -0,0 +1,111 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.sql.expression import text
+
+# Postgres with pgvector; skipped without it (see test_answer_cache.py)
+TEST_DB_URL = os.getenv("TEST_DB_URL")
+
+
+@pytest.fixture
+def engine():
+    if not TEST_DB_URL:
+        pytest.skip("TEST_DB_URL not set")
+    from sqlalchemy import create_engine
+
+    engine = create_engine(TEST_DB_URL)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def table_name(engine):
+    name = f"sessions_test_{uuid.uuid4().hex[:8]}"
+    yield name
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS ai.{name}"))
+
+
+def make_run(run_id, user_id="user", collection="cookbook"):
+    from phi.assistant.run import AssistantRun
+    from session_storage import COLLECTION_KEY
+
+    return AssistantRun(run_id=run_id, user_id=user_id, assistant_data={COLLECTION_KEY: collection},
+                        memory={"chat_history": [{"role": "user", "content": "Pea soup?"}]})
+
+
+def set_age(storage, days, *run_ids):
+    with storage.Session() as sess, sess.begin():
+        sess.execute(
+            text(f"UPDATE ai.{storage.table.name} SET updated_at = now() - make_interval(days => :days) "
+                 "WHERE run_id = ANY(:run_ids)"),
+            {"days": days, "run_ids": list(run_ids)},
+        )
+
+
+def test_list_runs_pages_with_keyset(engine, table_name):
+    from session_storage import SessionStorage
+
+    storage = SessionStorage(table_name=table_name, db_engine=engine)
+    for run_id in ("a", "b", "c", "d", "e"):
+        storage.upsert(make_run(run_id))
+    storage.upsert(make_run("other-cookbook", collection="other"))
+    storage.upsert(make_run("other-user", user_id="someone else"))
+    for days, run_id in ((5, "a"), (4, "b"), (3, "c"), (3, "d"), (1, "e")):
+        set_age(storage, days, run_id)
+
+    pages, before = [], None
+    while True:
+        page = storage.list_runs("user", "cookbook", limit=2, before=before)
+        if not page:
+            break
+        pages.append([run["run_id"] for run in page])
+        before = (page[-1]["updated_at"], page[-1]["run_id"])
+    # Most recent first; c and d have the same updated_at and are ordered by run_id
+    assert pages == [["e", "d"], ["c", "b"], ["a"]]
+    assert storage.list_runs("user", "cookbook", limit=1)[0]["messages"] == 1
+    assert storage.latest_run_id("user", "other") == "other-cookbook"
+
+
+def test_prune_deletes_inactive_runs(engine, table_name):
+    from session_storage import SessionStorage
+
+    storage = SessionStorage(table_name=table_name, db_engine=engine, ttl_days=30)
+    for run_id in ("old", "recent"):
+        storage.upsert(make_run(run_id))
+    set_age(storage, 45, "old")
+    set_age(storage, 10, "recent")
+
+    assert storage.prune(ttl_days=0) == 0
+    assert storage.prune() == 1
+    assert [run["run_id"] for run in storage.list_runs("user")] == ["recent"]
+    assert storage.read("old") is None
+
+
+def test_updated_at_backfilled_only_when_missing(engine, table_name):
+    from phi.storage.assistant.postgres import PgAssistantStorage
+    from session_storage import SessionStorage
+
+    # Rows written by phi's own storage, before SessionStorage managed the table
+    legacy = PgAssistantStorage(table_name=table_name, db_engine=engine)
+    legacy.create()
+    legacy.upsert(make_run("legacy"))
+    storage = SessionStorage(table_name=table_name, db_engine=engine)
+    storage.create()
+    assert storage.list_runs("user")[0]["updated_at"] is not None
+
+    updates = []
+
+    def listener(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE"):
+            updates.append(statement)
+
+    # Later starts find no run without updated_at, so nothing is rewritten
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        SessionStorage(table_name=table_name, db_engine=engine).create()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert updates == []
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+# Export finished traces to OpenTelemetry: "none" (default), "console", or "otlp"
+# (OTLP/gRPC to OTEL_EXPORTER_OTLP_ENDPOINT, http://localhost:4317 by default)
+DEFAULT_TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+DEFAULT_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "recipe-pdf-assistant")
+
+# One JSON line per finished trace at INFO level
+logger = logging.getLogger("recipe_assistant.timing")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Span:
+    """One timed operation of a trace; start and end are time.perf_counter() values."""
+
+    __slots__ = ("name", "start", "end", "parent", "depth", "attributes")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.attributes = attributes
+
+    @property
+    def seconds(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Trace:
+    """Timing spans of one operation, e.g. a chat turn or a knowledge-base load, as a tree.
+
+    Code on the hot path calls span(), which records into the trace active in the
+    current context and does nothing when there is none. Spans nest in the order they
+    are opened; start()/end() record spans that cannot be a single with block, such as
+    one that lasts across the chunks of a streamed response. finish() logs the trace
+    and exports it if TRACE_EXPORTER is set.
+    """
+
+    def __init__(self, name: str, **attributes):
+        self.spans: List[Span] = []
+        self._open: List[Span] = []
+        self.root = self.start(name, **attributes)
+
+    def start(self, name: str, **attributes) -> Span:
+        span = Span(name, self._open[-1] if self._open else None, attributes)
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def end(self, span: Span, **attributes) -> None:
+        span.end = time.perf_counter()
+        span.attributes.update(attributes)
+        if span in self._open:
+            # Also closes spans left open inside it
+            del self._open[self._open.index(span):]
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict[str, Any]]:
+        span = self.start(name, **attributes)
+        try:
+            yield span.attributes
+        except BaseException as e:
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            self.end(span)
+
+    @contextmanager
+    def activate(self) -> Iterator["Trace"]:
+        """Make this the trace span() records into, for the duration of the block."""
+        token = _current_trace.set(self)
+        try:
+            yield self
+        finally:
+            _current_trace.reset(token)
+
+    def finish(self, **attributes) -> None:
+        self.end(self.root, **attributes)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(self.to_dict(), default=str))
+        export(self)
+
+    @property
+    def seconds(self) -> float:
+        return self.root.seconds
+
+    def breakdown(self) -> List[Dict[str, Any]]:
+        """The spans in start order with duration, self time (excluding child spans) and attributes, in ms."""
+        child_seconds: Dict[int, float] = {}
+        for span in self.spans:
+            if span.parent is not None:
+                child_seconds[id(span.parent)] = child_seconds.get(id(span.parent), 0.0) + span.seconds
+        return [
+            {
+                "name": span.name,
+                "depth": span.depth,
+                "start_ms": round((span.start - self.root.start) * 1000, 2),
+                "ms": round(span.seconds * 1000, 2),
+                "self_ms": round(max(0.0, span.seconds - child_seconds.get(id(span), 0.0)) * 1000, 2),
+                **span.attributes,
+            }
+            for span in self.spans
+        ]
+
+    def totals(self) -> Dict[str, float]:
+        """Total ms per span name below the root, e.g. all vector searches of a turn together."""
+        totals: Dict[str, float] = {}
+        for span in self.spans[1:]:
+            totals[span.name] = round(totals.get(span.name, 0.0) + span.seconds * 1000, 2)
+        return totals
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"trace": self.root.name, "ms": round(self.seconds * 1000, 2), "spans": self.breakdown()[1:],
+                **self.root.attributes}
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Dict[str, Any]]:
+    """Time the block as a span of the active trace; yields its attributes dict for results to be added."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield {}
+        return
+    with trace.span(name, **attributes) as span_attributes:
+        yield span_attributes
+
+
+@contextmanager
+def traced(name: str, **attributes) -> Iterator[Dict[str, Any]]:
+    """Time the block as a new trace, or as a span if a trace is already active."""
+    if _current_trace.get() is not None:
+        with span(name, **attributes) as span_attributes:
+            yield span_attributes
+        return
+    trace = Trace(name, **attributes)
+    try:
+        with trace.activate():
+            yield trace.root.attributes
+    finally:
+        trace.finish()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def _get_tracer():
+    """The OpenTelemetry tracer for TRACE_EXPORTER, created on first use; None if export is off."""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = _create_tracer(DEFAULT_TRACE_EXPORTER) or False
+    return _tracer or None
+
+
+def _create_tracer(exporter: str):
+    if exporter in ("", "none"):
+        return None
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        print("`opentelemetry-sdk` not installed, traces will not be exported")
+        return None
+
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            print("`opentelemetry-exporter-otlp-proto-grpc` not installed, traces will not be exported")
+            return None
+        span_exporter = OTLPSpanExporter()
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter()
+    else:
+        print(f"Unknown TRACE_EXPORTER {exporter!r}, traces will not be exported")
+        return None
+
+    provider = TracerProvider(resource=Resource.create({"service.name": DEFAULT_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    return provider.get_tracer("recipe_assistant")
+
+
+def _otel_value(value: Any) -> Any:
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+
+def export(trace: Trace) -> None:
+    """Send a finished trace to OpenTelemetry, with its recorded timestamps (no-op unless TRACE_EXPORTER is set)."""
+    tracer = _get_tracer()
+    if tracer is None:
+        return
+    from opentelemetry import trace as otel_trace
+
+    # Spans are timed with perf_counter; OpenTelemetry wants epoch nanoseconds
+    epoch_offset = time.time_ns() - time.perf_counter_ns()
+    otel_spans: Dict[int, Any] = {}
+    for span in trace.spans:
+        parent = otel_spans.get(id(span.parent))
+        otel_spans[id(span)] = tracer.start_span(
+            span.name,
+            context=otel_trace.set_span_in_context(parent) if parent is not None else None,
+            start_time=epoch_offset + int(span.start * 1e9),
+            attributes={key: _otel_value(value) for key, value in span.attributes.items() if value is not None},
+        )
+    for span in reversed(trace.spans):
+        end = span.end if span.end is not None else span.start
+        otel_spans[id(span)].end(end_time=epoch_offset + int(end * 1e9))
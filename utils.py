@@ -1,6 +1,4 @@
 import os
-import fitz  # PyMuPDF
-import re
 
 from dotenv import load_dotenv
 
@@ -36,25 +34,11 @@ def get_filename_from_url(url):
 
 
 
-def extract_recipe_titles_from_pdf(pdf_path):
+def extract_recipe_titles_from_pdf(pdf_path, workers=None):
     """
-    Extract potential recipe titles from a PDF by scanning for bold headers or patterns.
-    Returns a list of unique recipe titles.
+    Extract potential recipe titles from a local PDF by scanning for bold or large headers.
+    Returns a sorted list of unique recipe titles.
     """
-    doc = fitz.open(pdf_path)
-    titles = set()
-
-    # Define a regex pattern for typical recipe titles (can be adjusted)
-    title_pattern = re.compile(r'^[A-Z][A-Za-z\s,-]{3,}$')
-
-    for page in doc:
-        blocks = page.get_text("dict")['blocks']
-        for block in blocks:
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    text = span["text"].strip()
-                    if span.get("font", "").lower().startswith("bold") or span.get("flags", 0) & 2:
-                        if title_pattern.match(text):
-                            titles.add(text)
-
-    return sorted(titles)
\ No newline at end of file
+    from extract_recipe_titles import extract_titles_from_file
+
+    return sorted(extract_titles_from_file(pdf_path, workers=workers))
@@ -0,0 +1,269 @@
+import os
+import time
+import argparse
+import statistics
+from math import sqrt
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pgvector.sqlalchemy import BIT, Vector
+from sqlalchemy.sql.expression import text, select, cast, func, literal
+
+from phi.vectordb.distance import Distance
+from phi.vectordb.pgvector.index import HNSW, Ivfflat
+
+# pgvector's own defaults; phi's HNSW() default of ef_search=5 caps results at 5 rows
+DEFAULT_HNSW_M = 16
+DEFAULT_HNSW_EF_CONSTRUCTION = 64
+DEFAULT_HNSW_EF_SEARCH = 40
+DEFAULT_IVFFLAT_PROBES = 10
+
+# Hamming-distance candidates fetched per requested row from a binary-quantized index
+DEFAULT_RESCORE_FACTOR = 4
+
+
+def make_index(kind: str = "hnsw", m: int = DEFAULT_HNSW_M, ef_construction: int = DEFAULT_HNSW_EF_CONSTRUCTION,
+               ef_search: int = DEFAULT_HNSW_EF_SEARCH, lists: Optional[int] = None,
+               probes: int = DEFAULT_IVFFLAT_PROBES) -> Optional[Union[HNSW, Ivfflat]]:
+    """Return the phi index config for kind ("hnsw", "ivfflat" or "none").
+
+    For IVFFlat, lists=None sizes the lists from the row count when the index is built.
+    """
+    kind = kind.lower()
+    if kind in ("", "none"):
+        return None
+    if kind == "hnsw":
+        return HNSW(m=m, ef_construction=ef_construction, ef_search=ef_search)
+    if kind == "ivfflat":
+        return Ivfflat(lists=lists or 100, probes=probes, dynamic_lists=lists is None)
+    raise ValueError(f"Unknown vector index type: {kind}")
+
+
+def index_from_env() -> Optional[Union[HNSW, Ivfflat]]:
+    """Build the index config from VECTOR_INDEX, HNSW_* and IVFFLAT_* environment variables."""
+    lists = os.getenv("IVFFLAT_LISTS")
+    return make_index(
+        kind=os.getenv("VECTOR_INDEX", "hnsw"),
+        m=int(os.getenv("HNSW_M", str(DEFAULT_HNSW_M))),
+        ef_construction=int(os.getenv("HNSW_EF_CONSTRUCTION", str(DEFAULT_HNSW_EF_CONSTRUCTION))),
+        ef_search=int(os.getenv("HNSW_EF_SEARCH", str(DEFAULT_HNSW_EF_SEARCH))),
+        lists=int(lists) if lists else None,
+        probes=int(os.getenv("IVFFLAT_PROBES", str(DEFAULT_IVFFLAT_PROBES))),
+    )
+
+
+def search_settings(index: Optional[Union[HNSW, Ivfflat]], limit: int) -> List[str]:
+    """Return the SET LOCAL statements to run before an ANN query returning `limit` rows."""
+    if isinstance(index, HNSW):
+        # HNSW returns at most ef_search rows, so it must be at least the requested limit
+        return [f"SET LOCAL hnsw.ef_search = {max(index.ef_search, limit)}"]
+    if isinstance(index, Ivfflat):
+        return [f"SET LOCAL ivfflat.probes = {index.probes}"]
+    return []
+
+
+def storage_of(vector_db) -> str:
+    """Embedding storage of a collection: "vector" (float32), "halfvec" or "binary" (see vector_storage.py)."""
+    return getattr(vector_db, "storage", "vector")
+
+
+def distance_expression(vector_db, embedding: List[float], column=None):
+    """Exact distance between the stored embeddings (or column) and embedding."""
+    column = vector_db.table.c.embedding if column is None else column
+    if vector_db.distance == Distance.l2:
+        return column.l2_distance(embedding)
+    if vector_db.distance == Distance.max_inner_product:
+        return column.max_inner_product(embedding)
+    return column.cosine_distance(embedding)
+
+
+def _quantized(vector_db, value):
+    return cast(func.binary_quantize(value), BIT(vector_db.dimensions))
+
+
+def index_target(vector_db) -> Tuple[str, str]:
+    """Return (indexed expression, operator class) for the collection's storage and distance."""
+    storage = storage_of(vector_db)
+    if storage == "binary":
+        # Only the 1-bit-per-dimension quantization is indexed; rows keep half-precision values
+        return f"(binary_quantize(embedding)::bit({vector_db.dimensions}))", "bit_hamming_ops"
+    ops = {Distance.l2: "l2", Distance.max_inner_product: "ip"}.get(vector_db.distance, "cosine")
+    return "embedding", f"{storage}_{ops}_ops"
+
+
+def ann_select(vector_db, columns, embedding: List[float], limit: int, where=(),
+               rescore_factor: int = DEFAULT_RESCORE_FACTOR):
+    """Return (statement, SET LOCAL settings) for a nearest-neighbour query of `limit` rows.
+
+    float32 and half-precision collections are searched directly. For binary-quantized
+    collections the index returns limit * rescore_factor candidates by Hamming distance,
+    which are then re-ranked by their distance at the stored half precision; the float32
+    values are not kept, so measure recall against a float32 copy (see measure_recall).
+    """
+    table = vector_db.table
+    if storage_of(vector_db) != "binary" or rescore_factor <= 1:
+        stmt = select(*columns).where(*where).order_by(distance_expression(vector_db, embedding)).limit(limit)
+        return stmt, search_settings(vector_db.index, limit)
+
+    candidates = limit * rescore_factor
+    # Explicit cast: binary_quantize() is overloaded for vector and halfvec
+    query_vector = cast(literal(embedding, Vector(vector_db.dimensions)), Vector(vector_db.dimensions))
+    ann_order = _quantized(vector_db, table.c.embedding).op("<~>")(func.binary_quantize(query_vector))
+    inner = (
+        select(*columns, table.c.embedding.label("rescore_embedding"))
+        .where(*where).order_by(ann_order).limit(candidates).subquery()
+    )
+    stmt = (
+        select(*[inner.c[column.name] for column in columns])
+        .order_by(distance_expression(vector_db, embedding, column=inner.c.rescore_embedding))
+        .limit(limit)
+    )
+    return stmt, search_settings(vector_db.index, candidates)
+
+
+def ann_indexes(vector_db) -> Dict[str, str]:
+    """Return {index name: definition} for the HNSW/IVFFlat indexes on a collection table."""
+    stmt = text(
+        "select indexname, indexdef from pg_indexes where schemaname = :schema and tablename = :table "
+        "and (indexdef ilike '%using hnsw%' or indexdef ilike '%using ivfflat%')"
+    )
+    with vector_db.db_engine.connect() as conn:
+        rows = conn.execute(stmt, {"schema": vector_db.schema, "table": vector_db.collection}).fetchall()
+    return {row.indexname: row.indexdef for row in rows}
+
+
+def build_index(vector_db) -> Optional[float]:
+    """Create the configured ANN index on a collection and return the build time in seconds.
+
+    The index name encodes its parameters, so changing them builds a new index (and
+    drops the old one) while an unchanged configuration is a no-op returning None.
+    """
+    index = vector_db.index
+    if index is None:
+        return None
+
+    if isinstance(index, Ivfflat):
+        if index.dynamic_lists:
+            rows = vector_db.get_count()
+            index.lists = max(1, rows // 1000 if rows < 1_000_000 else int(sqrt(rows)))
+            index.dynamic_lists = False
+        index.name = f"{vector_db.collection}_ivfflat_l{index.lists}"
+    else:
+        index.name = f"{vector_db.collection}_hnsw_m{index.m}_ef{index.ef_construction}"
+    if storage_of(vector_db) != "vector":
+        index.name += f"_{storage_of(vector_db)}"
+
+    existing = ann_indexes(vector_db)
+    if index.name in existing:
+        return None
+    with vector_db.db_engine.begin() as conn:
+        for name in existing:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{vector_db.schema}"."{name}"'))
+
+    expression, opclass = index_target(vector_db)
+    if isinstance(index, Ivfflat):
+        method, options = "ivfflat", f"lists = {index.lists}"
+    else:
+        method, options = "hnsw", f"m = {index.m}, ef_construction = {index.ef_construction}"
+
+    start = time.perf_counter()
+    with vector_db.db_engine.begin() as conn:
+        for key, value in index.configuration.items():
+            conn.execute(text(f"SET LOCAL {key} = '{value}'"))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index.name} ON {vector_db.table} "
+            f"USING {method} ({expression} {opclass}) WITH ({options})"
+        ))
+    elapsed = time.perf_counter() - start
+    print(f"Built {index.name} on {vector_db.get_count()} rows in {elapsed:.2f}s")
+    return elapsed
+
+
+def as_list(embedding) -> List[float]:
+    """Convert a fetched embedding (numpy array or pgvector HalfVector) to a list of floats."""
+    if hasattr(embedding, "to_list"):
+        return embedding.to_list()
+    return [float(x) for x in embedding]
+
+
+def measure_recall(vector_db, k: int = 10, num_queries: int = 50, reference_db=None) -> Dict[str, Any]:
+    """Compare ANN search against exact search on a sample of stored embeddings.
+
+    Ground truth is an exact (index-free) search on reference_db, which defaults to
+    vector_db itself; pass the float32 collection to measure a compressed copy.
+    Returns recall@k (fraction of the exact top-k the index also returned) and the
+    median latency of both searches in milliseconds.
+    """
+    reference_db = reference_db or vector_db
+    table = reference_db.table
+    with reference_db.db_engine.connect() as conn:
+        queries = [as_list(row.embedding) for row in conn.execute(
+            select(table.c.embedding).order_by(text("random()")).limit(num_queries)
+        )]
+
+    recalls, ann_times, exact_times = [], [], []
+    for embedding in queries:
+        ann_stmt, ann_settings = ann_select(vector_db, [vector_db.table.c.id], embedding, k)
+        exact_stmt = select(table.c.id).order_by(distance_expression(reference_db, embedding)).limit(k)
+        results = {}
+        for mode, db, stmt, settings in (
+            ("ann", vector_db, ann_stmt, ann_settings),
+            ("exact", reference_db, exact_stmt, ["SET LOCAL enable_indexscan = off"]),
+        ):
+            with db.db_engine.begin() as conn:
+                for setting in settings:
+                    conn.execute(text(setting))
+                start = time.perf_counter()
+                results[mode] = {row.id for row in conn.execute(stmt)}
+                (ann_times if mode == "ann" else exact_times).append((time.perf_counter() - start) * 1000)
+        if results["exact"]:
+            recalls.append(len(results["ann"] & results["exact"]) / len(results["exact"]))
+
+    return {
+        "collection": vector_db.collection,
+        "index": vector_db.index.name if vector_db.index else None,
+        "k": k,
+        "queries": len(queries),
+        "recall": statistics.mean(recalls) if recalls else None,
+        "ann_ms_p50": statistics.median(ann_times) if ann_times else None,
+        "exact_ms_p50": statistics.median(exact_times) if exact_times else None,
+    }
+
+
+def main():
+    """Build an index on an existing collection and report build time and recall."""
+    from sqlalchemy.engine import create_engine
+
+    from vector_storage import open_collection
+
+    parser = argparse.ArgumentParser(description="Build and evaluate an ANN index on a cookbook collection.")
+    parser.add_argument("collection")
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--index", default="hnsw", choices=["hnsw", "ivfflat"])
+    parser.add_argument("--m", type=int, default=DEFAULT_HNSW_M)
+    parser.add_argument("--ef-construction", type=int, default=DEFAULT_HNSW_EF_CONSTRUCTION)
+    parser.add_argument("--ef-search", type=int, default=DEFAULT_HNSW_EF_SEARCH)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, default=DEFAULT_IVFFLAT_PROBES)
+    parser.add_argument("--schema", default="ai")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--reference", default=None,
+                        help="float32 copy of the collection to measure recall against (default: the collection itself)")
+    args = parser.parse_args()
+
+    db_url = args.db_url or os.getenv("DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+    index = make_index(args.index, m=args.m, ef_construction=args.ef_construction, ef_search=args.ef_search,
+                       lists=args.lists, probes=args.probes)
+    # Opened with the collection's own dimensions and storage (vector, halfvec or binary)
+    db_engine = create_engine(db_url)
+    vector_db = open_collection(db_engine, args.collection, args.schema, index=index)
+    reference_db = open_collection(db_engine, args.reference, args.schema) if args.reference else None
+    build_time = build_index(vector_db)
+    report = measure_recall(vector_db, k=args.k, num_queries=args.queries, reference_db=reference_db)
+    report["build_seconds"] = build_time
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
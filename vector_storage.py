@@ -0,0 +1,192 @@
+import os
+import json
+import argparse
+from typing import Any, Dict, List, Optional
+
+from pgvector.sqlalchemy import HALFVEC, Vector
+from sqlalchemy.engine import create_engine
+from sqlalchemy.sql.expression import text
+
+from vector_index import build_index, make_index, measure_recall, ann_indexes
+
+# "vector": float32 (4 bytes/dimension). "halfvec": float16 (2 bytes/dimension).
+# "binary": float16 rows with a 1-bit-per-dimension (binary-quantized) ANN index whose
+# candidates are re-ranked at half precision. Neither keeps the float32 values, so recall
+# is measured against a float32 copy (benchmark). Needs pgvector >= 0.7 for halfvec/binary.
+STORAGE_TYPES = ("vector", "halfvec", "binary")
+
+
+def storage_from_env() -> str:
+    storage = os.getenv("VECTOR_STORAGE", "vector").lower()
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unknown vector storage: {storage} (expected one of {', '.join(STORAGE_TYPES)})")
+    return storage
+
+
+def column_type(storage: str, dimensions: Optional[int]):
+    """Return the SQLAlchemy type of the embedding column for a storage type."""
+    return Vector(dimensions) if storage == "vector" else HALFVEC(dimensions)
+
+
+def current_column_type(db_engine, schema: str, collection: str) -> Optional[str]:
+    """Return the embedding column type of an existing collection table (e.g. "vector(1536)"), or None."""
+    stmt = text(
+        "select format_type(a.atttypid, a.atttypmod) from pg_attribute a "
+        "join pg_class c on c.oid = a.attrelid join pg_namespace n on n.oid = c.relnamespace "
+        "where n.nspname = :schema and c.relname = :table and a.attname = 'embedding' and not a.attisdropped"
+    )
+    with db_engine.connect() as conn:
+        return conn.execute(stmt, {"schema": schema, "table": collection}).scalar()
+
+
+def open_collection(db_engine, collection: str, schema: str = "ai", storage: Optional[str] = None, index=None):
+    """Return a HybridPgVector2 for an existing collection, with the dimensions of its table.
+
+    storage=None uses the storage the collection has: "vector" or "halfvec" from the column
+    type, and "binary" for a halfvec column with a binary-quantized ANN index.
+    """
+    from phi.embedder.openai import OpenAIEmbedder
+    from hybrid_search import HybridPgVector2
+
+    current = current_column_type(db_engine, schema, collection)
+    if current is None:
+        raise ValueError(f"Collection {collection} does not exist")
+    dimensions = int(current.split("(")[1].rstrip(")"))
+    detected = "vector" if current.startswith("vector") else "halfvec"
+    # The embedder only provides the table definition; nothing is embedded here
+    vector_db = HybridPgVector2(collection=collection, schema=schema, db_engine=db_engine,
+                                embedder=OpenAIEmbedder(dimensions=dimensions), index=index,
+                                storage=storage or detected)
+    if storage is None and detected == "halfvec":
+        # Same column type as halfvec; only the ANN index and the search differ
+        if any("binary_quantize" in definition for definition in ann_indexes(vector_db).values()):
+            vector_db.storage = "binary"
+    return vector_db
+
+
+def migrate_collection(vector_db) -> bool:
+    """Convert an existing collection table to vector_db.storage in place and rebuild its ANN index.
+
+    Returns False if the table already has the target column type. Converting to half
+    precision is lossy; converting back to "vector" keeps the half-precision values.
+    """
+    current = current_column_type(vector_db.db_engine, vector_db.schema, vector_db.collection)
+    if current is None:
+        raise ValueError(f"Collection {vector_db.collection} does not exist")
+    dimensions = int(current.split("(")[1].rstrip(")"))
+    target = "vector" if vector_db.storage == "vector" else "halfvec"
+    existing_indexes = ann_indexes(vector_db)
+    # halfvec <-> binary keeps the column type but swaps the index
+    has_binary_index = any("binary_quantize" in definition for definition in existing_indexes.values())
+    if current == f"{target}({dimensions})" and has_binary_index == (vector_db.storage == "binary"):
+        return False
+
+    with vector_db.db_engine.begin() as conn:
+        # ANN indexes are tied to the column type, so they are dropped and rebuilt
+        for name in existing_indexes:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{vector_db.schema}"."{name}"'))
+        conn.execute(text(
+            f"ALTER TABLE {vector_db.table} ALTER COLUMN embedding TYPE {target}({dimensions}) "
+            f"USING embedding::{target}({dimensions})"
+        ))
+    print(f"Converted {vector_db.collection} from {current} to {vector_db.storage}")
+    build_index(vector_db)
+    return True
+
+
+def list_collections(db_engine, schema: str = "ai") -> List[str]:
+    """Return every PgVector2 collection table in schema (tables with embedding and content_hash columns)."""
+    stmt = text(
+        "select c.relname from pg_class c join pg_namespace n on n.oid = c.relnamespace "
+        "where n.nspname = :schema and c.relkind = 'r' "
+        "and (select count(*) from pg_attribute a where a.attrelid = c.oid and not a.attisdropped "
+        "and a.attname in ('embedding', 'content_hash')) = 2 "
+        "order by c.relname"
+    )
+    with db_engine.connect() as conn:
+        return [row[0] for row in conn.execute(stmt, {"schema": schema})]
+
+
+def _sizes(vector_db) -> Dict[str, int]:
+    """Table and ANN index sizes in bytes; the index size is what must stay in RAM for fast search."""
+    with vector_db.db_engine.connect() as conn:
+        table_bytes = conn.execute(text(f"select pg_table_size('{vector_db.table}')")).scalar()
+        index_bytes = sum(
+            conn.execute(text(f"select pg_relation_size('\"{vector_db.schema}\".\"{name}\"')")).scalar()
+            for name in ann_indexes(vector_db)
+        )
+    return {"table_bytes": table_bytes, "index_bytes": index_bytes}
+
+
+def benchmark_collection(source_db, make_db, k: int = 10, num_queries: int = 50) -> Dict[str, Any]:
+    """Compare storage, index size and recall of every storage type against a float32 collection.
+
+    make_db(collection, storage, dimensions) must return a vector DB handle for a collection. Each
+    storage type is benchmarked on a temporary copy of source_db that is dropped afterwards;
+    recall is measured against exact float32 search on source_db.
+    """
+    build_index(source_db)
+    results = {"vector": {**_sizes(source_db), **measure_recall(source_db, k=k, num_queries=num_queries)}}
+    for storage in STORAGE_TYPES[1:]:
+        copy_db = make_db(f"{source_db.collection}_bench_{storage}", storage, source_db.dimensions)
+        copy_db.drop()
+        with source_db.db_engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE {copy_db.table} (LIKE {source_db.table} INCLUDING DEFAULTS)"))
+            conn.execute(text(f"INSERT INTO {copy_db.table} SELECT * FROM {source_db.table}"))
+        try:
+            migrate_collection(copy_db)
+            results[storage] = {
+                **_sizes(copy_db),
+                **measure_recall(copy_db, k=k, num_queries=num_queries, reference_db=source_db),
+            }
+        finally:
+            copy_db.drop()
+
+    base = results["vector"]
+    for report in results.values():
+        report["table_ratio"] = report["table_bytes"] / base["table_bytes"] if base["table_bytes"] else None
+        report["index_ratio"] = report["index_bytes"] / base["index_bytes"] if base["index_bytes"] else None
+    return results
+
+
+def main():
+    """Migrate collections to a compact storage type, or benchmark the storage types on one collection."""
+    from phi.embedder.openai import OpenAIEmbedder
+    from hybrid_search import HybridPgVector2
+    from vector_index import index_from_env
+
+    parser = argparse.ArgumentParser(description="Convert or benchmark the embedding storage of cookbook collections.")
+    parser.add_argument("command", choices=["migrate", "benchmark"])
+    parser.add_argument("collections", nargs="*", help="Collections to process (migrate: default all)")
+    parser.add_argument("--storage", default=None, choices=STORAGE_TYPES, help="Target storage (migrate)")
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--schema", default="ai")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    db_url = args.db_url or os.getenv("DB_URL", "postgresql+psycopg://ai:ai@localhost:5532/ai")
+    db_engine = create_engine(db_url)
+
+    def make_db(collection: str, storage: str, dimensions: Optional[int] = None):
+        index = index_from_env() or make_index()
+        if dimensions is None:
+            return open_collection(db_engine, collection, args.schema, storage=storage, index=index)
+        # A new table for the benchmark; the embedder only provides the table definition
+        return HybridPgVector2(collection=collection, schema=args.schema, db_engine=db_engine,
+                               embedder=OpenAIEmbedder(dimensions=dimensions), index=index, storage=storage)
+
+    if args.command == "migrate":
+        storage = args.storage or storage_from_env()
+        for collection in args.collections or list_collections(db_engine, args.schema):
+            if not migrate_collection(make_db(collection, storage)):
+                print(f"{collection} already uses {storage}")
+        return
+
+    for collection in args.collections:
+        print(json.dumps(benchmark_collection(make_db(collection, "vector"), make_db,
+                                              k=args.k, num_queries=args.queries), indent=2))
+
+
+if __name__ == "__main__":
+    main()